@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import time
+from typing import Optional, Dict, Any
+from urllib.parse import urlsplit
+
+
+class AssetCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._index_path = os.path.join(directory, 'index.json')
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._load()
+
+    @staticmethod
+    def asset_key(url: str) -> str:
+        return urlsplit(url).path
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, 'blobs', digest[:2], digest)
+
+    def _load(self) -> None:
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._index = {}
+
+    def get(self, url: str) -> Optional[bytes]:
+        key = self.asset_key(url)
+        entry = self._index.get(key)
+
+        if entry is not None:
+            try:
+                with open(self._blob_path(entry['sha256']), 'rb') as f:
+                    data = f.read()
+                if hashlib.sha256(data).hexdigest() == entry['sha256']:
+                    entry['last_used'] = time.time()
+                    self._dirty = True
+                    self.hits += 1
+                    return data
+            except OSError:
+                pass
+
+            del self._index[key]
+            self._dirty = True
+
+        self.misses += 1
+        return None
+
+    def put(self, url: str, data: bytes) -> None:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.tmp"
+            with open(temporary, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, path)
+
+        self._index[self.asset_key(url)] = {'sha256': digest, 'size': len(data), 'last_used': time.time()}
+        self._dirty = True
+        self._evict()
+
+    def _evict(self) -> None:
+        blobs: Dict[str, Dict[str, Any]] = {}
+        for key, entry in self._index.items():
+            blob = blobs.setdefault(entry['sha256'], {'size': entry['size'], 'last_used': 0.0, 'keys': []})
+            blob['last_used'] = max(blob['last_used'], entry['last_used'])
+            blob['keys'].append(key)
+
+        total = sum(blob['size'] for blob in blobs.values())
+
+        for digest, blob in sorted(blobs.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            for key in blob['keys']:
+                del self._index[key]
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+            total -= blob['size']
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f"{self._index_path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(temporary, self._index_path)
+        self._dirty = False
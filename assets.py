@@ -0,0 +1,125 @@
+import asyncio
+from typing import Optional, List, Dict, Tuple
+
+import aiohttp
+
+from assetcache import AssetCache
+from spec import GuildSpec
+
+
+async def download_asset(session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
+    try:
+        async with session.get(url) as resp:
+            if resp.status == 200:
+                return await resp.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        pass
+    return None
+
+
+def create_session(limit: int) -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(limit=limit, keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60))
+
+
+class AssetPipeline:
+    def __init__(self, session: aiohttp.ClientSession, window: int = 8, cache: Optional[AssetCache] = None):
+        self._session = session
+        self._cache = cache
+        self._window = asyncio.Semaphore(max(1, window))
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    def start(self, assets: List[Tuple[str, str]]) -> None:
+        loop = asyncio.get_running_loop()
+        queued = []
+
+        for key, url in assets:
+            if key not in self._futures:
+                self._futures[key] = loop.create_future()
+                queued.append((key, url))
+
+        if queued:
+            self._tasks.append(asyncio.ensure_future(self._produce(queued)))
+
+    async def _produce(self, assets: List[Tuple[str, str]]) -> None:
+        for key, url in assets:
+            await self._window.acquire()
+            self._tasks.append(asyncio.ensure_future(self._download(key, url)))
+
+    async def _download(self, key: str, url: str) -> None:
+        data = self._cache.get(url) if self._cache else None
+        if data is None:
+            try:
+                data = await download_asset(self._session, url)
+            except Exception:
+                data = None
+            if data is not None and self._cache:
+                self._cache.put(url, data)
+        future = self._futures.get(key)
+        if future is not None and not future.done():
+            future.set_result(data)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        future = self._futures.get(key)
+        if future is None:
+            return None
+
+        try:
+            return await future
+        finally:
+            self._futures.pop(key, None)
+            self._window.release()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._futures.clear()
+        if self._cache:
+            self._cache.save()
+
+
+def snapshot_assets(snapshot: GuildSpec) -> List[Tuple[str, str]]:
+    assets = []
+    settings = snapshot.settings
+
+    for field in ('icon', 'banner'):
+        if getattr(settings, field) is None and getattr(settings, f"{field}_url"):
+            assets.append((field, getattr(settings, f"{field}_url")))
+
+    for emoji in snapshot.emojis:
+        if emoji.image is None and emoji.url:
+            assets.append((f"emoji:{emoji.id}", emoji.url))
+
+    return assets
+
+
+async def fill_snapshot_assets(snapshot: GuildSpec, session: aiohttp.ClientSession, window: int = 8,
+                               cache: Optional[AssetCache] = None) -> Tuple[GuildSpec, int]:
+    pipeline = AssetPipeline(session, window, cache)
+    assets = snapshot_assets(snapshot)
+    pipeline.start(assets)
+    missing = 0
+    settings = {}
+    emojis = []
+
+    try:
+        for field in ('icon', 'banner'):
+            if getattr(snapshot.settings, field) is None and getattr(snapshot.settings, f"{field}_url"):
+                settings[field] = await pipeline.get(field)
+                missing += settings[field] is None
+
+        for emoji in snapshot.emojis:
+            if emoji.image is None and emoji.url:
+                emoji = emoji.replace(image=await pipeline.get(f"emoji:{emoji.id}"))
+                missing += emoji.image is None
+            emojis.append(emoji)
+    finally:
+        await pipeline.close()
+
+    return snapshot.replace(emojis=tuple(emojis), settings=snapshot.settings.replace(**settings)), missing
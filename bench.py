@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+from typing import Optional, List, Dict, Any, Callable, Awaitable
+
+from main import DiscordServerCloner, print_info, print_success, print_warning, print_error
+from mockdiscord import MockDiscord, generate_guild, use_mock
+from plan import build_clean_plan, build_clone_plan
+from capture import capture_guild
+
+SCENARIOS = {
+    'small': {'roles': 20, 'categories': 5, 'channels': 40, 'overwrites': 2, 'emojis': 10},
+    'large': {'roles': 250, 'categories': 50, 'channels': 450, 'overwrites': 4, 'emojis': 250},
+    'overwrites': {'roles': 100, 'categories': 20, 'channels': 200, 'overwrites': 25, 'emojis': 0},
+    'emojis': {'roles': 5, 'categories': 1, 'channels': 5, 'overwrites': 1, 'emojis': 250},
+}
+TARGET = {'roles': 10, 'categories': 3, 'channels': 20, 'overwrites': 2, 'emojis': 5}
+
+
+async def measure(mock: MockDiscord, cloner: DiscordServerCloner, phase: str,
+                  action: Callable[[], Awaitable[Any]], verbose: bool) -> Dict[str, Any]:
+    mock.reset_counters()
+    waited = cloner.scheduler.waited
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    milestones = {}
+
+    def on_event(event: Dict[str, Any]) -> None:
+        if event['type'] == 'milestone':
+            milestones.setdefault(event['milestone'], time.perf_counter() - started)
+
+    tracemalloc.start()
+    cloner.metrics.events.subscribe(on_event)
+    started = time.perf_counter()
+    try:
+        with output:
+            ok = await action()
+    finally:
+        cloner.metrics.events.unsubscribe(on_event)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'phase': phase,
+        'ok': bool(ok),
+        'seconds': round(seconds, 3),
+        'structure': round(milestones['structure'], 3) if 'structure' in milestones else None,
+        'calls': mock.requests,
+        'calls_per_second': round(mock.requests / seconds, 1) if seconds else 0.0,
+        'rate_limited': mock.rate_limited,
+        'downloads': mock.downloads,
+        'waited': round(cloner.scheduler.waited - waited, 3),
+        'peak_mb': round(peak / (1024 * 1024), 2),
+    }
+
+
+async def run_scenario(name: str, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    mock = MockDiscord(latency=args.latency, jitter=args.jitter, time_scale=args.time_scale)
+    source_id = mock.add_guild(generate_guild('Source', seed=1, **SCENARIOS[name]))
+    target_id = mock.add_guild(generate_guild('Target', seed=2, **TARGET))
+    use_mock(await mock.start())
+
+    cloner = DiscordServerCloner('mock-token')
+    cloner.cache = None
+    cloner.use_gateway = args.gateway
+    results = []
+
+    async def clean() -> bool:
+        cloner.target_guild = await cloner.get_guild(target_id)
+        plan = build_clean_plan(capture_guild(cloner.target_guild), cloner._top_role_position())
+        return await cloner.execute_plan(plan, {}, {}, {}) == 0
+
+    async def clone() -> bool:
+        plan = build_clone_plan(cloner.source, capture_guild(cloner.target_guild))
+        return await cloner.execute_plan(plan, {}, {}, {}) == 0
+
+    phases = [
+        ('read', lambda: cloner.read_source(source_id)),
+        ('clean', clean),
+        ('clone', clone),
+        ('sync', lambda: cloner.sync_snapshot(cloner.source, target_id)),
+        ('verify', lambda: cloner.verify_target(cloner.source, target_id)),
+    ]
+
+    try:
+        results.append(await measure(mock, cloner, 'connect', lambda: cloner.connect([source_id, target_id]),
+                                     args.verbose))
+
+        for phase, action in phases:
+            results.append(await measure(mock, cloner, phase, action, args.verbose))
+    finally:
+        await cloner.close()
+        await mock.stop()
+
+    for result in results:
+        result['scenario'] = name
+    return results
+
+
+def print_results(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]]) -> None:
+    print(f"{'scenario':<12}{'phase':<8}{'time (s)':>10}{'usable':>8}{'calls':>8}{'calls/s':>10}{'429s':>7}"
+          f"{'waited':>9}{'assets':>8}{'peak MB':>10}")
+
+    for result in results:
+        structure = result.get('structure')
+        usable = f"{structure:.2f}" if structure is not None else '-'
+        line = (f"{result['scenario']:<12}{result['phase']:<8}{result['seconds']:>10.2f}{usable:>8}{result['calls']:>8}"
+                f"{result['calls_per_second']:>10.1f}{result['rate_limited']:>7}{result['waited']:>9.2f}"
+                f"{result['downloads']:>8}{result['peak_mb']:>10.2f}")
+
+        previous = (baseline or {}).get(f"{result['scenario']}:{result['phase']}")
+        if previous and previous['seconds']:
+            change = (result['seconds'] - previous['seconds']) / previous['seconds'] * 100
+            line += f"  {change:+.0f}%"
+
+        if not result['ok']:
+            line += "  FAILED"
+        print(line)
+
+
+def parse_arguments(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Rex Server-Cloner benchmark against a local mock Discord API")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS) + ['all'],
+                        help="scenario to run, can be repeated (default: small)")
+    parser.add_argument('--latency', type=float, default=0.01, help="mock API latency per request in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="random extra latency per request in seconds")
+    parser.add_argument('--time-scale', type=float, default=0.02,
+                        help="multiplier for the mock rate limit windows (1 = Discord-like limits)")
+    parser.add_argument('--json', metavar='PATH', help="write the results to a JSON file")
+    parser.add_argument('--compare', metavar='PATH', help="compare the times with an earlier --json result")
+    parser.add_argument('--gateway', action='store_true', help="connect to the mock gateway like use_gateway does")
+    parser.add_argument('--verbose', action='store_true', help="show the cloner output")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> bool:
+    args = parse_arguments(argv)
+    scenarios = args.scenario or ['small']
+    if 'all' in scenarios:
+        scenarios = sorted(SCENARIOS)
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = {f"{entry['scenario']}:{entry['phase']}": entry for entry in json.load(f)}
+        except (OSError, json.JSONDecodeError, KeyError) as e:
+            print_error(f"Could not read {args.compare}: {str(e)}")
+            return False
+
+    results = []
+    for name in scenarios:
+        print_info(f"Running scenario {name}: {SCENARIOS[name]}")
+        results += await run_scenario(name, args)
+
+    print()
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print_success(f"Results written to {args.json}")
+
+    if not all(result['ok'] for result in results):
+        print_warning("Some phases did not complete")
+        return False
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,93 @@
+from typing import Optional, Tuple
+
+import discord
+
+from spec import OverwriteSpec, RoleSpec, CategorySpec, ChannelSpec, EmojiSpec, SettingsSpec, GuildSpec
+
+
+def serialize_overwrites(channel: discord.abc.GuildChannel) -> Tuple[OverwriteSpec, ...]:
+    serialized = [
+        OverwriteSpec(overwrite.id, 'role' if overwrite.is_role() else 'member', overwrite.allow, overwrite.deny)
+        for overwrite in channel._overwrites
+    ]
+
+    serialized.sort(key=lambda o: (o.type, o.id))
+    return tuple(serialized)
+
+
+def serialize_role(role: discord.Role) -> RoleSpec:
+    return RoleSpec(
+        id=role.id,
+        name=role.name,
+        permissions=role.permissions.value,
+        color=role.color.value,
+        hoist=role.hoist,
+        mentionable=role.mentionable,
+        position=role.position,
+        managed=role.managed,
+    )
+
+
+def serialize_category(category: discord.CategoryChannel) -> CategorySpec:
+    return CategorySpec(
+        id=category.id,
+        name=category.name,
+        position=category.position,
+        overwrites=serialize_overwrites(category),
+    )
+
+
+def serialize_channel(channel: discord.abc.GuildChannel) -> Optional[ChannelSpec]:
+    common = dict(
+        id=channel.id,
+        name=channel.name,
+        position=channel.position,
+        category_id=channel.category_id,
+        overwrites=serialize_overwrites(channel),
+    )
+
+    if isinstance(channel, discord.TextChannel):
+        return ChannelSpec(type='text', topic=channel.topic, slowmode_delay=channel.slowmode_delay, nsfw=channel.nsfw,
+                           **common)
+    elif isinstance(channel, discord.StageChannel):
+        return ChannelSpec(type='stage', topic=getattr(channel, 'topic', None), **common)
+    elif isinstance(channel, discord.VoiceChannel):
+        return ChannelSpec(type='voice', bitrate=channel.bitrate, user_limit=channel.user_limit, **common)
+
+    return None
+
+
+def capture_guild(guild: discord.Guild) -> GuildSpec:
+    roles = [serialize_role(role) for role in guild.roles if role != guild.default_role]
+    categories = [serialize_category(category) for category in guild.categories]
+    channels = []
+
+    for channel in guild.channels:
+        if isinstance(channel, discord.CategoryChannel):
+            continue
+        data = serialize_channel(channel)
+        if data:
+            channels.append(data)
+
+    emojis = [
+        EmojiSpec(id=emoji.id, name=emoji.name, animated=emoji.animated, managed=emoji.managed, url=str(emoji.url))
+        for emoji in guild.emojis
+    ]
+
+    settings = SettingsSpec(
+        name=guild.name,
+        icon_key=guild.icon.key if guild.icon else None,
+        banner_key=guild.banner.key if guild.banner else None,
+        icon_url=str(guild.icon.url) if guild.icon else None,
+        banner_url=str(guild.banner.url) if guild.banner else None,
+    )
+
+    return GuildSpec(
+        id=guild.id,
+        name=guild.name,
+        roles=sorted(roles, key=lambda r: r.position),
+        categories=sorted(categories, key=lambda c: c.position),
+        channels=sorted(channels, key=lambda c: c.position),
+        emojis=emojis,
+        settings=settings,
+    )
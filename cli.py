@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+from typing import Optional, List, Any, Tuple, Union
+
+from config import CONFIG_ENV, config_path, load_config, validate_discord_id
+from console import print_error, print_success, print_warning, print_info, print_plan, print_diffs, print_savings
+
+Location = Union[int, str]
+
+
+def parse_location(value: str) -> Location:
+    if validate_discord_id(value):
+        return int(value)
+    if os.path.isfile(value):
+        return value
+    raise argparse.ArgumentTypeError(f"{value} is neither a server ID nor an existing snapshot file")
+
+
+def parse_guild_id(value: str) -> int:
+    if not validate_discord_id(value):
+        raise argparse.ArgumentTypeError(f"invalid server ID {value} (must be 17-19 digits)")
+    return int(value)
+
+
+def split_locations(locations: List[Location]) -> Tuple[List[int], List[str]]:
+    return [item for item in locations if isinstance(item, int)], [item for item in locations if isinstance(item, str)]
+
+
+def parse_selection(args: argparse.Namespace) -> Optional[Any]:
+    from selection import Selection, SelectionError
+
+    try:
+        return Selection(getattr(args, 'include', ()), getattr(args, 'exclude', ()))
+    except SelectionError as e:
+        print_error(str(e))
+        return None
+
+
+def run_async(coroutine) -> bool:
+    import asyncio
+
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    return asyncio.run(coroutine)
+
+
+def load_snapshots(paths: List[str]) -> Optional[List[Any]]:
+    from snapshot import load_snapshot, SnapshotError
+
+    snapshots = []
+    for path in paths:
+        try:
+            snapshots.append(load_snapshot(path))
+        except SnapshotError as e:
+            print_error(str(e))
+            return None
+    return snapshots
+
+
+def run_online(args: argparse.Namespace, mode: str, source: Optional[Location], target_ids: List[int],
+               clone_icon: bool = True, dry_run: bool = False, snapshot_path: Optional[str] = None,
+               journal: Any = None) -> bool:
+    from main import check_token, run_mode
+
+    selection = parse_selection(args)
+    if selection is None or not check_token():
+        return False
+
+    snapshot = None
+    if journal is not None:
+        snapshot_file = journal.snapshot_path
+    else:
+        snapshot_file = source if isinstance(source, str) else None
+
+    if snapshot_file:
+        loaded = load_snapshots([snapshot_file])
+        if loaded is None:
+            return False
+        snapshot = loaded[0]
+        print_success(f"Snapshot loaded: {snapshot.name}")
+
+    source_id = source if isinstance(source, int) else None
+    return run_async(run_mode(mode, source_id, target_ids, snapshot, snapshot_path, clone_icon, dry_run, journal,
+                              args.profile, args.trace, selection))
+
+
+def plan_offline(source_path: str, target_paths: List[str], clone_icon: bool, sync: bool, selection: Any) -> bool:
+    from fingerprint import fingerprint_guild, unchanged_ids
+    from optimize import PlanOptimizer
+    from plan import build_clean_plan, build_clone_plan
+    from ratelimit import RateLimitScheduler
+    from selection import build_partial_plan
+    from sync import build_sync_plan
+
+    snapshots = load_snapshots([source_path] + target_paths)
+    if snapshots is None:
+        return False
+    source, targets = snapshots[0], snapshots[1:]
+
+    settings = load_config(config_path(), required=False).get('settings', {})
+    scheduler = RateLimitScheduler()
+    scheduler.set_min_interval('POST', '/guilds/{guild_id}/roles', settings.get('role_create_delay'))
+    scheduler.set_min_interval('POST', '/guilds/{guild_id}/channels', settings.get('channel_create_delay'))
+    scheduler.set_min_interval('POST', '/guilds/{guild_id}/emojis', settings.get('emoji_create_delay'))
+    scheduler.set_min_interval('PATCH', '/guilds/{guild_id}/roles', settings.get('permission_update_delay'))
+
+    for target in targets:
+        print_info(f"Planning {source.name} -> {target.name} ({target.id}) from snapshots, nothing is written")
+        spec = source
+        known = {}
+        if selection:
+            subset = selection.subset(source)
+            plan, match = build_partial_plan(subset, target, not sync)
+            spec = subset.spec
+            known = {kind: match.id_mapping(kind) for kind in ('role', 'category', 'channel')}
+        elif sync:
+            unchanged = unchanged_ids(fingerprint_guild(source), fingerprint_guild(target, include_managed=False))
+            plan = build_sync_plan(source, target, clone_icon, unchanged=unchanged)
+        else:
+            plan = build_clean_plan(target) + build_clone_plan(source, target, clone_icon)
+
+        if settings.get('optimize_plans', True):
+            optimizer = PlanOptimizer(spec, target, known)
+            plan = optimizer.optimize(plan)
+            print_savings(optimizer.saved)
+        print_plan([('Sync' if sync else 'Cloning', plan)], target.id, settings.get('bucket_concurrency', 4),
+                   scheduler.min_intervals)
+
+    return True
+
+
+def verify_offline(source_path: str, target_paths: List[str], selection: Any) -> bool:
+    from fingerprint import fingerprint_guild, diff_fingerprints
+
+    snapshots = load_snapshots([source_path] + target_paths)
+    if snapshots is None:
+        return False
+    source, targets = snapshots[0], snapshots[1:]
+
+    limit = load_config(config_path(), required=False).get('settings', {}).get('verify_report_limit', 25)
+    source_fingerprint = fingerprint_guild(source)
+    success = True
+
+    if selection:
+        subset = selection.subset(source)
+        source_fingerprint = fingerprint_guild(subset.spec)
+
+    for target in targets:
+        if selection:
+            target = subset.target_view(target)
+        diffs = diff_fingerprints(source_fingerprint, fingerprint_guild(target, include_managed=False))
+        if not diffs:
+            print_success(f"Verified: {target.name} matches {source.name}")
+            continue
+
+        print_warning(f"{target.name} differs from {source.name} in {len(diffs)} places:")
+        print_diffs(diffs, limit)
+        success = False
+
+    return success
+
+
+def command_snapshot(args: argparse.Namespace) -> bool:
+    return run_online(args, 'snapshot', args.source, [], snapshot_path=args.output)
+
+
+def command_plan(args: argparse.Namespace) -> bool:
+    target_ids, target_paths = split_locations(args.targets)
+    clone_icon = not args.no_icon
+
+    if target_paths:
+        if target_ids or not isinstance(args.source, str):
+            print_error("Planning against target snapshots needs a source snapshot and only snapshot targets")
+            return False
+        selection = parse_selection(args)
+        return selection is not None and plan_offline(args.source, target_paths, clone_icon, args.sync, selection)
+
+    mode = 'sync' if args.sync else ('clone' if isinstance(args.source, int) else 'apply')
+    return run_online(args, mode, args.source, target_ids, clone_icon, dry_run=True)
+
+
+def command_apply(args: argparse.Namespace) -> bool:
+    if args.resume is not None:
+        from main import load_resume_journal
+
+        journal = load_resume_journal(args.resume)
+        if not journal:
+            return False
+        return run_online(args, 'apply', None, [journal.target_id], journal.header['clone_icon'], journal=journal)
+
+    if args.source is None or not args.targets:
+        print_error("apply needs a source and at least one target server ID (or --resume)")
+        return False
+
+    target_ids, target_paths = split_locations(args.targets)
+    if target_paths:
+        print_error(f"Targets must be server IDs: {', '.join(target_paths)}")
+        return False
+    if args.source in target_ids:
+        print_error("The source and target servers cannot be the same.")
+        return False
+
+    mode = 'sync' if args.sync else ('clone' if isinstance(args.source, int) else 'apply')
+    return run_online(args, mode, args.source, list(dict.fromkeys(target_ids)), not args.no_icon)
+
+
+def command_verify(args: argparse.Namespace) -> bool:
+    target_ids, target_paths = split_locations(args.targets)
+
+    if target_paths:
+        if target_ids or not isinstance(args.source, str):
+            print_error("Verifying target snapshots needs a source snapshot and only snapshot targets")
+            return False
+        selection = parse_selection(args)
+        return selection is not None and verify_offline(args.source, target_paths, selection)
+
+    return run_online(args, 'verify', args.source, target_ids)
+
+
+def command_mirror(args: argparse.Namespace) -> bool:
+    if args.source == args.target:
+        print_error("The source and target servers cannot be the same.")
+        return False
+    return run_online(args, 'mirror', args.source, [args.target], not args.no_icon)
+
+
+def command_bench(args: argparse.Namespace) -> bool:
+    import bench
+
+    return run_async(bench.main(args.options))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='cli.py', description="Rex Server-Cloner")
+    parser.add_argument('--config', metavar='PATH',
+                        help=f"configuration file (default: ${CONFIG_ENV} or config.json)")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+
+    profiling = argparse.ArgumentParser(add_help=False)
+    profiling.add_argument('--profile', action='store_true',
+                           help="measure event loop lag and CPU versus await time per phase")
+    profiling.add_argument('--trace', action='store_true',
+                           help="like --profile, and also write a cProfile trace of the run next to the report")
+
+    selecting = argparse.ArgumentParser(add_help=False)
+    selecting.add_argument('--include', action='append', default=[], metavar='SELECTOR',
+                           help="only clone matching parts, e.g. category:Staff, type:voice, name:ticket-*, id:123, "
+                                "role:Mod, emoji:pepe* (repeatable)")
+    selecting.add_argument('--exclude', action='append', default=[], metavar='SELECTOR',
+                           help="leave matching parts out (repeatable)")
+
+    snapshot = commands.add_parser('snapshot', parents=[profiling], help="write a server to a snapshot file")
+    snapshot.add_argument('source', type=parse_guild_id, metavar='SOURCE_ID')
+    snapshot.add_argument('output', metavar='FILE')
+    snapshot.set_defaults(handler=command_snapshot)
+
+    plan = commands.add_parser('plan', parents=[selecting, profiling],
+                               help="show what apply would do without changing anything",
+                               description="Targets given as snapshot files are planned offline without a token.")
+    plan.add_argument('source', type=parse_location, metavar='SOURCE', help="server ID or snapshot file")
+    plan.add_argument('targets', type=parse_location, nargs='+', metavar='TARGET',
+                      help="server ID or snapshot file of the target")
+    plan.add_argument('--sync', action='store_true', help="plan a sync instead of a full rebuild")
+    plan.add_argument('--no-icon', action='store_true', help="do not clone the server icon")
+    plan.set_defaults(handler=command_plan)
+
+    apply = commands.add_parser('apply', parents=[selecting, profiling],
+                                help="clone a server or a snapshot into one or more servers")
+    apply.add_argument('source', type=parse_location, nargs='?', metavar='SOURCE', help="server ID or snapshot file")
+    apply.add_argument('targets', type=parse_location, nargs='*', metavar='TARGET_ID')
+    apply.add_argument('--sync', action='store_true', help="only apply the differences")
+    apply.add_argument('--no-icon', action='store_true', help="do not clone the server icon")
+    apply.add_argument('--resume', nargs='?', const='', metavar='JOURNAL',
+                       help="resume an interrupted clone (latest unfinished journal if no path is given)")
+    apply.set_defaults(handler=command_apply)
+
+    verify = commands.add_parser('verify', parents=[selecting, profiling], help="check that servers match a source",
+                                 description="Targets given as snapshot files are verified offline without a token.")
+    verify.add_argument('source', type=parse_location, metavar='SOURCE', help="server ID or snapshot file")
+    verify.add_argument('targets', type=parse_location, nargs='+', metavar='TARGET',
+                        help="server ID or snapshot file of the target")
+    verify.set_defaults(handler=command_verify)
+
+    mirror = commands.add_parser('mirror', parents=[profiling],
+                                 help="keep a server in line with a source, applying every change as it happens")
+    mirror.add_argument('source', type=parse_guild_id, metavar='SOURCE_ID')
+    mirror.add_argument('target', type=parse_guild_id, metavar='TARGET_ID')
+    mirror.add_argument('--no-icon', action='store_true', help="do not clone the server icon")
+    mirror.set_defaults(handler=command_mirror)
+
+    bench = commands.add_parser('bench', help="benchmark against a local mock of the Discord API (bench.py options)",
+                                add_help=False)
+    bench.set_defaults(handler=command_bench)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == 'bench':
+        args.options = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    if args.config:
+        os.environ[CONFIG_ENV] = args.config
+
+    try:
+        return 0 if args.handler(args) else 1
+    except KeyboardInterrupt:
+        print_warning("Interrupted.")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
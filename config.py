@@ -0,0 +1,44 @@
+import json
+import os
+import sys
+from typing import Optional, Dict, Any
+
+from console import print_error, print_info
+
+CONFIG_ENV = 'REX_CONFIG'
+DEFAULT_CONFIG = 'config.json'
+
+
+def config_path() -> str:
+    return os.environ.get(CONFIG_ENV) or DEFAULT_CONFIG
+
+
+def load_config(path: Optional[str] = None, required: bool = True) -> Dict[str, Any]:
+    path = path or config_path()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        if not required:
+            return {}
+        print_error(f"{path} file not found!")
+        print_info(f"Create a {path} file with your Discord token.")
+        sys.exit(1)
+    except json.JSONDecodeError:
+        print_error(f"Error in the format of the {path} file!")
+        sys.exit(1)
+
+
+def validate_discord_id(discord_id: str) -> bool:
+    try:
+        int(discord_id)
+        return 17 <= len(discord_id) <= 19
+    except ValueError:
+        return False
+
+
+def validate_token(token: str) -> bool:
+    if not token or len(token) < 50:
+        return False
+    parts = token.split('.')
+    return len(parts) >= 2
@@ -0,0 +1,121 @@
+import os
+from typing import List, Dict, Any, Tuple
+
+from costmodel import estimate_plan
+from metrics import EventStream
+from plan import Operation, summarize_plan
+
+try:
+    import colorama
+    colorama.init(autoreset=True)
+    COLORAMA_AVAILABLE = True
+except ImportError:
+    COLORAMA_AVAILABLE = False
+
+COLORS = {
+    'red': '\033[91m',
+    'green': '\033[92m',
+    'yellow': '\033[93m',
+    'blue': '\033[94m',
+    'purple': '\033[95m',
+    'cyan': '\033[96m',
+    'white': '\033[97m',
+    'reset': '\033[0m'
+}
+
+EVENTS = EventStream()
+
+
+def console_sink(event: Dict[str, Any]) -> None:
+    if event['type'] != 'message':
+        return
+
+    message = event['text']
+    color = event['color']
+    if color is None or (os.name == 'nt' and not COLORAMA_AVAILABLE):
+        print(message)
+    else:
+        color_code = COLORS.get(color, COLORS['white'])
+        print(f"{color_code}{message}{COLORS['reset']}")
+
+
+EVENTS.subscribe(console_sink)
+
+
+def print_colored(message: str, color: str = 'white', level: str = 'info') -> None:
+    EVENTS.emit({'type': 'message', 'level': level, 'color': color, 'text': message})
+
+
+def print_plain(message: str = '') -> None:
+    EVENTS.emit({'type': 'message', 'level': 'info', 'color': None, 'text': message})
+
+
+def print_error(message: str) -> None:
+    print_colored(f"[X] {message}", 'red', 'error')
+
+
+def print_success(message: str) -> None:
+    print_colored(f"[+] {message}", 'green', 'success')
+
+
+def print_warning(message: str) -> None:
+    print_colored(f"[!] {message}", 'yellow', 'warning')
+
+
+def print_info(message: str) -> None:
+    print_colored(f"[i] {message}", 'blue')
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    if minutes >= 60:
+        return f"{minutes // 60}h{minutes % 60:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+def print_plan(phases: List[Tuple[str, List[Operation]]], guild_id: int, concurrency: int,
+               min_intervals: Dict[str, float]) -> None:
+    calls = 0
+    seconds = 0.0
+    structure = 0.0
+
+    for name, plan in phases:
+        counts = summarize_plan(plan)
+        estimate = estimate_plan(plan, guild_id, concurrency, min_intervals)
+        calls += estimate['calls']
+        structure = seconds + estimate['structure_seconds']
+        seconds += estimate['seconds']
+
+        print_info(f"{name}: {counts['create']} creates, {counts['edit']} edits, {counts['move']} moves, "
+                   f"{counts['delete']} deletes, ~{format_duration(estimate['seconds'])}")
+        for route, stats in sorted(estimate['routes'].items(), key=lambda item: -item[1]['seconds']):
+            print_plain(f"    {route}: {stats['calls']} calls, done after ~{format_duration(stats['seconds'])}")
+
+    summary = f"Estimated {calls} API calls, ~{format_duration(seconds)} in total"
+    if 0 < structure < seconds:
+        summary += f", structurally complete after ~{format_duration(structure)}"
+    print_success(summary)
+
+
+def print_savings(saved: Dict[str, int]) -> None:
+    total = sum(saved.values())
+    if not total:
+        return
+    parts = [
+        (saved.get('reused', 0), "by reusing matching target objects"),
+        (saved.get('folded', 0), "by folding edits into creates"),
+        (saved.get('merged', 0), "by merging duplicate operations"),
+        (saved.get('unchanged', 0), "by dropping edits that change nothing"),
+        (saved.get('moves', 0), "by skipping position updates that are already in place"),
+    ]
+    print_info(f"Plan optimized: {total} fewer API calls "
+               f"({', '.join(f'{count} {reason}' for count, reason in parts if count)})")
+
+
+def print_diffs(diffs: List[Tuple[str, str]], limit: int) -> None:
+    for status, path in diffs[:limit]:
+        print_plain(f"    {status}: {path}")
+    if len(diffs) > limit:
+        print_plain(f"    ... and {len(diffs) - limit} more")
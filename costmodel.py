@@ -0,0 +1,98 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, deque
+from typing import Optional, List, Dict, Any, Tuple
+
+from plan import Operation, operation_route, operation_dependencies, is_background
+from ratelimit import split_route
+
+REQUEST_LATENCY = 0.35
+GLOBAL_LIMIT = (50, 1.0)
+DEFAULT_BUCKET = (5, 5.0)
+
+BUCKET_MODELS: Dict[str, Tuple[int, float]] = {
+    'POST /guilds/{major}/roles': (10, 10.0),
+    'PATCH /guilds/{major}/roles': (5, 5.0),
+    'PATCH /guilds/{major}/roles/{id}': (5, 5.0),
+    'DELETE /guilds/{major}/roles/{id}': (5, 5.0),
+    'POST /guilds/{major}/channels': (5, 5.0),
+    'PATCH /guilds/{major}/channels': (5, 5.0),
+    'PATCH /channels/{major}': (2, 600.0),
+    'DELETE /channels/{major}': (5, 5.0),
+    'POST /guilds/{major}/emojis': (5, 60.0),
+    'DELETE /guilds/{major}/emojis/{id}': (5, 5.0),
+    'PATCH /guilds/{major}': (5, 5.0),
+}
+
+
+def _topological_order(plan: List[Operation], dependencies: Dict[str, List[str]]) -> List[Operation]:
+    by_id = {op.op_id: op for op in plan}
+    waiting = {op.op_id: sum(dep in by_id for dep in dependencies[op.op_id]) for op in plan}
+    dependents = defaultdict(list)
+    for op in plan:
+        for dep in dependencies[op.op_id]:
+            if dep in by_id:
+                dependents[dep].append(op.op_id)
+
+    queue = deque(op.op_id for op in plan if waiting[op.op_id] == 0)
+    order = []
+
+    while queue:
+        op_id = queue.popleft()
+        order.append(by_id[op_id])
+        for dependent in dependents[op_id]:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                queue.append(dependent)
+
+    return order
+
+
+def estimate_plan(plan: List[Operation], guild_id: int, concurrency: int = 4,
+                  min_intervals: Optional[Dict[str, float]] = None,
+                  latency: float = REQUEST_LATENCY) -> Dict[str, Any]:
+    min_intervals = min_intervals or {}
+    dependencies = operation_dependencies(plan)
+
+    starts: Dict[str, List[float]] = defaultdict(list)
+    in_flight: Dict[str, List[float]] = defaultdict(list)
+    global_starts: List[float] = []
+    finished: Dict[str, float] = {}
+    routes: Dict[str, Dict[str, Any]] = {}
+    concurrency = max(1, concurrency)
+
+    for op in sorted(_topological_order(plan, dependencies), key=is_background):
+        method, path = operation_route(op, guild_id)
+        route, major = split_route(method, path)
+        limit, window = BUCKET_MODELS.get(route, DEFAULT_BUCKET)
+        history = starts[f"{route}:{major}"]
+        running = in_flight[route]
+
+        start = max([finished[dep] for dep in dependencies[op.op_id] if dep in finished], default=0.0)
+        if history:
+            start = max(start, history[-1], history[-1] + min_intervals.get(route, 0.0))
+        if len(history) >= limit:
+            start = max(start, history[-limit] + window)
+        if len(running) >= concurrency:
+            start = max(start, running[-concurrency] + latency)
+        while True:
+            first = bisect_left(global_starts, start - GLOBAL_LIMIT[1])
+            last = bisect_right(global_starts, start)
+            if last - first < GLOBAL_LIMIT[0]:
+                break
+            start = global_starts[last - GLOBAL_LIMIT[0]] + GLOBAL_LIMIT[1]
+
+        insort(running, start)
+        history.append(start)
+        insort(global_starts, start)
+        finished[op.op_id] = start + latency
+
+        stats = routes.setdefault(route, {'calls': 0, 'seconds': 0.0})
+        stats['calls'] += 1
+        stats['seconds'] = max(stats['seconds'], start + latency)
+
+    return {
+        'calls': len(finished),
+        'seconds': max(finished.values(), default=0.0),
+        'structure_seconds': max((finished[op.op_id] for op in plan if not is_background(op)), default=0.0),
+        'routes': routes,
+    }
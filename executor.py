@@ -0,0 +1,94 @@
+import asyncio
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Iterable
+
+
+class DependencyCycleError(Exception):
+    pass
+
+
+class GraphNode:
+    __slots__ = ('key', 'action', 'bucket', 'deps', 'background')
+
+    def __init__(self, key: str, action: Callable[[], Awaitable[Any]], bucket: str, deps: List[str],
+                 background: bool = False):
+        self.key = key
+        self.action = action
+        self.bucket = bucket
+        self.deps = deps
+        self.background = background
+
+
+class OperationGraph:
+    def __init__(self, default_limit: int = 4, bucket_limits: Optional[Dict[str, int]] = None,
+                 background_limit: int = 1):
+        self.default_limit = max(1, default_limit)
+        self.bucket_limits = bucket_limits or {}
+        self.background_limit = max(1, background_limit)
+        self._nodes: Dict[str, GraphNode] = {}
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def add(self, key: str, action: Callable[[], Awaitable[Any]], bucket: str, deps: Iterable[str] = (),
+            background: bool = False) -> None:
+        if key in self._nodes:
+            raise ValueError(f"Duplicate operation: {key}")
+        self._nodes[key] = GraphNode(key, action, bucket, list(deps), background)
+
+    async def _run_node(self, node: GraphNode, semaphore: asyncio.Semaphore) -> Any:
+        async with semaphore:
+            return await node.action()
+
+    async def run(self, on_foreground_done: Optional[Callable[[int], Any]] = None) -> Dict[str, Any]:
+        dependents = defaultdict(list)
+        waiting = {}
+
+        for node in self._nodes.values():
+            deps = [dep for dep in node.deps if dep in self._nodes]
+            waiting[node.key] = len(deps)
+            for dep in deps:
+                dependents[dep].append(node.key)
+
+        semaphores: Dict[str, asyncio.Semaphore] = {}
+        ready = [key for key, count in waiting.items() if count == 0]
+        running: Dict[asyncio.Task, str] = {}
+        results: Dict[str, Any] = {}
+        foreground = sum(1 for node in self._nodes.values() if not node.background)
+        background = 0
+
+        while ready or running:
+            held = []
+            for key in sorted(ready, key=lambda k: self._nodes[k].background):
+                node = self._nodes[key]
+                if node.background:
+                    if foreground and background >= self.background_limit:
+                        held.append(key)
+                        continue
+                    background += 1
+                if node.bucket not in semaphores:
+                    semaphores[node.bucket] = asyncio.Semaphore(self.bucket_limits.get(node.bucket, self.default_limit))
+                running[asyncio.ensure_future(self._run_node(node, semaphores[node.bucket]))] = key
+            ready = held
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                key = running.pop(task)
+                results[key] = task.exception() if task.exception() else task.result()
+                if self._nodes[key].background:
+                    background -= 1
+                else:
+                    foreground -= 1
+                    if not foreground and on_foreground_done is not None:
+                        on_foreground_done(len(self._nodes) - len(results))
+                for dependent in dependents[key]:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0:
+                        ready.append(dependent)
+
+        if len(results) != len(self._nodes):
+            stuck = sorted(key for key in self._nodes if key not in results)
+            raise DependencyCycleError(f"Operations could not be scheduled: {', '.join(stuck[:5])}")
+
+        return results
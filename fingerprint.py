@@ -0,0 +1,133 @@
+import hashlib
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Tuple, Set, Iterator
+
+from spec import GuildSpec, ChannelSpec, OverwriteSpec
+from sync import ROLE_FIELDS, CHANNEL_FIELDS
+
+NO_CATEGORY = '(no category)'
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.blake2b('\x1f'.join(map(str, parts)).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class FingerprintNode:
+    __slots__ = ('kind', 'name', 'object_id', 'own', 'digest', 'children')
+
+    def __init__(self, kind: str, name: str, own: str, children: Optional[List['FingerprintNode']] = None,
+                 object_id: Optional[int] = None):
+        self.kind = kind
+        self.name = name
+        self.object_id = object_id
+        self.own = own
+        self.children = children or []
+        self.digest = _digest(own, *(child.digest for child in self.children)) if self.children else own
+
+    def walk(self) -> Iterator['FingerprintNode']:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def __repr__(self) -> str:
+        return f"<FingerprintNode {self.kind} {self.name!r} {self.digest[:8]}>"
+
+
+def _overwrites_digest(overwrites: Tuple[OverwriteSpec, ...], role_names: Dict[int, str]) -> str:
+    entries = []
+    for entry in overwrites:
+        target = role_names.get(entry.id, f"unknown:{entry.id}") if entry.type == 'role' else entry.id
+        entries.append((entry.type, str(target), entry.allow, entry.deny))
+    return _digest(*sorted(entries))
+
+
+def _channel_order(channel: ChannelSpec) -> Tuple[bool, int]:
+    return channel.type != 'text', channel.position
+
+
+def fingerprint_guild(guild: GuildSpec, include_managed: bool = True) -> FingerprintNode:
+    roles = [role for role in guild.roles if include_managed or not role.managed]
+    role_names = {role.id: role.name for role in roles}
+    role_names[guild.id] = '@everyone'
+
+    role_nodes = [
+        FingerprintNode('role', role.name, _digest(role.name, *(getattr(role, field) for field in ROLE_FIELDS)),
+                        object_id=role.id)
+        for role in sorted(roles, key=lambda r: r.position)
+    ]
+
+    children = defaultdict(list)
+    for channel in sorted(guild.channels, key=_channel_order):
+        fields = CHANNEL_FIELDS.get(channel.type, ())
+        own = _digest(channel.name, channel.type, *(getattr(channel, field) for field in fields),
+                      _overwrites_digest(channel.overwrites, role_names))
+        children[channel.category_id].append(FingerprintNode('channel', channel.name, own,
+                                                                object_id=channel.id))
+
+    category_nodes = []
+    if children.get(None):
+        category_nodes.append(FingerprintNode('category', NO_CATEGORY, _digest(NO_CATEGORY), children[None]))
+    for category in sorted(guild.categories, key=lambda c: c.position):
+        own = _digest(category.name, _overwrites_digest(category.overwrites, role_names))
+        category_nodes.append(FingerprintNode('category', category.name, own, children.get(category.id),
+                                              object_id=category.id))
+
+    emoji_nodes = [
+        FingerprintNode('emoji', emoji.name, _digest(emoji.name), object_id=emoji.id)
+        for emoji in sorted(guild.emojis, key=lambda e: e.name)
+        if include_managed or not emoji.managed
+    ]
+
+    return FingerprintNode('guild', '', _digest('guild'), [
+        FingerprintNode('roles', 'roles', _digest('roles'), role_nodes),
+        FingerprintNode('channels', 'channels', _digest('channels'), category_nodes),
+        FingerprintNode('emojis', 'emojis', _digest('emojis'), emoji_nodes),
+    ])
+
+
+def _keyed(nodes: List[FingerprintNode]) -> Dict[Tuple[str, str, int], FingerprintNode]:
+    seen = defaultdict(int)
+    keyed = {}
+    for node in nodes:
+        keyed[(node.kind, node.name, seen[(node.kind, node.name)])] = node
+        seen[(node.kind, node.name)] += 1
+    return keyed
+
+
+def diff_fingerprints(source: FingerprintNode, target: FingerprintNode, path: str = '') -> List[Tuple[str, str]]:
+    if source.digest == target.digest:
+        return []
+
+    here = f"{path}/{source.name}" if path else source.name
+    diffs = []
+    if source.own != target.own:
+        diffs.append(('changed', here))
+
+    targets = _keyed(target.children)
+    for key, child in _keyed(source.children).items():
+        match = targets.pop(key, None)
+        if match is None:
+            diffs.append(('missing', f"{here}/{child.name}" if here else child.name))
+        else:
+            diffs += diff_fingerprints(child, match, here)
+    for child in targets.values():
+        diffs.append(('extra', f"{here}/{child.name}" if here else child.name))
+
+    if not diffs:
+        diffs.append(('reordered', here))
+    return diffs
+
+
+def unchanged_ids(source: FingerprintNode, target: FingerprintNode) -> Set[int]:
+    if source.digest == target.digest:
+        return {node.object_id for node in source.walk() if node.object_id is not None}
+
+    unchanged = set()
+    if source.object_id is not None and source.own == target.own:
+        unchanged.add(source.object_id)
+
+    targets = _keyed(target.children)
+    for key, child in _keyed(source.children).items():
+        if key in targets:
+            unchanged |= unchanged_ids(child, targets[key])
+    return unchanged
@@ -0,0 +1,120 @@
+import asyncio
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Tuple
+
+try:
+    from PIL import Image, ImageSequence
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+IMAGE_LIMITS: Dict[str, Tuple[int, int]] = {
+    'emoji': (256 * 1024, 128),
+    'icon': (10 * 1024 * 1024, 1024),
+    'banner': (10 * 1024 * 1024, 1920),
+}
+MIN_DIMENSION = 16
+
+
+def image_format(data: bytes) -> Optional[str]:
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if data.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if data.startswith(b'RIFF') and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def fits(data: bytes, kind: str) -> bool:
+    max_bytes, dimension = IMAGE_LIMITS[kind]
+    if image_format(data) is None or len(data) > max_bytes:
+        return False
+    if not PIL_AVAILABLE:
+        return True
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return max(image.size) <= dimension
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return True
+
+
+def _encode(image: 'Image.Image', dimension: int) -> bytes:
+    output = io.BytesIO()
+    frames = getattr(image, 'n_frames', 1)
+
+    if frames > 1:
+        resized = []
+        durations = []
+        for frame in ImageSequence.Iterator(image):
+            frame = frame.convert('RGBA')
+            frame.thumbnail((dimension, dimension))
+            resized.append(frame)
+            durations.append(frame.info.get('duration', image.info.get('duration', 100)))
+        resized[0].save(output, format='GIF', save_all=True, append_images=resized[1:], duration=durations,
+                        loop=image.info.get('loop', 0), disposal=2, optimize=True)
+    else:
+        frame = image.convert('RGBA')
+        frame.thumbnail((dimension, dimension))
+        frame.save(output, format='PNG', optimize=True)
+
+    return output.getvalue()
+
+
+def prepare_image(data: bytes, kind: str) -> Optional[bytes]:
+    if fits(data, kind):
+        return data
+    if not PIL_AVAILABLE:
+        return None
+
+    max_bytes, dimension = IMAGE_LIMITS[kind]
+    try:
+        image = Image.open(io.BytesIO(data))
+        dimension = min(dimension, max(image.size))
+
+        while dimension >= MIN_DIMENSION:
+            encoded = _encode(image, dimension)
+            if len(encoded) <= max_bytes:
+                return encoded
+            dimension = dimension * 3 // 4
+    except (OSError, ValueError, Image.DecompressionBombError):
+        pass
+
+    return None
+
+
+class ImageProcessor:
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.converted = 0
+        self.rejected = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def prepare(self, data: bytes, kind: str) -> Optional[bytes]:
+        loop = asyncio.get_running_loop()
+        if PIL_AVAILABLE:
+            if await loop.run_in_executor(None, fits, data, kind):
+                return data
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers)
+            prepared = await loop.run_in_executor(self._pool, prepare_image, data, kind)
+        elif fits(data, kind):
+            return data
+        else:
+            prepared = None
+
+        if prepared is None:
+            self.rejected += 1
+        else:
+            self.converted += 1
+        return prepared
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
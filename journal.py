@@ -0,0 +1,150 @@
+import datetime
+import glob
+import json
+import os
+from typing import Optional, List, Dict, Any
+
+JOURNAL_VERSION = 1
+
+
+class JournalError(Exception):
+    pass
+
+
+class CloneJournal:
+    def __init__(self, path: str, header: Dict[str, Any]):
+        self.path = path
+        self.header = header
+        self.completed: Dict[str, Dict[str, Any]] = {}
+        self.events: List[str] = []
+        self._file = None
+
+    @property
+    def snapshot_path(self) -> str:
+        return f"{os.path.splitext(self.path)[0]}.rex.gz"
+
+    @property
+    def target_id(self) -> int:
+        return self.header['target_id']
+
+    @property
+    def finished(self) -> bool:
+        return 'finished' in self.events
+
+    @classmethod
+    def create(cls, directory: str, source_id: int, target_id: int, clone_icon: bool,
+               selection: Optional[Dict[str, List[str]]] = None) -> 'CloneJournal':
+        os.makedirs(directory, exist_ok=True)
+        header = {
+            'type': 'start',
+            'version': JOURNAL_VERSION,
+            'source_id': source_id,
+            'target_id': target_id,
+            'clone_icon': clone_icon,
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        if selection:
+            header['selection'] = selection
+
+        journal = cls(os.path.join(directory, f"{target_id}.jsonl"), header)
+        with open(journal.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        return journal
+
+    @classmethod
+    def load(cls, path: str) -> 'CloneJournal':
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError as e:
+            raise JournalError(f"Could not read journal {path}: {str(e)}")
+
+        entries = []
+        for index, line in enumerate(lines):
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(''.join(valid + '\n' for valid in lines[:index]))
+                break
+
+        if not entries or entries[0].get('type') != 'start':
+            raise JournalError(f"{path} is not a clone journal")
+
+        if entries[0].get('version') != JOURNAL_VERSION:
+            raise JournalError(f"Unsupported journal version {entries[0].get('version')} (expected {JOURNAL_VERSION})")
+
+        journal = cls(path, entries[0])
+        for entry in entries[1:]:
+            if entry.get('type') == 'op':
+                journal.completed[entry['op']] = entry
+            elif entry.get('type') == 'undo':
+                journal.completed.pop(entry['op'], None)
+            elif entry.get('type') == 'event':
+                journal.events.append(entry['name'])
+
+        return journal
+
+    @staticmethod
+    def find_unfinished(directory: str) -> List[str]:
+        unfinished = []
+
+        for path in sorted(glob.glob(os.path.join(directory, '*.jsonl')), key=os.path.getmtime, reverse=True):
+            try:
+                if not CloneJournal.load(path).finished:
+                    unfinished.append(path)
+            except JournalError:
+                continue
+
+        return unfinished
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record(self, op_id: str, kind: str, source_id: Optional[int], target_id: Optional[int]) -> None:
+        entry = {'type': 'op', 'op': op_id, 'kind': kind, 'source_id': source_id, 'target_id': target_id}
+        self.completed[op_id] = entry
+        self._append(entry)
+
+    def invalidate(self, op_id: str) -> None:
+        if self.completed.pop(op_id, None) is not None:
+            self._append({'type': 'undo', 'op': op_id})
+
+    def mark(self, name: str) -> None:
+        self.events.append(name)
+        self._append({'type': 'event', 'name': name})
+
+    def is_done(self, op_id: str) -> bool:
+        return op_id in self.completed
+
+    def mapping(self, kind: str) -> Dict[int, int]:
+        return {
+            entry['source_id']: entry['target_id']
+            for entry in self.completed.values()
+            if entry['kind'] == kind and entry['source_id'] is not None and entry['target_id'] is not None
+        }
+
+    def created_ids(self) -> List[int]:
+        return [
+            entry['target_id']
+            for entry in self.completed.values()
+            if entry['source_id'] is not None and entry['target_id'] is not None
+        ]
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        self.close()
+        for path in (self.path, self.snapshot_path):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,47 @@
+import asyncio
+from typing import List
+
+import discord
+
+
+async def load_guild(client: discord.Client, guild_id: int) -> discord.Guild:
+    http = client.http
+    data, channels = await asyncio.gather(
+        http.get_guild(guild_id, with_counts=False),
+        http.get_all_guild_channels(guild_id),
+    )
+    data['channels'] = channels
+    guild = discord.Guild(data=data, state=client._connection)
+
+    try:
+        member = await http.get_member(guild_id, client.user.id)
+        guild._add_member(discord.Member(data=member, guild=guild, state=client._connection))
+    except discord.HTTPException:
+        pass
+
+    return guild
+
+
+async def wait_for_guilds(client: discord.Client, guild_ids: List[int], timeout: float) -> List[int]:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    try:
+        await asyncio.wait_for(client.wait_until_ready(), timeout)
+    except asyncio.TimeoutError:
+        return list(guild_ids)
+
+    missing = [guild_id for guild_id in guild_ids if client.get_guild(guild_id) is None]
+    pending = {guild_id for guild_id in guild_ids if guild_id not in missing and client.get_guild(guild_id).unavailable}
+
+    while pending:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            guild = await client.wait_for('guild_available', check=lambda g: g.id in pending, timeout=remaining)
+        except asyncio.TimeoutError:
+            break
+        pending.discard(guild.id)
+
+    return missing + sorted(pending)
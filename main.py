@@ -1,93 +1,75 @@
 #!/usr/bin/env python3
 
 import discord
+import argparse
 import asyncio
 import aiohttp
-import json
+import copy
+import functools
+from collections import Counter
 import sys
 import os
-from typing import Optional, List, Dict, Any
-
-try:
-    import colorama
-    colorama.init(autoreset=True)
-    COLORAMA_AVAILABLE = True
-except ImportError:
-    COLORAMA_AVAILABLE = False
-
-COLORS = {
-    'red': '\033[91m',
-    'green': '\033[92m',
-    'yellow': '\033[93m',
-    'blue': '\033[94m',
-    'purple': '\033[95m',
-    'cyan': '\033[96m',
-    'white': '\033[97m',
-    'reset': '\033[0m'
-}
-
-def print_colored(message: str, color: str = 'white') -> None:
-    if os.name == 'nt' and not COLORAMA_AVAILABLE:
-        print(message)
-    elif os.name == 'nt' and COLORAMA_AVAILABLE:
-        color_code = COLORS.get(color, COLORS['white'])
-        print(f"{color_code}{message}{COLORS['reset']}")
-    else:
-        color_code = COLORS.get(color, COLORS['white'])
-        print(f"{color_code}{message}{COLORS['reset']}")
-
-def print_error(message: str) -> None:
-    print_colored(f"[X] {message}", 'red')
-
-def print_success(message: str) -> None:
-    print_colored(f"[+] {message}", 'green')
-
-def print_warning(message: str) -> None:
-    print_colored(f"[!] {message}", 'yellow')
-
-def print_info(message: str) -> None:
-    print_colored(f"[i] {message}", 'blue')
-
-def load_config():
-    try:
-        with open('config.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print_error("config.json file not found!")
-        print_info("Create a config.json file with your Discord token.")
-        sys.exit(1)
-    except json.JSONDecodeError:
-        print_error("Error in the format of the config.json file!")
-        sys.exit(1)
-
-CONFIG = load_config()
+import time
+from typing import Optional, List, Dict, Any, Tuple, Set, Union, Callable, Awaitable
+
+from ratelimit import RateLimitScheduler, split_route
+from executor import OperationGraph
+from capture import capture_guild
+from snapshot import save_snapshot, load_snapshot, SnapshotError
+from assets import AssetPipeline, create_session, fill_snapshot_assets
+from assetcache import AssetCache
+from plan import (Operation, summarize_plan, build_clean_plan, build_clone_plan, operation_route,
+                  operation_dependencies, operation_assets, is_background)
+from sync import CHANNEL_FIELDS, GuildMatch, build_sync_plan
+from optimize import PlanOptimizer, REUSE_KINDS
+from fingerprint import fingerprint_guild, diff_fingerprints, unchanged_ids
+from journal import CloneJournal, JournalError
+from loader import load_guild, wait_for_guilds
+from mirror import MirrorMap, MirrorError, ChangeBuffer, SourceWatcher, MAP_KINDS
+from metrics import RunMetrics
+from profiling import RunProfiler
+from overwrites import OverwriteModel, OverwriteTranslator, overwrite_payload
+from imaging import ImageProcessor, PIL_AVAILABLE
+from retry import RetryPolicy
+from selection import Selection, SelectionError, build_partial_plan
+from spec import RoleSpec, CategorySpec, ChannelSpec, EmojiSpec, GuildSpec
+from console import (COLORS, COLORAMA_AVAILABLE, EVENTS, print_colored, print_plain, print_error, print_success,
+                     print_warning, print_info, format_duration, print_plan, print_diffs, print_savings)
+from config import config_path, load_config, validate_discord_id, validate_token
+
+CONFIG = load_config(config_path())
 TOKEN = CONFIG.get('discord_token', '')
 SETTINGS = CONFIG.get('settings', {})
 
-ROLE_CREATE_DELAY = SETTINGS.get('role_create_delay', 1.0)
-CHANNEL_CREATE_DELAY = SETTINGS.get('channel_create_delay', 0.5)
-EMOJI_CREATE_DELAY = SETTINGS.get('emoji_create_delay', 1.0)
-PERMISSION_UPDATE_DELAY = SETTINGS.get('permission_update_delay', 0.3)
-
-def validate_discord_id(discord_id: str) -> bool:
-    try:
-        id_int = int(discord_id)
-        return 17 <= len(discord_id) <= 19
-    except ValueError:
-        return False
-
-def validate_token(token: str) -> bool:
-    if not token or len(token) < 50:
-        return False
-    parts = token.split('.')
-    return len(parts) >= 2
-
-async def safe_sleep(duration: float) -> None:
-    try:
-        await asyncio.sleep(duration)
-    except KeyboardInterrupt:
-        print_warning("Interruption detected...")
-        sys.exit(0)
+ROLE_CREATE_DELAY = SETTINGS.get('role_create_delay')
+CHANNEL_CREATE_DELAY = SETTINGS.get('channel_create_delay')
+EMOJI_CREATE_DELAY = SETTINGS.get('emoji_create_delay')
+PERMISSION_UPDATE_DELAY = SETTINGS.get('permission_update_delay')
+BUCKET_CONCURRENCY = SETTINGS.get('bucket_concurrency', 4)
+JOURNAL_DIR = SETTINGS.get('journal_dir', 'journals')
+ASSET_PREFETCH = SETTINGS.get('asset_prefetch', 8)
+ASSET_CACHE_DIR = SETTINGS.get('asset_cache_dir', 'asset_cache')
+ASSET_CACHE_SIZE_MB = SETTINGS.get('asset_cache_size_mb', 256)
+USE_GATEWAY = SETTINGS.get('use_gateway', False)
+MEMBER_GATEWAY = SETTINGS.get('member_gateway', True)
+GATEWAY_TIMEOUT = SETTINGS.get('gateway_timeout', 30)
+METRICS_DIR = SETTINGS.get('metrics_dir', 'reports')
+VERIFY_REPORT_LIMIT = SETTINGS.get('verify_report_limit', 25)
+IMAGE_WORKERS = SETTINGS.get('image_workers')
+RETRY_ATTEMPTS = SETTINGS.get('retry_attempts', 3)
+MEMBER_QUERY_SIZE = 100
+MIRROR_DIR = SETTINGS.get('mirror_dir', 'mirrors')
+MIRROR_DEBOUNCE = SETTINGS.get('mirror_debounce', 1.0)
+MIRROR_MAX_DELAY = SETTINGS.get('mirror_max_delay', 5.0)
+OPTIMIZE_PLANS = SETTINGS.get('optimize_plans', True)
+BACKGROUND_CONCURRENCY = SETTINGS.get('background_concurrency', 1)
+
+CHANNEL_TYPES = {
+    'text': discord.ChannelType.text,
+    'voice': discord.ChannelType.voice,
+    'stage': discord.ChannelType.stage_voice,
+    'category': discord.ChannelType.category,
+}
 
 def get_user_input(prompt: str, validator=None) -> str:
     while True:
@@ -138,27 +120,138 @@ class DiscordServerCloner:
     def __init__(self, token: str):
         self.token = token
         self.client = None
+        self.connection: Optional[asyncio.Task] = None
+        self.use_gateway = USE_GATEWAY
         self.source_guild = None
         self.target_guild = None
+        self.source: Optional[GuildSpec] = None
+        self.overwrite_model: Optional[OverwriteModel] = None
+        self.overwrites: Optional[OverwriteTranslator] = None
+        self.emoji_limit_reached = False
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.assets: Optional[AssetPipeline] = None
+        self.cache = AssetCache(ASSET_CACHE_DIR, ASSET_CACHE_SIZE_MB * 1024 * 1024) if ASSET_CACHE_SIZE_MB else None
+        self.images = ImageProcessor(IMAGE_WORKERS)
+        self.retry = RetryPolicy(RETRY_ATTEMPTS)
+        self.known_ids: Set[int] = set()
+        self.creating: Counter = Counter()
+        self.reconciling = asyncio.Condition()
+        self.members: Dict[int, Dict[int, Optional[discord.Member]]] = {}
+        self.selection = Selection()
+        self.scheduler = RateLimitScheduler()
+        self.metrics = RunMetrics(EVENTS)
+        self.profiler: Optional[RunProfiler] = None
+        self.tag: Optional[str] = None
+        self.scheduler.listeners.append(self.metrics)
+
+        self.scheduler.set_min_interval('POST', '/guilds/{guild_id}/roles', ROLE_CREATE_DELAY)
+        self.scheduler.set_min_interval('POST', '/guilds/{guild_id}/channels', CHANNEL_CREATE_DELAY)
+        self.scheduler.set_min_interval('POST', '/guilds/{guild_id}/emojis', EMOJI_CREATE_DELAY)
+        self.scheduler.set_min_interval('PATCH', '/guilds/{guild_id}/roles', PERMISSION_UPDATE_DELAY)
+
+    def http_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = create_session(ASSET_PREFETCH * 2)
+        return self.session
+
+    def for_target(self, target_guild_id: int) -> 'DiscordServerCloner':
+        child = copy.copy(self)
+        child.target_guild = None
+        child.assets = None
+        child.overwrites = None
+        child.emoji_limit_reached = False
+        child.known_ids = set()
+        child.creating = Counter()
+        child.reconciling = asyncio.Condition()
+        child.tag = str(target_guild_id)
+        return child
+
+    def _phase(self, name: str):
+        return self.metrics.phase(f"{name}:{self.tag}" if self.tag else name)
+
+    def print_run_stats(self) -> None:
+        if self.tag:
+            return
+        print_info(f"API calls: {self.scheduler.requests}, rate limited: {self.scheduler.rate_limited} times, "
+                   f"waited {self.scheduler.waited:.1f}s for rate limits")
+        if self.cache and self.cache.hits + self.cache.misses:
+            print_info(f"Asset cache: {self.cache.hits} hits, {self.cache.misses} misses")
+        if self.retry.retried:
+            print_info(f"Retried {self.retry.retried} requests after transient errors, "
+                       f"adopted {self.retry.adopted} objects created by a failed request")
+        if self.images.converted or self.images.rejected:
+            print_info(f"Images resized or converted: {self.images.converted}, unusable: {self.images.rejected}")
+
+    def start_profiling(self, trace: bool = False) -> None:
+        self.profiler = RunProfiler(self.metrics, trace)
+        self.profiler.start()
+
+    async def stop_profiling(self) -> None:
+        if self.profiler is None:
+            return
+        await self.profiler.stop()
+        print_info("Profile (CPU is process time spent while the phase ran, awaiting is the rest):")
+        for line in self.profiler.summary():
+            print_plain(f"    {line}")
+
+    def write_report(self, name: str) -> None:
+        if not METRICS_DIR:
+            return
+        try:
+            paths = self.metrics.write(METRICS_DIR, name)
+            if self.profiler is not None:
+                paths += self.profiler.write(METRICS_DIR, name)
+            print_info(f"Run report written to {', '.join(paths)}")
+        except OSError as e:
+            print_warning(f"Could not write the run report: {str(e)}")
 
     def is_connected(self) -> bool:
         return self.client and self.client.user is not None
 
+    async def connect(self, guild_ids: List[int]) -> bool:
+        self.client = discord.Client(chunk_guilds_at_startup=False)
+        await self.client.login(self.token)
+        print_success(f"Logged in as {self.client.user}")
+
+        if not self.scheduler.install(self.client.http):
+            print_warning("Could not read rate limit headers, relying on the library's own limits")
+
+        if not self.use_gateway:
+            if MEMBER_GATEWAY:
+                self._open_gateway()
+            return True
+
+        print_info("Connecting to the gateway...")
+        self._open_gateway()
+
+        missing = await wait_for_guilds(self.client, guild_ids, GATEWAY_TIMEOUT)
+        if missing:
+            print_error(f"Servers not available on the gateway: {', '.join(map(str, missing))}")
+            return False
+
+        print_success(f"Gateway ready for {len(guild_ids)} servers")
+        return True
+
+    def _open_gateway(self) -> None:
+        self.connection = asyncio.create_task(self.client.connect())
+        self.connection.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def _gateway_guild(self) -> Optional[discord.Guild]:
+        if self.connection is None or self.connection.done():
+            return None
+        if await wait_for_guilds(self.client, [self.target_guild.id], GATEWAY_TIMEOUT):
+            print_warning("The target server is not available on the gateway, asking the API for each member")
+            return None
+        return self.client.get_guild(self.target_guild.id)
+
     async def get_guild(self, guild_id: int) -> Optional[discord.Guild]:
         try:
-            guild = self.client.get_guild(guild_id)
-            if guild:
-                return guild
+            if self.use_gateway and self.connection is not None:
+                guild = self.client.get_guild(guild_id)
+                if guild:
+                    return guild
 
-            try:
-                guild = await self.client.fetch_guild(guild_id)
-                return guild
-            except discord.Forbidden:
-                for g in self.client.guilds:
-                    if g.id == guild_id:
-                        return g
-                print_error(f"No access to server {guild_id} or server not found")
-                return None
+            return await load_guild(self.client, guild_id)
 
         except discord.NotFound:
             print_error(f"Server {guild_id} not found")
@@ -170,50 +263,91 @@ class DiscordServerCloner:
             print_error(f"Error while fetching the server: {str(e)}")
             return None
 
-    async def clone_roles(self) -> Dict[int, discord.Role]:
-        print_info("Cloning roles...")
-        role_mapping = {}
+    async def _send(self, method: str, route: str, call: Callable[[], Awaitable[Any]],
+                    reconcile: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        async def attempt() -> Any:
+            await self.scheduler.acquire(method, route)
+            return await call()
+
+        return await self.retry.run(attempt, reconcile)
+
+    @staticmethod
+    def _created_key(obj: Any) -> Tuple:
+        if isinstance(obj, discord.Role):
+            return ('role', obj.name, obj.permissions.value, obj.color.value, obj.hoist, obj.mentionable)
+        if isinstance(obj, discord.Emoji):
+            return ('emoji', obj.name)
+        return ('channel', obj.name, obj.type, getattr(obj, 'category_id', None))
+
+    def _find_created(self, key: Tuple, details: Tuple[Tuple[str, Any], ...]) -> Callable[[], Awaitable[Any]]:
+        async def find() -> Any:
+            async with self.reconciling:
+                self.creating[key] -= 1
+                try:
+                    await self.reconciling.wait_for(lambda: self.creating[key] == 0)
+                    if key[0] == 'role':
+                        candidates = await self.target_guild.fetch_roles()
+                    elif key[0] == 'emoji':
+                        candidates = await self.target_guild.fetch_emojis()
+                    else:
+                        candidates = await self.target_guild.fetch_channels()
+
+                    matches = [obj for obj in sorted(candidates, key=lambda c: c.id)
+                               if obj.id not in self.known_ids and self._created_key(obj) == key]
+                    if not matches:
+                        return None
+
+                    exact = [obj for obj in matches if all(getattr(obj, field, None) == value
+                                                           for field, value in details)]
+                    obj = (exact or matches)[0]
+                    self.known_ids.add(obj.id)
+                    print_info(f"{key[0].capitalize()} {obj.name} was created by a request that failed, reusing it")
+                    return obj
+                finally:
+                    self.creating[key] += 1
+
+        return find
+
+    async def _send_create(self, route: str, call: Callable[[], Awaitable[Any]], key: Tuple,
+                           details: Tuple[Tuple[str, Any], ...] = ()) -> Any:
+        self.creating[key] += 1
+        try:
+            created = await self._send('POST', route, call, self._find_created(key, details))
+            self.known_ids.add(created.id)
+            return created
+        finally:
+            self.creating[key] -= 1
+            async with self.reconciling:
+                self.reconciling.notify_all()
+
+    async def _create_role(self, role: RoleSpec) -> Optional[discord.Role]:
+        try:
+            new_role = await self._send_create(f"/guilds/{self.target_guild.id}/roles", lambda: self.target_guild.create_role(
+                name=role.name,
+                permissions=discord.Permissions(role.permissions),
+                color=discord.Colour(role.color),
+                hoist=role.hoist,
+                mentionable=role.mentionable,
+                reason="Server cloning"
+            ), ('role', role.name, role.permissions, role.color, role.hoist, role.mentionable))
 
-        roles_to_clone = sorted(
-            [role for role in self.source_guild.roles if role.name != "@everyone"],
-            key=lambda r: r.position
-        )
+            print_success(f"Role created: {role.name} (position: {role.position})")
+            return new_role
 
-        for role in roles_to_clone:
-            try:
-                new_role = await self.target_guild.create_role(
-                    name=role.name,
-                    permissions=role.permissions,
-                    color=role.color,
-                    hoist=role.hoist,
-                    mentionable=role.mentionable,
-                    reason="Server cloning"
-                )
-
-                role_mapping[role.id] = new_role
-                print_success(f"Role created: {role.name} (position: {role.position})")
-                await safe_sleep(ROLE_CREATE_DELAY)
-
-            except discord.Forbidden:
-                print_warning(f"No permission to create the role: {role.name}")
-            except discord.HTTPException as e:
-                print_error(f"Error while creating the role {role.name}: {str(e)}")
-            except Exception as e:
-                print_error(f"Unexpected error for role {role.name}: {str(e)}")
-
-        await self._reorder_roles(role_mapping)
-
-        return role_mapping
-
-    async def _reorder_roles(self, role_mapping: Dict[int, discord.Role]) -> None:
+        except discord.Forbidden:
+            print_warning(f"No permission to create the role: {role.name}")
+        except discord.HTTPException as e:
+            print_error(f"Error while creating the role {role.name}: {str(e)}")
+        except Exception as e:
+            print_error(f"Unexpected error for role {role.name}: {str(e)}")
+
+        return None
+
+    async def _reorder_roles(self, role_mapping: Dict[int, discord.Role]) -> bool:
         print_info("Reordering roles according to hierarchy...")
 
         try:
-            source_roles = sorted(
-                [role for role in self.source_guild.roles if role.name != "@everyone"],
-                key=lambda r: r.position,
-                reverse=True
-            )
+            source_roles = sorted(self.source.roles, key=lambda r: r.position, reverse=True)
 
             new_roles_ordered = []
             for source_role in source_roles:
@@ -221,12 +355,12 @@ class DiscordServerCloner:
                     new_roles_ordered.append(role_mapping[source_role.id])
 
             if new_roles_ordered:
-                await self.target_guild.edit_role_positions(
+                await self._send('PATCH', f"/guilds/{self.target_guild.id}/roles", lambda: self.target_guild.edit_role_positions(
                     positions={role: len(new_roles_ordered) - i for i, role in enumerate(new_roles_ordered)},
                     reason="Hierarchical reordering of roles"
-                )
+                ))
                 print_success("Role hierarchy restored!")
-                await safe_sleep(1.0)
+            return True
 
         except discord.Forbidden:
             print_warning("No permission to reorder roles")
@@ -235,287 +369,565 @@ class DiscordServerCloner:
         except Exception as e:
             print_warning(f"Unexpected error during reordering: {str(e)}")
 
-    async def _convert_overwrites(self, overwrites: Dict, role_mapping: Dict[int, discord.Role]) -> Dict:
-        new_overwrites = {}
+        return False
 
-        for target, overwrite in overwrites.items():
+    async def _fetch_members(self, member_ids: List[int]) -> List[discord.Member]:
+        async def fetch(member_id: int) -> Optional[discord.Member]:
             try:
-                if isinstance(target, discord.Role):
-                    if target.id in role_mapping:
-                        new_overwrites[role_mapping[target.id]] = overwrite
-                    elif target.name == "@everyone":
-                        new_overwrites[self.target_guild.default_role] = overwrite
+                return await self._send('GET', f"/guilds/{self.target_guild.id}/members/{member_id}",
+                                        lambda: self.target_guild.fetch_member(member_id))
+            except discord.HTTPException:
+                return None
 
-                elif isinstance(target, discord.Member):
-                    member = self.target_guild.get_member(target.id)
-                    if member:
-                        new_overwrites[member] = overwrite
+        return [member for member in await asyncio.gather(*(fetch(member_id) for member_id in member_ids)) if member]
 
-            except Exception:
-                pass
+    async def _query_members(self, member_ids: List[int]) -> List[discord.Member]:
+        guild = await self._gateway_guild()
+        if guild is None:
+            return await self._fetch_members(member_ids)
 
-        return new_overwrites
+        members = []
+        for start in range(0, len(member_ids), MEMBER_QUERY_SIZE):
+            chunk = member_ids[start:start + MEMBER_QUERY_SIZE]
+            try:
+                members += await guild.query_members(user_ids=chunk, limit=len(chunk), presences=False, cache=False)
+            except asyncio.TimeoutError:
+                print_warning("The gateway did not answer the member query, asking the API instead")
+                members += await self._fetch_members(chunk)
+        return members
+
+    async def _resolve_members(self, member_ids: List[int]) -> Dict[int, Optional[discord.Member]]:
+        members = self.members.setdefault(self.target_guild.id, {})
+        missing = []
+        for member_id in member_ids:
+            if member_id in members:
+                continue
+            member = self.target_guild.get_member(member_id)
+            if member is not None:
+                members[member_id] = member
+            else:
+                missing.append(member_id)
 
-    async def clean_target_server(self) -> bool:
-        print_info("Complete cleaning of the target server...")
+        if missing:
+            for member in await self._query_members(missing):
+                members[member.id] = member
 
-        try:
-            print_info("Deleting all channels...")
-            all_channels = list(self.target_guild.channels)
+        for member_id in missing:
+            members.setdefault(member_id, None)
+        if member_ids:
+            found = sum(1 for member_id in member_ids if members[member_id] is not None)
+            print_info(f"{found} of {len(member_ids)} members with permission overwrites are in the target server")
+        return members
 
-            regular_channels = [ch for ch in all_channels if not isinstance(ch, discord.CategoryChannel)]
-            categories = [ch for ch in all_channels if isinstance(ch, discord.CategoryChannel)]
+    def _compile_overwrites(self) -> OverwriteModel:
+        if self.overwrite_model is None or self.overwrite_model.source is not self.source:
+            self.overwrite_model = OverwriteModel(self.source)
+        return self.overwrite_model
 
-            for channel in regular_channels:
-                try:
-                    await channel.delete(reason="Cleaning before cloning")
-                    print_success(f"Channel deleted: {channel.name}")
-                    await safe_sleep(0.3)
-                except discord.Forbidden:
-                    print_warning(f"No permission to delete: {channel.name}")
-                except discord.HTTPException as e:
-                    print_warning(f"Error while deleting {channel.name}: {str(e)}")
-                except Exception as e:
-                    print_warning(f"Unexpected error for {channel.name}: {str(e)}")
-
-            print_info("Deleting categories...")
-            for category in categories:
-                try:
-                    await category.delete(reason="Cleaning before cloning")
-                    print_success(f"Category deleted: {category.name}")
-                    await safe_sleep(0.3)
-                except discord.Forbidden:
-                    print_warning(f"No permission to delete category: {category.name}")
-                except discord.HTTPException as e:
-                    print_warning(f"Error while deleting category {category.name}: {str(e)}")
-                except Exception as e:
-                    print_warning(f"Unexpected error for category {category.name}: {str(e)}")
-
-            print_info("Deleting roles...")
-            roles_to_delete = [role for role in self.target_guild.roles if role.name != "@everyone"]
-
-            roles_to_delete.sort(key=lambda r: r.position, reverse=True)
-
-            for role in roles_to_delete:
-                try:
-                    await role.delete(reason="Cleaning before cloning")
-                    print_success(f"Role deleted: {role.name}")
-                    await safe_sleep(0.3)
-                except discord.Forbidden:
-                    print_warning(f"No permission to delete role: {role.name}")
-                except discord.HTTPException as e:
-                    print_warning(f"Error while deleting role {role.name}: {str(e)}")
-                except Exception as e:
-                    print_warning(f"Unexpected error for role {role.name}: {str(e)}")
-
-            print_info("Deleting emojis...")
-            emojis_to_delete = list(self.target_guild.emojis)
-            for emoji in emojis_to_delete:
-                try:
-                    await emoji.delete(reason="Cleaning before cloning")
-                    print_success(f"Emoji deleted: {emoji.name}")
-                    await safe_sleep(0.2)
-                except discord.Forbidden:
-                    print_warning(f"No permission to delete emoji: {emoji.name}")
-                except discord.HTTPException as e:
-                    print_warning(f"Error while deleting emoji {emoji.name}: {str(e)}")
-                except Exception as e:
-                    print_warning(f"Unexpected error for emoji {emoji.name}: {str(e)}")
-
-            print_success("Server cleaning finished!")
-            return True
+    def _convert_overwrites(self, item: Union[CategorySpec, ChannelSpec], role_mapping: Dict[int, discord.Role]) -> Dict:
+        return self.overwrites.translate(self.overwrite_model.set_for(item), role_mapping)
 
+    def _object_route(self, kind: str, object_id: int) -> str:
+        if kind in ('channel', 'category'):
+            return f"/channels/{object_id}"
+        return f"/guilds/{self.target_guild.id}/{kind}s/{object_id}"
+
+    async def _delete_object(self, kind: str, obj: Any) -> bool:
+        try:
+            await self._send('DELETE', self._object_route(kind, obj.id), lambda: obj.delete(reason="Cleaning before cloning"))
+            print_success(f"{kind.capitalize()} deleted: {obj.name}")
+            return True
+        except discord.NotFound:
+            print_info(f"{kind.capitalize()} already deleted: {obj.name}")
+            return True
+        except discord.Forbidden:
+            print_warning(f"No permission to delete {kind}: {obj.name}")
+        except discord.HTTPException as e:
+            print_warning(f"Error while deleting {kind} {obj.name}: {str(e)}")
         except Exception as e:
-            print_error(f"Error during cleaning: {str(e)}")
-            return False
+            print_warning(f"Unexpected error for {kind} {obj.name}: {str(e)}")
+        return False
 
-    async def clone_categories_and_channels(self, role_mapping: Dict[int, discord.Role]) -> None:
-        print_info("Cloning categories and channels...")
-        category_mapping = {}
+    def _top_role_position(self) -> Optional[int]:
+        me = self.target_guild.me
+        if me is None or self.target_guild.owner_id == me.id:
+            return None
+        return me.top_role.position
 
-        categories = [cat for cat in self.source_guild.categories]
-        categories.sort(key=lambda c: c.position)
+    async def _create_category(self, category: CategorySpec,
+                               role_mapping: Dict[int, discord.Role]) -> Optional[discord.CategoryChannel]:
+        try:
+            overwrites = self._convert_overwrites(category, role_mapping)
 
-        for category in categories:
-            try:
-                overwrites = await self._convert_overwrites(category.overwrites, role_mapping)
+            new_category = await self._send_create(f"/guilds/{self.target_guild.id}/channels",
+                                                   lambda: self.target_guild.create_category(
+                                                       name=category.name,
+                                                       overwrites=overwrites,
+                                                       reason="Server cloning"
+                                                   ),
+                                                   ('channel', category.name, CHANNEL_TYPES['category'], None))
+
+            print_success(f"Category created: {category.name}")
+            return new_category
+
+        except Exception as e:
+            print_error(f"Error while creating category {category.name}: {str(e)}")
+            return None
+
+    async def _create_channel(self, channel: ChannelSpec, category_mapping: Dict[int, discord.CategoryChannel],
+                              role_mapping: Dict[int, discord.Role]) -> Optional[discord.abc.GuildChannel]:
+        try:
+            category = category_mapping.get(channel.category_id) if channel.category_id else None
+            if category is not None and channel.id in self.overwrite_model.synced:
+                overwrites = {}
+            else:
+                overwrites = self._convert_overwrites(channel, role_mapping)
+
+            if channel.type == 'text':
+                create = self._create_text_channel
+            elif channel.type == 'voice':
+                create = self._create_voice_channel
+            elif channel.type == 'stage':
+                create = self._create_stage_channel
+            else:
+                return None
 
-                new_category = await self.target_guild.create_category(
-                    name=category.name,
-                    overwrites=overwrites,
-                    reason="Server cloning"
-                )
+            new_channel = await self._send_create(f"/guilds/{self.target_guild.id}/channels",
+                                                  lambda: create(channel, category, overwrites),
+                                                  ('channel', channel.name, CHANNEL_TYPES[channel.type],
+                                                   category.id if category else None),
+                                                  tuple((field, getattr(channel, field))
+                                                        for field in CHANNEL_FIELDS.get(channel.type, ())))
+            print_success(f"{channel.type.capitalize()} channel created: {channel.name}")
+            return new_channel
 
-                category_mapping[category.id] = new_category
-                print_success(f"Category created: {category.name}")
-                await safe_sleep(CHANNEL_CREATE_DELAY)
+        except Exception as e:
+            print_error(f"Error while creating channel {channel.name}: {str(e)}")
 
-            except Exception as e:
-                print_error(f"Error while creating category {category.name}: {str(e)}")
+        return None
 
-        await self._clone_channels(category_mapping, role_mapping)
+    async def _create_text_channel(self, channel: ChannelSpec,
+                                 category: Optional[discord.CategoryChannel],
+                                 overwrites: Dict) -> Optional[discord.TextChannel]:
+        return await self.target_guild.create_text_channel(
+            name=channel.name,
+            topic=channel.topic,
+            slowmode_delay=channel.slowmode_delay,
+            nsfw=channel.nsfw,
+            category=category,
+            overwrites=overwrites,
+            reason="Server cloning"
+        )
 
-    async def _clone_channels(self, category_mapping: Dict[int, discord.CategoryChannel],
-                            role_mapping: Dict[int, discord.Role]) -> None:
-        channels = [ch for ch in self.source_guild.channels if not isinstance(ch, discord.CategoryChannel)]
-        channels.sort(key=lambda c: c.position)
+    async def _create_voice_channel(self, channel: ChannelSpec,
+                                  category: Optional[discord.CategoryChannel],
+                                  overwrites: Dict) -> Optional[discord.VoiceChannel]:
+        return await self.target_guild.create_voice_channel(
+            name=channel.name,
+            bitrate=channel.bitrate,
+            user_limit=channel.user_limit,
+            category=category,
+            overwrites=overwrites,
+            reason="Server cloning"
+        )
 
-        for channel in channels:
-            try:
-                overwrites = await self._convert_overwrites(channel.overwrites, role_mapping)
-                category = category_mapping.get(channel.category_id) if channel.category else None
+    async def _create_stage_channel(self, channel: ChannelSpec,
+                                  category: Optional[discord.CategoryChannel],
+                                  overwrites: Dict) -> Optional[discord.StageChannel]:
+        return await self.target_guild.create_stage_channel(
+            name=channel.name,
+            topic=channel.topic,
+            category=category,
+            overwrites=overwrites,
+            reason="Server cloning"
+        )
 
-                if isinstance(channel, discord.TextChannel):
-                    await self._create_text_channel(channel, category, overwrites)
-                elif isinstance(channel, discord.VoiceChannel):
-                    await self._create_voice_channel(channel, category, overwrites)
-                elif isinstance(channel, discord.StageChannel):
-                    await self._create_stage_channel(channel, category, overwrites)
 
-                await safe_sleep(CHANNEL_CREATE_DELAY)
 
-            except Exception as e:
-                print_error(f"Error while creating channel {channel.name}: {str(e)}")
+    async def _reorder_channels(self, category_mapping: Dict[int, discord.CategoryChannel],
+                                channel_mapping: Dict[int, discord.abc.GuildChannel]) -> bool:
+        print_info("Reordering categories and channels...")
 
-    async def _create_text_channel(self, channel: discord.TextChannel,
-                                 category: Optional[discord.CategoryChannel],
-                                 overwrites: Dict) -> None:
         try:
-            new_channel = await self.target_guild.create_text_channel(
-                name=channel.name,
-                topic=channel.topic,
-                slowmode_delay=channel.slowmode_delay,
-                nsfw=channel.nsfw,
-                category=category,
-                overwrites=overwrites,
-                reason="Server cloning"
-            )
-            print_success(f"Text channel created: {channel.name}")
+            positions = []
+
+            for category in self.source.categories:
+                if category.id in category_mapping:
+                    positions.append({'id': category_mapping[category.id].id, 'position': category.position})
+
+            for channel in self.source.channels:
+                if channel.id in channel_mapping:
+                    parent = category_mapping.get(channel.category_id) if channel.category_id else None
+                    positions.append({
+                        'id': channel_mapping[channel.id].id,
+                        'position': channel.position,
+                        'parent_id': parent.id if parent else None,
+                    })
+
+            if positions:
+                await self._send('PATCH', f"/guilds/{self.target_guild.id}/channels", lambda: self.client.http.bulk_channel_update(
+                    self.target_guild.id, positions, reason="Channel layout sync"
+                ))
+                print_success("Channel layout restored!")
+            return True
 
+        except discord.Forbidden:
+            print_warning("No permission to reorder channels")
+        except discord.HTTPException as e:
+            print_warning(f"Error while reordering channels: {str(e)}")
         except Exception as e:
-            print_error(f"Error while creating text channel {channel.name}: {str(e)}")
+            print_warning(f"Unexpected error during channel reordering: {str(e)}")
 
-    async def _create_voice_channel(self, channel: discord.VoiceChannel,
-                                  category: Optional[discord.CategoryChannel],
-                                  overwrites: Dict) -> None:
-        try:
-            new_channel = await self.target_guild.create_voice_channel(
-                name=channel.name,
-                bitrate=channel.bitrate,
-                user_limit=channel.user_limit,
-                category=category,
-                overwrites=overwrites,
-                reason="Server cloning"
-            )
-            print_success(f"Voice channel created: {channel.name}")
+        return False
 
-        except Exception as e:
-            print_error(f"Error while creating voice channel {channel.name}: {str(e)}")
+    async def _edit_object(self, op: Operation, role_mapping: Dict[int, discord.Role]) -> bool:
+        changes = dict(op.changes)
 
-    async def _create_stage_channel(self, channel: discord.StageChannel,
-                                  category: Optional[discord.CategoryChannel],
-                                  overwrites: Dict) -> None:
         try:
-            new_channel = await self.target_guild.create_stage_channel(
-                name=channel.name,
-                topic=getattr(channel, 'topic', None),
-                category=category,
-                overwrites=overwrites,
-                reason="Server cloning"
-            )
-            print_success(f"Stage channel created: {channel.name}")
+            if op.kind == 'role':
+                obj = self.target_guild.get_role(op.target_id)
+                if 'permissions' in changes:
+                    changes['permissions'] = discord.Permissions(changes['permissions'])
+                if 'color' in changes:
+                    changes['color'] = discord.Colour(changes['color'])
+                route = self._object_route('role', op.target_id)
+            elif op.kind == 'emoji':
+                obj = discord.utils.get(self.target_guild.emojis, id=op.target_id)
+                route = self._object_route('emoji', op.target_id)
+            elif op.kind == 'settings':
+                obj = self.target_guild
+                route = f"/guilds/{self.target_guild.id}"
+                for field in ('icon', 'banner'):
+                    if field in changes and changes[field] is None:
+                        changes[field] = await self.assets.get(field) if self.assets else None
+                        if changes[field] is None:
+                            print_warning(f"Could not download the server {field}")
+                            del changes[field]
+                            continue
+                    if field in changes:
+                        changes[field] = await self.images.prepare(changes[field], field)
+                        if changes[field] is None:
+                            print_warning(f"The server {field} is too large or not a supported image")
+                            del changes[field]
+                if not changes:
+                    return False
+            else:
+                obj = self.target_guild.get_channel(op.target_id)
+                if 'overwrites' in changes:
+                    changes['permission_overwrites'] = overwrite_payload(self.overwrites.translate(
+                        self.overwrite_model.intern(changes.pop('overwrites')), role_mapping))
+                if 'slowmode_delay' in changes:
+                    changes['rate_limit_per_user'] = changes.pop('slowmode_delay')
+                route = self._object_route(op.kind, op.target_id)
+
+            if obj is None:
+                print_warning(f"{op.kind.capitalize()} no longer exists in the target: {op.name}")
+                return False
 
+            if op.kind in ('category', 'channel'):
+                edit = functools.partial(self.client.http.edit_channel, op.target_id, reason="Server sync", **changes)
+            else:
+                edit = functools.partial(obj.edit, reason="Server sync", **changes)
+            await self._send('PATCH', route, edit)
+            print_success(f"{op.kind.capitalize()} updated: {op.name} ({', '.join(op.changes)})")
+            return True
+
+        except discord.Forbidden:
+            print_warning(f"No permission to edit {op.kind}: {op.name}")
+        except discord.HTTPException as e:
+            print_error(f"Error while editing {op.kind} {op.name}: {str(e)}")
         except Exception as e:
-            print_error(f"Error while creating stage channel {channel.name}: {str(e)}")
+            print_error(f"Unexpected error for {op.kind} {op.name}: {str(e)}")
 
+        return False
 
+    async def _run_operation(self, op: Operation, role_mapping: Dict[int, discord.Role],
+                             category_mapping: Dict[int, discord.CategoryChannel],
+                             channel_mapping: Dict[int, discord.abc.GuildChannel]) -> Optional[int]:
+        if op.action == 'delete':
+            if op.kind == 'role':
+                obj = self.target_guild.get_role(op.target_id)
+            elif op.kind == 'emoji':
+                obj = discord.utils.get(self.target_guild.emojis, id=op.target_id)
+            else:
+                obj = self.target_guild.get_channel(op.target_id)
+            if obj and await self._delete_object(op.kind, obj):
+                return op.target_id
+
+        elif op.action == 'create' and op.kind == 'role':
+            new_role = await self._create_role(op.source)
+            if new_role:
+                role_mapping[op.source.id] = new_role
+                return new_role.id
+
+        elif op.action == 'create' and op.kind == 'category':
+            new_category = await self._create_category(op.source, role_mapping)
+            if new_category:
+                category_mapping[op.source.id] = new_category
+                return new_category.id
+
+        elif op.action == 'create' and op.kind == 'channel':
+            new_channel = await self._create_channel(op.source, category_mapping, role_mapping)
+            if new_channel:
+                channel_mapping[op.source.id] = new_channel
+                return new_channel.id
+
+        elif op.action == 'create' and op.kind == 'emoji':
+            if not self.emoji_limit_reached:
+                new_emoji = await self._create_emoji(op.source)
+                if new_emoji:
+                    return new_emoji.id
+
+        elif op.action == 'edit':
+            if await self._edit_object(op, role_mapping):
+                return op.target_id
+
+        elif op.action == 'move' and op.kind == 'role':
+            if await self._reorder_roles(role_mapping):
+                return self.target_guild.id
+
+        elif op.action == 'move' and op.kind == 'channel':
+            if await self._reorder_channels(category_mapping, channel_mapping):
+                return self.target_guild.id
+
+        return None
+
+    async def _run_journaled(self, op: Operation, journal: Optional[Union[CloneJournal, MirrorMap]],
+                             *mappings: Dict[int, Any]) -> Optional[int]:
+        method, path = operation_route(op, self.target_guild.id)
+        route, _ = split_route(method, path)
+
+        with self.metrics.operation(op.op_id, op.kind, op.action, route) as record:
+            target_id = await self._run_operation(op, *mappings)
+            record.outcome = 'ok' if target_id is not None else 'failed'
+
+        if target_id is not None and op.action == 'create':
+            self.known_ids.add(target_id)
+        if target_id is not None and journal is not None:
+            journal.record(op.op_id, op.kind, getattr(op.source, 'id', None), target_id)
+        return target_id
+
+    def _optimize_plan(self, plan: List[Operation], *mappings: Dict[int, Any]) -> List[Operation]:
+        known = {kind: {source_id: obj.id for source_id, obj in mapping.items()}
+                 for kind, mapping in zip(REUSE_KINDS, mappings)}
+        optimizer = PlanOptimizer(self.source, capture_guild(self.target_guild), known)
+        plan = optimizer.optimize(plan)
+
+        reused = self._resolve_mappings(*(optimizer.reused[kind] for kind in REUSE_KINDS))
+        for mapping, objects in zip(mappings, reused):
+            mapping.update(objects)
+        self.metrics.on_saved(optimizer.calls_saved)
+        print_savings(optimizer.saved)
+        return plan
+
+    def _structure_complete(self, remaining: int) -> None:
+        seconds = self.metrics.milestone('structure')
+        if remaining:
+            elapsed = format_duration(seconds) if seconds >= 60 else f"{seconds:.1f}s"
+            print_success(f"Structurally complete after {elapsed}: roles, categories, channels and "
+                          f"permissions are in place in {self.target_guild.name}, {remaining} emoji and server "
+                          f"settings operations continue in the background")
+
+    async def execute_plan(self, plan: List[Operation], role_mapping: Dict[int, discord.Role],
+                           category_mapping: Dict[int, discord.CategoryChannel],
+                           channel_mapping: Dict[int, discord.abc.GuildChannel],
+                           journal: Optional[Union[CloneJournal, MirrorMap]] = None) -> int:
+        self.emoji_limit_reached = False
+        self.known_ids = {obj.id for obj in (*self.target_guild.roles, *self.target_guild.channels,
+                                             *self.target_guild.emojis)}
+        model = self._compile_overwrites()
+        members = await self._resolve_members(model.member_ids())
+        self.overwrites = OverwriteTranslator(model, self.target_guild.default_role, members.get)
+        if OPTIMIZE_PLANS and self.source is not None:
+            plan = self._optimize_plan(plan, role_mapping, category_mapping, channel_mapping)
+        dependencies = operation_dependencies(plan)
+        graph = OperationGraph(default_limit=BUCKET_CONCURRENCY, background_limit=BACKGROUND_CONCURRENCY)
+
+        for op in plan:
+            method, path = operation_route(op, self.target_guild.id)
+            bucket, _ = split_route(method, path)
+            graph.add(
+                op.op_id,
+                functools.partial(self._run_journaled, op, journal, role_mapping, category_mapping, channel_mapping),
+                bucket,
+                dependencies[op.op_id],
+                is_background(op)
+            )
 
-    async def clone_emojis(self) -> None:
-        print_info("Cloning emojis...")
+        self.assets = AssetPipeline(self.http_session(), ASSET_PREFETCH, self.cache)
+        self.assets.start(operation_assets(plan))
 
-        for emoji in self.source_guild.emojis:
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(str(emoji.url)) as resp:
-                        if resp.status == 200:
-                            emoji_data = await resp.read()
-
-                            new_emoji = await self.target_guild.create_custom_emoji(
-                                name=emoji.name,
-                                image=emoji_data,
-                                reason="Server cloning"
-                            )
-
-                            print_success(f"Emoji created: {emoji.name}")
-                            await safe_sleep(EMOJI_CREATE_DELAY)
-                        else:
-                            print_warning(f"Could not download emoji: {emoji.name}")
-
-            except discord.Forbidden:
-                print_warning(f"No permission to create emoji: {emoji.name}")
-            except discord.HTTPException as e:
-                if "Maximum number of emojis reached" in str(e):
-                    print_warning("Emoji limit reached in the target server")
-                    break
-                else:
-                    print_error(f"Error while creating emoji {emoji.name}: {str(e)}")
-            except Exception as e:
-                print_error(f"Unexpected error for emoji {emoji.name}: {str(e)}")
-
-    async def update_server_settings(self, clone_icon: bool = True) -> None:
-        print_info("Updating server settings...")
+        try:
+            results = await graph.run(self._structure_complete)
+        finally:
+            await self.assets.close()
+
+        for op_id, result in results.items():
+            if isinstance(result, Exception):
+                print_error(f"Operation {op_id} failed: {str(result)}")
+
+        return sum(1 for result in results.values() if result is None or isinstance(result, Exception))
 
+    async def _create_emoji(self, emoji: EmojiSpec) -> Optional[discord.Emoji]:
         try:
-            if self.source_guild.name != self.target_guild.name:
-                await self.target_guild.edit(name=f"{self.source_guild.name} (Clone)")
-                print_success("Server name updated")
+            image = emoji.image
+            if image is None and self.assets:
+                image = await self.assets.get(f"emoji:{emoji.id}")
 
-            if clone_icon and self.source_guild.icon:
-                try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(str(self.source_guild.icon.url)) as resp:
-                            if resp.status == 200:
-                                icon_data = await resp.read()
-                                await self.target_guild.edit(icon=icon_data)
-                                print_success("Server icon copied")
-                except Exception as e:
-                    print_warning(f"Could not copy the icon: {str(e)}")
-            elif not clone_icon:
-                print_info("Server icon not cloned (option disabled)")
+            if image is None:
+                print_warning(f"Could not download emoji: {emoji.name}")
+                return None
 
-            if self.source_guild.banner:
-                try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(str(self.source_guild.banner.url)) as resp:
-                            if resp.status == 200:
-                                banner_data = await resp.read()
-                                await self.target_guild.edit(banner=banner_data)
-                                print_success("Server banner copied")
-                except Exception as e:
-                    print_warning(f"Could not copy the banner: {str(e)}")
+            image = await self.images.prepare(image, 'emoji')
+            if image is None:
+                print_warning(f"Emoji {emoji.name} is too large or not a supported image"
+                              f"{'' if PIL_AVAILABLE else ' (install Pillow to convert it)'}")
+                return None
+
+            new_emoji = await self._send_create(f"/guilds/{self.target_guild.id}/emojis",
+                                                lambda: self.target_guild.create_custom_emoji(
+                                                    name=emoji.name,
+                                                    image=image,
+                                                    reason="Server cloning"
+                                                ),
+                                                ('emoji', emoji.name))
+
+            print_success(f"Emoji created: {emoji.name}")
+            return new_emoji
 
         except discord.Forbidden:
-            print_warning("No permission to modify server settings")
+            print_warning(f"No permission to create emoji: {emoji.name}")
+        except discord.HTTPException as e:
+            if "Maximum number of emojis reached" in str(e):
+                print_warning("Emoji limit reached in the target server")
+                self.emoji_limit_reached = True
+            else:
+                print_error(f"Error while creating emoji {emoji.name}: {str(e)}")
         except Exception as e:
-            print_error(f"Error while updating settings: {str(e)}")
+            print_error(f"Unexpected error for emoji {emoji.name}: {str(e)}")
 
-    async def clone_server(self, source_guild_id: int, target_guild_id: int, clone_icon: bool = True) -> bool:
+        return None
+
+    async def read_source(self, source_guild_id: int, include_assets: bool = True) -> bool:
+        with self._phase('read'):
+            self.source_guild = await self.get_guild(source_guild_id)
+            if not self.source_guild:
+                return False
+
+            print_success(f"Source server: {self.source_guild.name}")
+            print_info("Reading source server...")
+
+            self.source = capture_guild(self.source_guild)
+            if self.selection:
+                self.source = self.selection.subset(self.source).spec
+
+            if include_assets:
+                print_info(f"Downloading assets, {ASSET_PREFETCH} at a time...")
+                self.source, missing = await fill_snapshot_assets(self.source, self.http_session(), ASSET_PREFETCH, self.cache)
+                if missing:
+                    print_warning(f"{missing} assets could not be downloaded")
+
+            print_success(f"Source read: {len(self.source.roles)} roles, "
+                          f"{len(self.source.categories)} categories, {len(self.source.channels)} channels, "
+                          f"{len(self.source.emojis)} emojis")
+            return True
+
+    async def snapshot_server(self, source_guild_id: int, path: str) -> bool:
         try:
-            print_info(f"Starting clone: {source_guild_id} -> {target_guild_id}")
+            print_info(f"Starting snapshot: {source_guild_id} -> {path}")
 
             if not self.is_connected():
                 print_error("Discord client not connected")
                 return False
 
-            self.source_guild = await self.get_guild(source_guild_id)
-            if not self.source_guild:
+            if not await self.read_source(source_guild_id):
+                return False
+
+            save_snapshot(self.source, path)
+            self.print_run_stats()
+            print_success(f"Snapshot written to {path}")
+            return True
+
+        except Exception as e:
+            print_error(f"Error during snapshot: {str(e)}")
+            return False
+
+    def _resolve_mappings(self, role_ids: Dict[int, int], category_ids: Dict[int, int],
+                          channel_ids: Dict[int, int]) -> List[Dict[int, Any]]:
+        role_mapping = {}
+        for source_id, target_id in role_ids.items():
+            role = self.target_guild.get_role(target_id)
+            if role:
+                role_mapping[source_id] = role
+
+        category_mapping = {}
+        for source_id, target_id in category_ids.items():
+            category = self.target_guild.get_channel(target_id)
+            if category:
+                category_mapping[source_id] = category
+
+        channel_mapping = {}
+        for source_id, target_id in channel_ids.items():
+            channel = self.target_guild.get_channel(target_id)
+            if channel:
+                channel_mapping[source_id] = channel
+
+        return [role_mapping, category_mapping, channel_mapping]
+
+    def _pending_operations(self, plan: List[Operation], journal: CloneJournal) -> List[Operation]:
+        mapped = {kind: journal.mapping(kind) for kind in REUSE_KINDS}
+        plan = [op for op in plan if not (op.action == 'create' and op.source.id in mapped.get(op.kind, {}))]
+        for op in plan:
+            if op.action == 'create' and op.kind in REUSE_KINDS and not journal.is_done(op.op_id):
+                journal.invalidate('move:role' if op.kind == 'role' else 'move:channel')
+        return [op for op in plan if not journal.is_done(op.op_id)]
+
+    def _restore_mappings(self, journal: CloneJournal) -> List[Dict[int, Any]]:
+        return self._resolve_mappings(journal.mapping('role'), journal.mapping('category'), journal.mapping('channel'))
+
+    def _build_partial_plan(self, snapshot: GuildSpec, target: GuildSpec, rebuild: bool,
+                            journal: Optional[CloneJournal] = None) -> Tuple[List[Operation], List[Dict[int, Any]]]:
+        subset = self.selection.subset(snapshot)
+        self.source = subset.spec
+        counts = subset.count()
+        print_info(f"Selected {counts['categories']} categories, {counts['channels']} channels, "
+                   f"{counts['roles']} roles and {counts['emojis']} emojis, with their dependencies")
+
+        keep = journal.created_ids() if journal is not None else ()
+        plan, match = build_partial_plan(subset, target, rebuild, keep)
+        mappings = [match.id_mapping(kind) for kind in ('role', 'category', 'channel')]
+
+        if journal is not None:
+            plan = self._pending_operations(plan, journal)
+            for mapping, kind in zip(mappings, ('role', 'category', 'channel')):
+                mapping.update(journal.mapping(kind))
+        return plan, self._resolve_mappings(*mappings)
+
+    def _build_full_plan(self, snapshot: GuildSpec, target: GuildSpec, clone_icon: bool,
+                         journal: Optional[CloneJournal]) -> List[Operation]:
+        keep = journal.created_ids() if journal is not None else ()
+        plan = build_clean_plan(target, self._top_role_position(), keep)
+        plan += build_clone_plan(snapshot, target, clone_icon)
+
+        if journal is not None:
+            plan = self._pending_operations(plan, journal)
+        return plan
+
+    async def apply_snapshot(self, snapshot: GuildSpec, target_guild_id: int, clone_icon: bool = True,
+                             journal: Optional[CloneJournal] = None) -> bool:
+        try:
+            print_info(f"Applying snapshot of {snapshot.name} -> {target_guild_id}")
+
+            if not self.is_connected():
+                print_error("Discord client not connected")
                 return False
 
+            self.source = snapshot
+
             self.target_guild = await self.get_guild(target_guild_id)
             if not self.target_guild:
                 return False
 
-            print_success(f"Source server: {self.source_guild.name}")
             print_success(f"Target server: {self.target_guild.name}")
 
             try:
@@ -528,17 +940,41 @@ class DiscordServerCloner:
 
             print_info("Starting the cloning process...")
 
-            if not await self.clean_target_server():
-                print_warning("Cleaning partially failed, but cloning continues...")
+            target = capture_guild(self.target_guild)
 
-            role_mapping = await self.clone_roles()
+            if journal is None:
+                journal = CloneJournal.create(JOURNAL_DIR, snapshot.id, target_guild_id, clone_icon,
+                                              self.selection.as_dict() if self.selection else None)
+                save_snapshot(snapshot, journal.snapshot_path)
+                print_info(f"Progress is journaled to {journal.path} (resume with --resume)")
+            else:
+                print_info(f"Resuming from {journal.path}: {len(journal.completed)} operations already done")
+
+            if self.selection:
+                plan, mappings = self._build_partial_plan(snapshot, target, True, journal)
+            else:
+                plan = self._build_full_plan(snapshot, target, clone_icon, journal)
+                mappings = self._restore_mappings(journal)
+            print_info(f"Cloning {len(plan)} operations, up to {BUCKET_CONCURRENCY} at a time per rate limit bucket...")
 
-            await self.clone_categories_and_channels(role_mapping)
+            with self._phase('clone'):
+                failed = await self.execute_plan(plan, *mappings, journal=journal)
 
-            await self.clone_emojis()
+            if failed:
+                journal.close()
+            else:
+                journal.mark('finished')
+                journal.discard()
+                await self.verify_target(snapshot, target_guild_id)
 
-            await self.update_server_settings(clone_icon)
+            if not clone_icon:
+                print_info("Server icon not cloned (option disabled)")
 
+            self.print_run_stats()
+            if failed:
+                print_warning(f"Cloning partially completed: {failed} operations did not complete, "
+                              f"run again with --resume to retry them")
+                return False
             print_success("Cloning finished successfully!")
             return True
 
@@ -546,36 +982,346 @@ class DiscordServerCloner:
             print_error(f"Error during cloning: {str(e)}")
             return False
 
+    def _unchanged_ids(self, snapshot: GuildSpec, target: GuildSpec) -> Set[int]:
+        unchanged = unchanged_ids(fingerprint_guild(snapshot), fingerprint_guild(target, include_managed=False))
+        if unchanged:
+            print_info(f"{len(unchanged)} roles, categories, channels and emojis are unchanged and skipped")
+        return unchanged
+
+    async def verify_target(self, snapshot: GuildSpec, target_guild_id: int) -> bool:
+        target_guild = await self.get_guild(target_guild_id)
+        if not target_guild:
+            return False
+
+        started = time.perf_counter()
+        target = capture_guild(target_guild)
+        if self.selection:
+            subset = self.selection.subset(snapshot)
+            snapshot, target = subset.spec, subset.target_view(target)
+        diffs = diff_fingerprints(fingerprint_guild(snapshot), fingerprint_guild(target, include_managed=False))
+        elapsed = (time.perf_counter() - started) * 1000
+
+        if not diffs:
+            print_success(f"Verified: {target_guild.name} matches {snapshot.name} ({elapsed:.0f} ms)")
+            return True
+
+        print_warning(f"{target_guild.name} differs from {snapshot.name} in {len(diffs)} places:")
+        print_diffs(diffs, VERIFY_REPORT_LIMIT)
+        return False
+
+    async def sync_snapshot(self, snapshot: GuildSpec, target_guild_id: int, clone_icon: bool = True) -> bool:
+        try:
+            print_info(f"Syncing {snapshot.name} -> {target_guild_id}")
+
+            if not self.is_connected():
+                print_error("Discord client not connected")
+                return False
+
+            self.source = snapshot
+
+            self.target_guild = await self.get_guild(target_guild_id)
+            if not self.target_guild:
+                return False
+
+            print_success(f"Target server: {self.target_guild.name}")
+
+            target = capture_guild(self.target_guild)
+            if self.selection:
+                plan, mappings = self._build_partial_plan(snapshot, target, False)
+            else:
+                match = GuildMatch(snapshot, target)
+                plan = build_sync_plan(snapshot, target, clone_icon, match, self._unchanged_ids(snapshot, target))
+                mappings = self._resolve_mappings(*(match.id_mapping(kind) for kind in ('role', 'category', 'channel')))
+            counts = summarize_plan(plan)
+
+            print_info(f"Sync plan: {counts['create']} creates, {counts['edit']} edits, "
+                       f"{counts['move']} moves, {counts['delete']} deletes")
+
+            if not plan:
+                print_success("Target server already matches the source!")
+                return True
+
+            with self._phase('sync'):
+                await self.execute_plan(plan, *mappings)
+
+            self.print_run_stats()
+            print_success("Sync finished successfully!")
+            return True
+
+        except Exception as e:
+            print_error(f"Error during sync: {str(e)}")
+            return False
+
+    async def sync_server(self, source_guild_id: int, target_guild_id: int, clone_icon: bool = True) -> bool:
+        try:
+            print_info(f"Starting sync: {source_guild_id} -> {target_guild_id}")
+
+            if not self.is_connected():
+                print_error("Discord client not connected")
+                return False
+
+            if not await self.read_source(source_guild_id, include_assets=False):
+                return False
+
+            return await self.sync_snapshot(self.source, target_guild_id, clone_icon)
+
+        except Exception as e:
+            print_error(f"Error during sync: {str(e)}")
+            return False
+
+    async def clone_server(self, source_guild_id: int, target_guild_id: int, clone_icon: bool = True) -> bool:
+        try:
+            print_info(f"Starting clone: {source_guild_id} -> {target_guild_id}")
+
+            if not self.is_connected():
+                print_error("Discord client not connected")
+                return False
+
+            if not await self.read_source(source_guild_id, include_assets=False):
+                return False
+
+            return await self.apply_snapshot(self.source, target_guild_id, clone_icon)
+
+        except Exception as e:
+            print_error(f"Error during cloning: {str(e)}")
+            return False
+
+    async def _mirror_changes(self, target_guild_id: int, clone_icon: bool, mirror_map: MirrorMap) -> int:
+        self.target_guild = await load_guild(self.client, target_guild_id)
+        self.source = capture_guild(self.source_guild)
+        target = capture_guild(self.target_guild)
+
+        match = GuildMatch(self.source, target, mirror_map.known())
+        plan = build_sync_plan(self.source, target, clone_icon, match)
+        id_mappings = {kind: match.id_mapping(kind) for kind in MAP_KINDS}
+        for kind, mapping in id_mappings.items():
+            mirror_map.update(kind, mapping)
+
+        if plan:
+            counts = summarize_plan(plan)
+            print_info(f"Mirroring {counts['create']} creates, {counts['edit']} edits, "
+                       f"{counts['move']} moves, {counts['delete']} deletes")
+            mappings = self._resolve_mappings(id_mappings['role'], id_mappings['category'], id_mappings['channel'])
+            with self._phase('mirror'):
+                await self.execute_plan(plan, *mappings, journal=mirror_map)
+
+        mirror_map.retain(self.source)
+        mirror_map.save()
+        return len(plan)
+
+    async def mirror_server(self, source_guild_id: int, target_guild_id: int, clone_icon: bool = True) -> bool:
+        try:
+            print_info(f"Starting mirror: {source_guild_id} -> {target_guild_id}")
+
+            if not self.is_connected() or self.connection is None:
+                print_error("Mirroring needs a gateway connection")
+                return False
+
+            self.source_guild = await self.get_guild(source_guild_id)
+            if not self.source_guild:
+                return False
+
+            mirror_map = MirrorMap.load(os.path.join(MIRROR_DIR, f"{source_guild_id}-{target_guild_id}.json"))
+            buffer = ChangeBuffer(MIRROR_DEBOUNCE, MIRROR_MAX_DELAY)
+            SourceWatcher(self.client, source_guild_id, buffer).install()
+
+            print_info("Bringing the target up to date...")
+            await self._mirror_changes(target_guild_id, clone_icon, mirror_map)
+            print_success(f"Mirroring {self.source_guild.name}, press Ctrl+C to stop")
+
+            while True:
+                waiter = asyncio.ensure_future(buffer.wait())
+                await asyncio.wait([waiter, self.connection], return_when=asyncio.FIRST_COMPLETED)
+                if not waiter.done():
+                    waiter.cancel()
+                    print_error("The gateway connection was closed")
+                    return False
+
+                started = time.perf_counter()
+                operations = await self._mirror_changes(target_guild_id, clone_icon, mirror_map)
+                print_success(f"{waiter.result()} source changes mirrored with {operations} operations "
+                              f"in {time.perf_counter() - started:.1f}s")
+
+        except asyncio.CancelledError:
+            print_info("Mirror stopped")
+            self.print_run_stats()
+            return True
+        except MirrorError as e:
+            print_error(str(e))
+            return False
+        except Exception as e:
+            print_error(f"Error during mirroring: {str(e)}")
+            return False
+
+    async def fan_out(self, snapshot: GuildSpec, target_guild_ids: List[int], clone_icon: bool = True,
+                      sync: bool = False) -> bool:
+        phase = 'sync' if sync else 'clone'
+        print_info(f"Applying {snapshot.name} to {len(target_guild_ids)} servers at once...")
+        self.http_session()
+
+        async def run(target_guild_id: int) -> Tuple[bool, float]:
+            child = self.for_target(target_guild_id)
+            started = time.perf_counter()
+            if sync:
+                ok = await child.sync_snapshot(snapshot, target_guild_id, clone_icon)
+            else:
+                ok = await child.apply_snapshot(snapshot, target_guild_id, clone_icon)
+            return ok, time.perf_counter() - started
+
+        results = await asyncio.gather(*(run(target_guild_id) for target_guild_id in target_guild_ids),
+                                       return_exceptions=True)
+
+        print_info(f"Summary for {len(target_guild_ids)} servers:")
+        succeeded = 0
+        for target_guild_id, result in zip(target_guild_ids, results):
+            if isinstance(result, Exception):
+                print_error(f"{target_guild_id}: {str(result)}")
+                continue
+
+            ok, seconds = result
+            stats = self.metrics.phases.get(f"{phase}:{target_guild_id}")
+            done = stats.outcomes.get('ok', 0) if stats else 0
+            failed = stats.operations - done if stats else 0
+            line = (f"{target_guild_id}: {done} operations done, {failed} failed, "
+                    f"{stats.requests if stats else 0} API calls, {stats.rate_limited if stats else 0} rate limited, "
+                    f"{format_duration(seconds)}")
+            if stats and 'structure' in stats.milestones:
+                line += f" (structure after {format_duration(stats.milestones['structure'])})"
+
+            if ok and not failed:
+                succeeded += 1
+                print_success(line)
+            else:
+                print_warning(line)
+
+        self.print_run_stats()
+        return succeeded == len(target_guild_ids)
+
+    async def plan_server(self, snapshot: GuildSpec, target_guild_id: int, clone_icon: bool = True,
+                          sync: bool = False, journal: Optional[CloneJournal] = None) -> bool:
+        try:
+            print_info(f"Planning {snapshot.name} -> {target_guild_id} (dry run, nothing is written)")
+
+            if not self.is_connected():
+                print_error("Discord client not connected")
+                return False
+
+            self.target_guild = await self.get_guild(target_guild_id)
+            if not self.target_guild:
+                return False
+
+            self.source = snapshot
+            target = capture_guild(self.target_guild)
+            known = {}
+
+            if self.selection:
+                plan, mappings = self._build_partial_plan(snapshot, target, not sync, journal)
+                known = {kind: {source_id: obj.id for source_id, obj in mapping.items()}
+                         for kind, mapping in zip(REUSE_KINDS, mappings)}
+            elif sync:
+                unchanged = self._unchanged_ids(snapshot, target)
+                plan = build_sync_plan(snapshot, target, clone_icon, unchanged=unchanged)
+            else:
+                plan = self._build_full_plan(snapshot, target, clone_icon, journal)
+                if journal is not None:
+                    known = {kind: journal.mapping(kind) for kind in REUSE_KINDS}
+
+            if OPTIMIZE_PLANS:
+                optimizer = PlanOptimizer(self.source, target, known)
+                plan = optimizer.optimize(plan)
+                print_savings(optimizer.saved)
+
+            print_plan([('Sync' if sync else 'Cloning', plan)], target_guild_id, BUCKET_CONCURRENCY,
+                       self.scheduler.min_intervals)
+            return True
+
+        except Exception as e:
+            print_error(f"Error during planning: {str(e)}")
+            return False
+
     async def close(self) -> None:
+        if self.profiler is not None:
+            await self.profiler.stop()
+        if self.connection is not None:
+            self.connection.cancel()
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.images.close()
         if self.client:
             await self.client.close()
 
-def get_guild_ids():
-    print_info("Server configuration")
-
+def get_operation_mode() -> str:
+    print_info("Operation mode")
+    print_plain("[1] Clone a server into another server")
+    print_plain("[2] Snapshot a server to a file")
+    print_plain("[3] Apply a snapshot file to a server")
+    print_plain("[4] Sync a server with another server (only apply the differences)")
+    print_plain("[5] Verify that a server matches another server")
+    print_plain("[6] Mirror a server into another server (keeps running and applies every change)")
+
+    modes = {
+        '1': 'clone', '2': 'snapshot', '3': 'apply', '4': 'sync', '5': 'verify', '6': 'mirror',
+        'clone': 'clone', 'snapshot': 'snapshot', 'apply': 'apply', 'sync': 'sync', 'verify': 'verify',
+        'mirror': 'mirror'
+    }
+    mode = get_user_input("[?] Choose a mode (1/2/3/4/5/6): ", lambda value: value.strip().lower() in modes)
+    return modes[mode.lower()]
+
+def get_guild_id(prompt: str) -> int:
     while True:
-        source_id = get_user_input("[>] ID of the server to clone (source): ")
+        guild_id = get_user_input(prompt)
 
-        if not validate_discord_id(source_id):
+        if not validate_discord_id(guild_id):
             print_error("Invalid Discord ID (must be 17-19 digits).")
             continue
 
-        break
+        return int(guild_id)
+
+def get_snapshot_path(prompt: str, must_exist: bool) -> str:
+    while True:
+        path = get_user_input(prompt)
+
+        if not path:
+            print_error("Please enter a file path.")
+            continue
+
+        if must_exist and not os.path.isfile(path):
+            print_error(f"File not found: {path}")
+            continue
+
+        return path
 
+def get_target_ids(prompt: str, source_id: Optional[int] = None) -> List[int]:
     while True:
-        target_id = get_user_input("[<] ID of the destination server (target): ")
+        values = get_user_input(prompt).replace(',', ' ').split()
 
-        if not validate_discord_id(target_id):
+        if not values or not all(validate_discord_id(value) for value in values):
             print_error("Invalid Discord ID (must be 17-19 digits).")
             continue
 
-        if target_id == source_id:
+        target_ids = list(dict.fromkeys(int(value) for value in values))
+
+        if source_id in target_ids:
             print_error("The source and target servers cannot be the same.")
             continue
 
+        return target_ids
+
+def get_guild_ids():
+    print_info("Server configuration")
+
+    while True:
+        source_id = get_user_input("[>] ID of the server to clone (source): ")
+
+        if not validate_discord_id(source_id):
+            print_error("Invalid Discord ID (must be 17-19 digits).")
+            continue
+
         break
 
-    return int(source_id), int(target_id)
+    target_ids = get_target_ids("[<] ID of the destination server(s), comma separated (target): ", int(source_id))
+
+    return int(source_id), target_ids
 
 def get_clone_options():
     print_info("Cloning options")
@@ -590,12 +1336,15 @@ def get_clone_options():
 
     return clone_server_icon
 
-def confirm_operation(source_id: int, target_id: int, clone_icon: bool):
+def confirm_operation(source_id: Union[int, str], target_ids: List[int], clone_icon: bool, ask: bool = True):
     print_info("Operation summary")
-    print(f"[>] Source server: {source_id}")
-    print(f"[<] Target server: {target_id}")
-    print(f"[?] Clone icon: {'Yes' if clone_icon else 'No'}")
-    print()
+    print_plain(f"[>] Source server: {source_id}")
+    print_plain(f"[<] Target server{'s' if len(target_ids) > 1 else ''}: {', '.join(map(str, target_ids))}")
+    print_plain(f"[?] Clone icon: {'Yes' if clone_icon else 'No'}")
+    print_plain()
+
+    if not ask:
+        return
 
     confirmation = get_user_input("[!] Are you sure you want to continue? (yes/no): ")
 
@@ -603,75 +1352,214 @@ def confirm_operation(source_id: int, target_id: int, clone_icon: bool):
         print_warning("Operation canceled by the user.")
         sys.exit(0)
 
-async def main():
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Rex Server-Cloner")
+    parser.add_argument('--resume', nargs='?', const='', metavar='JOURNAL',
+                        help="resume an interrupted clone (latest unfinished journal if no path is given)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="list the operations and estimate API calls and duration without changing the target")
+    parser.add_argument('--include', action='append', default=[], metavar='SELECTOR',
+                        help="only clone matching parts, e.g. category:Staff, type:voice, name:ticket-*, id:123, "
+                             "role:Mod, emoji:pepe* (repeatable)")
+    parser.add_argument('--exclude', action='append', default=[], metavar='SELECTOR',
+                        help="leave matching parts out (repeatable)")
+    parser.add_argument('--profile', action='store_true',
+                        help="measure event loop lag and CPU versus await time per phase")
+    parser.add_argument('--trace', action='store_true',
+                        help="like --profile, and also write a cProfile trace of the run next to the report")
+    return parser.parse_args()
+
+def load_resume_journal(path: str) -> Optional[CloneJournal]:
+    if not path:
+        unfinished = CloneJournal.find_unfinished(JOURNAL_DIR)
+        if not unfinished:
+            print_error(f"No unfinished clone journal found in {JOURNAL_DIR}")
+            return None
+        path = unfinished[0]
+
     try:
-        print_banner()
+        journal = CloneJournal.load(path)
+    except JournalError as e:
+        print_error(str(e))
+        return None
 
-        if not TOKEN or TOKEN == "YOUR_TOKEN_HERE":
-            print_error("Please configure your Discord token in config.json")
-            sys.exit(1)
+    if journal.finished:
+        print_error(f"The clone journaled in {path} already finished")
+        return None
 
-        if not validate_token(TOKEN):
-            print_error("Invalid token format in config.json")
-            sys.exit(1)
+    return journal
 
-        source_guild_id, target_guild_id = get_guild_ids()
+def check_token() -> bool:
+    if not TOKEN or TOKEN == "YOUR_TOKEN_HERE":
+        print_error(f"Please configure your Discord token in {config_path()}")
+        return False
 
-        clone_icon = get_clone_options()
+    if not validate_token(TOKEN):
+        print_error(f"Invalid token format in {config_path()}")
+        return False
 
-        confirm_operation(source_guild_id, target_guild_id, clone_icon)
+    return True
 
-        print_info("Initializing the cloner...")
+async def run_mode(mode: str, source_guild_id: Optional[int], target_guild_ids: List[int],
+                   snapshot: Optional[GuildSpec] = None, snapshot_path: Optional[str] = None,
+                   clone_icon: bool = True, dry_run: bool = False, journal: Optional[CloneJournal] = None,
+                   profile: bool = False, trace: bool = False, selection: Optional[Selection] = None) -> bool:
+    if mode == 'mirror':
+        if len(target_guild_ids) != 1:
+            print_error("Mirroring needs exactly one target server")
+            return False
+        if selection:
+            print_warning("Selectors are not supported by mirror mode, the whole server is mirrored")
+            selection = None
+        if dry_run:
+            mode = 'sync'
+
+    print_info("Initializing the cloner...")
+
+    cloner = DiscordServerCloner(TOKEN)
+    if journal is not None:
+        selection = Selection.from_dict(journal.header.get('selection'))
+    if selection and mode != 'snapshot':
+        cloner.selection = selection
+    if mode == 'mirror':
+        cloner.use_gateway = True
+    if profile or trace:
+        cloner.start_profiling(trace)
+
+    print_info("Connecting to Discord...")
 
-        cloner = DiscordServerCloner(TOKEN)
+    try:
+        if not await cloner.connect([guild_id for guild_id in [source_guild_id] + target_guild_ids if guild_id]):
+            await cloner.close()
+            return False
 
-        print_info("Connecting to Discord...")
+        print_success("Connection established, starting clone!")
+
+        if mode in ('clone', 'sync') and (dry_run or len(target_guild_ids) > 1):
+            if await cloner.read_source(source_guild_id, include_assets=mode == 'clone' and not dry_run):
+                snapshot = cloner.source
+
+        if mode == 'verify':
+            if snapshot is None and await cloner.read_source(source_guild_id, include_assets=False):
+                snapshot = cloner.source
+            success = snapshot is not None
+            if success:
+                for target_guild_id in target_guild_ids:
+                    success = await cloner.verify_target(snapshot, target_guild_id) and success
+        elif dry_run and mode != 'snapshot':
+            success = snapshot is not None
+            for target_guild_id in target_guild_ids:
+                success = success and \
+                    await cloner.plan_server(snapshot, target_guild_id, clone_icon, mode == 'sync', journal)
+        elif mode == 'snapshot':
+            success = await cloner.snapshot_server(source_guild_id, snapshot_path)
+        elif mode == 'mirror':
+            success = await cloner.mirror_server(source_guild_id, target_guild_ids[0], clone_icon)
+        elif len(target_guild_ids) > 1:
+            success = snapshot is not None and \
+                await cloner.fan_out(snapshot, target_guild_ids, clone_icon, mode == 'sync')
+        elif mode == 'clone':
+            success = await cloner.clone_server(source_guild_id, target_guild_ids[0], clone_icon)
+        elif mode == 'sync' and snapshot is None:
+            success = await cloner.sync_server(source_guild_id, target_guild_ids[0], clone_icon)
+        elif mode == 'sync':
+            success = await cloner.sync_snapshot(snapshot, target_guild_ids[0], clone_icon)
+        else:
+            success = await cloner.apply_snapshot(snapshot, target_guild_ids[0], clone_icon, journal)
 
-        try:
-            cloner.client = discord.Client()
+        await cloner.stop_profiling()
+        cloner.write_report(f"{mode}-dry-run" if dry_run else mode)
+        await cloner.close()
 
-            @cloner.client.event
-            async def on_ready():
-                print_success(f"Connected as {cloner.client.user}")
-                print_info(f"Connected to {len(cloner.client.guilds)} servers")
+    except discord.LoginFailure:
+        print_error("Invalid Discord token")
+        return False
+    except Exception as e:
+        print_error(f"Connection error: {str(e)}")
+        return False
 
-            await cloner.client.login(TOKEN)
-            print_success("Authentication successful")
+    if mode == 'verify':
+        if not success:
+            print_error("The target does not match the source.")
+    elif success and dry_run and mode != 'snapshot':
+        print_info("Dry run only, the target server was not changed.")
+    elif success and mode == 'snapshot':
+        print_info("Apply the snapshot with mode 3 to build a server from it.")
+    elif success:
+        print_info("Check your Discord server to see the results.")
+    else:
+        print_error("Cloning failed.")
 
-            print_info("Connecting...")
+    return success
 
-            connection_task = asyncio.create_task(cloner.client.connect())
+async def main():
+    try:
+        print_banner()
 
-            def handle_task_exception(task):
-                try:
-                    task.result()
-                except Exception:
-                    pass
+        args = parse_arguments()
 
-            connection_task.add_done_callback(handle_task_exception)
+        if not check_token():
+            sys.exit(1)
 
-            await safe_sleep(3.0)
+        try:
+            selection = Selection(args.include, args.exclude)
+        except SelectionError as e:
+            print_error(str(e))
+            return False
+
+        journal = None
+        snapshot = None
+        snapshot_path = None
+        source_guild_id = None
+        target_guild_ids = []
+        clone_icon = False
+
+        if args.resume is not None:
+            mode = 'apply'
+            journal = load_resume_journal(args.resume)
+            if not journal:
+                return False
 
-            print_success("Connection established, starting clone!")
+            try:
+                snapshot = load_snapshot(journal.snapshot_path)
+            except SnapshotError as e:
+                print_error(str(e))
+                return False
 
-            success = await cloner.clone_server(source_guild_id, target_guild_id, clone_icon)
+            target_guild_ids = [journal.target_id]
+            clone_icon = journal.header['clone_icon']
+            print_success(f"Resuming {journal.path}: {len(journal.completed)} operations already done")
+            confirm_operation(snapshot.name, target_guild_ids, clone_icon, not args.dry_run)
+        else:
+            mode = get_operation_mode()
 
-            connection_task.cancel()
-            await cloner.close()
+            if mode in ('clone', 'sync', 'mirror'):
+                source_guild_id, target_guild_ids = get_guild_ids()
+                clone_icon = get_clone_options()
+                confirm_operation(source_guild_id, target_guild_ids, clone_icon, not args.dry_run)
 
-        except discord.LoginFailure:
-            print_error("Invalid Discord token")
-            return False
-        except Exception as e:
-            print_error(f"Connection error: {str(e)}")
-            return False
+            elif mode == 'verify':
+                source_guild_id, target_guild_ids = get_guild_ids()
 
-        if success:
-            print_info("Check your Discord server to see the results.")
-        else:
-            print_error("Cloning failed.")
+            elif mode == 'snapshot':
+                source_guild_id = get_guild_id("[>] ID of the server to snapshot (source): ")
+                snapshot_path = get_snapshot_path("[<] Snapshot file to write (e.g. server.rex.gz): ", must_exist=False)
 
-        return success
+            else:
+                snapshot_path = get_snapshot_path("[>] Snapshot file to apply: ", must_exist=True)
+                try:
+                    snapshot = load_snapshot(snapshot_path)
+                except SnapshotError as e:
+                    print_error(str(e))
+                    return False
+
+                print_success(f"Snapshot loaded: {snapshot.name}")
+                target_guild_ids = get_target_ids("[<] ID of the destination server(s), comma separated (target): ")
+                clone_icon = get_clone_options()
+                confirm_operation(snapshot_path, target_guild_ids, clone_icon, not args.dry_run)
+
+        return await run_mode(mode, source_guild_id, target_guild_ids, snapshot, snapshot_path, clone_icon,
+                              args.dry_run, journal, args.profile, args.trace, selection)
 
     except KeyboardInterrupt:
         print_warning("\nOperation interrupted by the user.")
@@ -0,0 +1,377 @@
+import contextlib
+import contextvars
+import datetime
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Callable, Iterator, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_phase: contextvars.ContextVar = contextvars.ContextVar('phase', default='run')
+_operation: contextvars.ContextVar = contextvars.ContextVar('operation', default=None)
+_enclosing: contextvars.ContextVar = contextvars.ContextVar('enclosing', default=())
+
+
+class EventStream:
+    def __init__(self):
+        self._sinks: List[Callable[[Dict[str, Any]], None]] = []
+
+    def subscribe(self, sink: Callable[[Dict[str, Any]], None]) -> None:
+        if sink not in self._sinks:
+            self._sinks.append(sink)
+
+    def unsubscribe(self, sink: Callable[[Dict[str, Any]], None]) -> None:
+        if sink in self._sinks:
+            self._sinks.remove(sink)
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        for sink in list(self._sinks):
+            sink(event)
+
+
+class OperationRecord:
+    __slots__ = ('phase', 'op_id', 'kind', 'action', 'route', 'started', 'seconds', 'requests', 'attempts',
+                 'rate_limited', 'waited', 'latency', 'outcome')
+
+    def __init__(self, phase: str, op_id: str, kind: str, action: str, route: str):
+        self.phase = phase
+        self.op_id = op_id
+        self.kind = kind
+        self.action = action
+        self.route = route
+        self.started = time.time()
+        self.seconds = 0.0
+        self.requests = 0
+        self.attempts = 0
+        self.rate_limited = 0
+        self.waited = 0.0
+        self.latency = 0.0
+        self.outcome = 'failed'
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - self.requests)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'phase': self.phase,
+            'op': self.op_id,
+            'kind': self.kind,
+            'action': self.action,
+            'route': self.route,
+            'started': round(self.started, 3),
+            'seconds': round(self.seconds, 4),
+            'requests': self.requests,
+            'retries': self.retries,
+            'rate_limited': self.rate_limited,
+            'waited': round(self.waited, 4),
+            'latency': round(self.latency, 4),
+            'outcome': self.outcome,
+        }
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count', 'max')
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        rank = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'samples': self.count,
+            'mean': round(self.total / self.count, 4) if self.count else 0.0,
+            'p99': round(self.quantile(0.99), 4) if self.count else 0.0,
+            'max': round(self.max, 4),
+        }
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        running = 0
+        lines = []
+        for bound, count in zip(self.buckets + (None,), self.counts):
+            running += count
+            lines.append(('+Inf' if bound is None else repr(bound), running))
+        return lines
+
+
+class PhaseStats:
+    __slots__ = ('name', 'started', 'finished', 'operations', 'outcomes', 'requests', 'retries', 'rate_limited',
+                 'waited', 'latency', 'cpu', 'overlapped', 'lag', 'saved', 'milestones')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.operations = 0
+        self.outcomes: Dict[str, int] = defaultdict(int)
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.waited = 0.0
+        self.latency = 0.0
+        self.cpu: Optional[float] = 0.0
+        self.overlapped = False
+        self.lag: Optional[Histogram] = None
+        self.saved = 0
+        self.milestones: Dict[str, float] = {}
+
+    @property
+    def seconds(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def awaited(self) -> Optional[float]:
+        return max(0.0, self.seconds - self.cpu) if self.cpu is not None else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        seconds = self.seconds
+        return {
+            'seconds': round(seconds, 3),
+            'operations': self.operations,
+            'outcomes': dict(self.outcomes),
+            'operations_per_second': round(self.operations / seconds, 2) if seconds else 0.0,
+            'requests': self.requests,
+            'retries': self.retries,
+            'rate_limited': self.rate_limited,
+            'waited': round(self.waited, 3),
+            'latency': round(self.latency, 3),
+            'cpu': round(self.cpu, 3) if self.cpu is not None else None,
+            'awaited': round(self.awaited, 3) if self.cpu is not None else None,
+            'calls_saved': self.saved,
+            **({'milestones': {name: round(at, 3) for name, at in self.milestones.items()}} if self.milestones else {}),
+            **({'loop_lag': self.lag.summary()} if self.lag else {}),
+        }
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RunMetrics:
+    def __init__(self, events: Optional[EventStream] = None):
+        self.events = events or EventStream()
+        self.started = time.time()
+        self.records: List[OperationRecord] = []
+        self.phases: Dict[str, PhaseStats] = {}
+        self.operation_latency: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.request_latency: Dict[str, Histogram] = defaultdict(Histogram)
+        self.loop_lag: Optional[Histogram] = None
+        self._active: Dict[str, int] = defaultdict(int)
+
+    def _phase_stats(self, name: str) -> PhaseStats:
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats(name)
+            stats.started = time.time()
+        return stats
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[PhaseStats]:
+        stats = self._phase_stats(name)
+        stats.finished = None
+        enclosing = _enclosing.get()
+        for other in self._active:
+            if other != name and other not in enclosing:
+                self.phases[other].overlapped = stats.overlapped = True
+        self._active[name] += 1
+
+        token = _phase.set(name)
+        enclosing_token = _enclosing.set(enclosing + (name,))
+        cpu_started = time.process_time()
+        self.events.emit({'type': 'phase', 'phase': name, 'state': 'started'})
+        try:
+            yield stats
+        finally:
+            _phase.reset(token)
+            _enclosing.reset(enclosing_token)
+            self._active[name] -= 1
+            if not self._active[name]:
+                del self._active[name]
+            if stats.overlapped:
+                stats.cpu = None
+            elif stats.cpu is not None:
+                stats.cpu += time.process_time() - cpu_started
+            stats.finished = time.time()
+            self.events.emit({'type': 'phase', 'phase': name, 'state': 'finished', **stats.as_dict()})
+
+    @contextlib.contextmanager
+    def operation(self, op_id: str, kind: str, action: str, route: str) -> Iterator[OperationRecord]:
+        record = OperationRecord(_phase.get(), op_id, kind, action, route)
+        token = _operation.set(record)
+        started = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record.outcome = 'error'
+            raise
+        finally:
+            _operation.reset(token)
+            record.seconds = time.perf_counter() - started
+            self._finish(record)
+
+    def _finish(self, record: OperationRecord) -> None:
+        self.records.append(record)
+        stats = self._phase_stats(record.phase)
+        stats.operations += 1
+        stats.outcomes[record.outcome] += 1
+        stats.retries += record.retries
+        self.operation_latency[(record.phase, record.route)].observe(record.seconds)
+        self.events.emit({'type': 'operation', **record.as_dict()})
+
+    def on_acquire(self, route: str, waited: float) -> None:
+        self._phase_stats(_phase.get()).waited += waited
+
+        record = _operation.get()
+        if record is not None:
+            record.requests += 1
+            record.waited += waited
+
+    def on_response(self, route: str, status: int, seconds: float) -> None:
+        stats = self._phase_stats(_phase.get())
+        stats.requests += 1
+        stats.latency += seconds
+        self.request_latency[route].observe(seconds)
+
+        record = _operation.get()
+        if record is not None:
+            record.attempts += 1
+            record.latency += seconds
+        if status == 429:
+            stats.rate_limited += 1
+            if record is not None:
+                record.rate_limited += 1
+
+    def milestone(self, name: str) -> float:
+        stats = self._phase_stats(_phase.get())
+        stats.milestones[name] = stats.seconds
+        self.events.emit({'type': 'milestone', 'phase': stats.name, 'milestone': name, 'seconds': stats.seconds})
+        return stats.milestones[name]
+
+    def on_saved(self, calls: int) -> None:
+        self._phase_stats(_phase.get()).saved += calls
+
+    def on_loop_lag(self, lag: float) -> None:
+        if self.loop_lag is None:
+            self.loop_lag = Histogram(LAG_BUCKETS)
+        self.loop_lag.observe(lag)
+
+        for stats in self.phases.values():
+            if stats.started is not None and stats.finished is None:
+                if stats.lag is None:
+                    stats.lag = Histogram(LAG_BUCKETS)
+                stats.lag.observe(lag)
+
+    def report(self) -> Dict[str, Any]:
+        report = {
+            'started_at': datetime.datetime.fromtimestamp(self.started, datetime.timezone.utc).isoformat(),
+            'seconds': round(time.time() - self.started, 3),
+            'phases': {name: stats.as_dict() for name, stats in self.phases.items()},
+            'operations': [record.as_dict() for record in self.records],
+        }
+        if self.loop_lag is not None:
+            report['loop_lag'] = self.loop_lag.summary()
+        return report
+
+    def prometheus(self) -> str:
+        lines = []
+
+        lines.append('# HELP rex_operation_duration_seconds Time from start to end of one clone operation.')
+        lines.append('# TYPE rex_operation_duration_seconds histogram')
+        for (phase, route), histogram in sorted(self.operation_latency.items()):
+            labels = f'phase="{_label(phase)}",route="{_label(route)}"'
+            for bound, count in histogram.cumulative():
+                lines.append(f'rex_operation_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'rex_operation_duration_seconds_sum{{{labels}}} {histogram.total:.6f}')
+            lines.append(f'rex_operation_duration_seconds_count{{{labels}}} {histogram.count}')
+
+        lines.append('# HELP rex_request_duration_seconds Response time of single API requests.')
+        lines.append('# TYPE rex_request_duration_seconds histogram')
+        for route, histogram in sorted(self.request_latency.items()):
+            labels = f'route="{_label(route)}"'
+            for bound, count in histogram.cumulative():
+                lines.append(f'rex_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'rex_request_duration_seconds_sum{{{labels}}} {histogram.total:.6f}')
+            lines.append(f'rex_request_duration_seconds_count{{{labels}}} {histogram.count}')
+
+        if self.loop_lag is not None:
+            lines.append('# HELP rex_event_loop_lag_seconds How late the event loop woke up a sleeping task.')
+            lines.append('# TYPE rex_event_loop_lag_seconds histogram')
+            for bound, count in self.loop_lag.cumulative():
+                lines.append(f'rex_event_loop_lag_seconds_bucket{{le="{bound}"}} {count}')
+            lines.append(f'rex_event_loop_lag_seconds_sum {self.loop_lag.total:.6f}')
+            lines.append(f'rex_event_loop_lag_seconds_count {self.loop_lag.count}')
+
+        phase_metrics = (
+            ('rex_phase_duration_seconds', 'gauge', 'Wall time of the phase.', lambda s: f"{s.seconds:.6f}"),
+            ('rex_phase_operations_per_second', 'gauge', 'Completed operations per second in the phase.',
+             lambda s: f"{s.operations / s.seconds if s.seconds else 0.0:.6f}"),
+            ('rex_requests_total', 'counter', 'API requests sent.', lambda s: str(s.requests)),
+            ('rex_request_retries_total', 'counter', 'API requests the library retried.', lambda s: str(s.retries)),
+            ('rex_rate_limited_total', 'counter', '429 responses received.', lambda s: str(s.rate_limited)),
+            ('rex_rate_limit_wait_seconds_total', 'counter', 'Time spent waiting on rate limit buckets.',
+             lambda s: f"{s.waited:.6f}"),
+            ('rex_request_latency_seconds_total', 'counter', 'Time spent waiting on API responses.',
+             lambda s: f"{s.latency:.6f}"),
+            ('rex_phase_cpu_seconds', 'gauge', 'Process CPU time used while the phase ran alone.',
+             lambda s: f"{s.cpu:.6f}" if s.cpu is not None else None),
+            ('rex_calls_saved_total', 'counter', 'API calls the plan optimizer removed.', lambda s: str(s.saved)),
+        )
+        for name, kind, description, value in phase_metrics:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            for phase, stats in sorted(self.phases.items()):
+                if value(stats) is not None:
+                    lines.append(f'{name}{{phase="{_label(phase)}"}} {value(stats)}')
+
+        lines.append('# HELP rex_phase_milestone_seconds Time from the start of the phase to a milestone.')
+        lines.append('# TYPE rex_phase_milestone_seconds gauge')
+        for phase, stats in sorted(self.phases.items()):
+            for milestone, at in sorted(stats.milestones.items()):
+                lines.append(f'rex_phase_milestone_seconds{{phase="{_label(phase)}",milestone="{milestone}"}} {at:.6f}')
+
+        lines.append('# HELP rex_operations_total Operations by phase and outcome.')
+        lines.append('# TYPE rex_operations_total counter')
+        for phase, stats in sorted(self.phases.items()):
+            for outcome, count in sorted(stats.outcomes.items()):
+                lines.append(f'rex_operations_total{{phase="{_label(phase)}",outcome="{outcome}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def base_path(self, directory: str, name: str) -> str:
+        stamp = datetime.datetime.fromtimestamp(self.started).strftime('%Y%m%d-%H%M%S')
+        return os.path.join(directory, f"{stamp}-{name}")
+
+    def write(self, directory: str, name: str) -> List[str]:
+        os.makedirs(directory, exist_ok=True)
+        base = self.base_path(directory, name)
+
+        with open(f"{base}.json", 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        with open(f"{base}.prom", 'w', encoding='utf-8') as f:
+            f.write(self.prometheus())
+
+        return [f"{base}.json", f"{base}.prom"]
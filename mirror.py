@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+from typing import Optional, Dict, Any, Iterable
+
+import discord
+
+from spec import GuildSpec
+
+MIRROR_EVENTS = (
+    'guild_update',
+    'guild_role_create', 'guild_role_update', 'guild_role_delete',
+    'guild_channel_create', 'guild_channel_update', 'guild_channel_delete',
+    'guild_emojis_update',
+)
+MAP_KINDS = ('role', 'category', 'channel', 'emoji')
+
+
+class MirrorError(Exception):
+    pass
+
+
+class MirrorMap:
+    def __init__(self, path: str):
+        self.path = path
+        self.ids: Dict[str, Dict[int, int]] = {kind: {} for kind in MAP_KINDS}
+
+    @classmethod
+    def load(cls, path: str) -> 'MirrorMap':
+        mirror_map = cls(path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return mirror_map
+        except (OSError, json.JSONDecodeError) as e:
+            raise MirrorError(f"Could not read the mirror map {path}: {str(e)}")
+
+        for kind in MAP_KINDS:
+            mirror_map.ids[kind] = {int(source_id): target_id for source_id, target_id in data.get(kind, {}).items()}
+        return mirror_map
+
+    def known(self) -> Dict[int, int]:
+        return {source_id: target_id for ids in self.ids.values() for source_id, target_id in ids.items()}
+
+    def update(self, kind: str, mapping: Dict[int, int]) -> None:
+        self.ids[kind].update(mapping)
+
+    def record(self, op_id: str, kind: str, source_id: Optional[int], target_id: int) -> None:
+        if kind not in self.ids:
+            return
+        if source_id is not None:
+            self.ids[kind][source_id] = target_id
+            return
+        for ids in self.ids.values():
+            for stale in [key for key, value in ids.items() if value == target_id]:
+                del ids[stale]
+
+    def retain(self, source: GuildSpec) -> None:
+        present = {item.id for item in (*source.roles, *source.categories, *source.channels, *source.emojis)}
+        for ids in self.ids.values():
+            for stale in [key for key in ids if key not in present]:
+                del ids[stale]
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({kind: {str(k): v for k, v in ids.items()} for kind, ids in self.ids.items()}, f)
+        os.replace(temporary, self.path)
+
+
+class ChangeBuffer:
+    def __init__(self, quiet: float = 1.0, max_delay: float = 5.0):
+        self.quiet = quiet
+        self.max_delay = max_delay
+        self.pending = 0
+        self._first = 0.0
+        self._last = 0.0
+        self._changed = asyncio.Event()
+
+    def notify(self) -> None:
+        now = asyncio.get_running_loop().time()
+        if not self.pending:
+            self._first = now
+        self._last = now
+        self.pending += 1
+        self._changed.set()
+
+    async def wait(self) -> int:
+        await self._changed.wait()
+        loop = asyncio.get_running_loop()
+
+        while True:
+            remaining = min(self._last + self.quiet, self._first + self.max_delay) - loop.time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(remaining)
+
+        changes, self.pending = self.pending, 0
+        self._changed.clear()
+        return changes
+
+
+def _event_guild_id(args: Iterable[Any]) -> Optional[int]:
+    for arg in args:
+        if isinstance(arg, discord.Guild):
+            return arg.id
+        guild = getattr(arg, 'guild', None)
+        if guild is not None:
+            return guild.id
+    return None
+
+
+class SourceWatcher:
+    def __init__(self, client: discord.Client, guild_id: int, buffer: ChangeBuffer):
+        self.client = client
+        self.guild_id = guild_id
+        self.buffer = buffer
+
+    def install(self) -> None:
+        for event in MIRROR_EVENTS:
+            setattr(self.client, f"on_{event}", self._on_event)
+
+    async def _on_event(self, *args: Any) -> None:
+        if _event_guild_id(args) == self.guild_id:
+            self.buffer.notify()
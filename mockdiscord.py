@@ -0,0 +1,588 @@
+import asyncio
+import base64
+import datetime
+import hashlib
+import itertools
+import json
+import random
+import time
+import zlib
+from collections import Counter
+from typing import Optional, List, Dict, Any, Tuple, Sequence, Iterable
+
+import aiohttp
+from aiohttp import web
+
+from costmodel import BUCKET_MODELS, DEFAULT_BUCKET, GLOBAL_LIMIT
+from ratelimit import split_route
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+EMOJI_MAX_BYTES = 256 * 1024
+TEXT, VOICE, CATEGORY, STAGE = 0, 2, 4, 13
+_snowflakes = itertools.count(1100000000000000000)
+
+
+def snowflake() -> int:
+    return next(_snowflakes)
+
+
+def fake_image(seed: int, size: int) -> bytes:
+    block = hashlib.sha256(str(seed).encode()).digest()
+    body = block * (max(size - len(PNG_HEADER), 0) // len(block) + 1)
+    return PNG_HEADER + body[:max(size - len(PNG_HEADER), 0)]
+
+
+def generate_guild(name: str, roles: int = 20, categories: int = 5, channels: int = 40, overwrites: int = 2,
+                   emojis: int = 10, seed: int = 0, owner_id: Optional[int] = None,
+                   synced: float = 0.5, members: Sequence[int] = (), member_overwrites: int = 1) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    guild_id = snowflake()
+
+    role_list = [{
+        'id': str(guild_id), 'name': '@everyone', 'permissions': str(0x6BFFFEC1), 'position': 0,
+        'colors': {'primary_color': 0}, 'hoist': False, 'managed': False, 'mentionable': False, 'flags': 0,
+    }]
+    for index in range(roles):
+        role_list.append({
+            'id': str(snowflake()), 'name': f"role-{index}", 'permissions': str(rng.getrandbits(40)),
+            'position': index + 1, 'colors': {'primary_color': rng.randrange(0xFFFFFF)}, 'hoist': rng.random() < 0.2,
+            'managed': False, 'mentionable': rng.random() < 0.5, 'flags': 0,
+        })
+
+    def random_overwrites() -> List[Dict[str, Any]]:
+        picked = rng.sample(role_list, min(overwrites, len(role_list)))
+        entries = []
+        for role in picked:
+            allow = rng.getrandbits(40)
+            entries.append({'id': role['id'], 'type': 0, 'allow': str(allow), 'deny': str(rng.getrandbits(40) & ~allow)})
+        for member_id in rng.sample(list(members), min(member_overwrites, len(members))):
+            allow = rng.getrandbits(40)
+            entries.append({'id': str(member_id), 'type': 1, 'allow': str(allow),
+                            'deny': str(rng.getrandbits(40) & ~allow)})
+        return entries
+
+    channel_list = []
+    category_overwrites = {}
+    for index in range(categories):
+        category_id = str(snowflake())
+        category_overwrites[category_id] = random_overwrites()
+        channel_list.append({
+            'id': category_id, 'type': CATEGORY, 'name': f"category-{index}", 'position': index,
+            'parent_id': None, 'permission_overwrites': category_overwrites[category_id],
+        })
+
+    category_ids = list(category_overwrites)
+    for index in range(channels):
+        parent_id = category_ids[index % len(category_ids)] if category_ids else None
+        if parent_id and rng.random() < synced:
+            channel_overwrites = [dict(entry) for entry in category_overwrites[parent_id]]
+        else:
+            channel_overwrites = random_overwrites()
+
+        channel = {
+            'id': str(snowflake()), 'name': f"channel-{index}", 'position': index, 'parent_id': parent_id,
+            'permission_overwrites': channel_overwrites,
+        }
+        if index % 5 == 4:
+            channel.update({'type': VOICE, 'bitrate': 64000, 'user_limit': rng.randrange(0, 25)})
+        else:
+            channel.update({'type': TEXT, 'topic': f"Topic of channel {index}", 'nsfw': False,
+                            'rate_limit_per_user': rng.choice((0, 0, 5, 30))})
+        channel_list.append(channel)
+
+    emoji_list = [{
+        'id': str(snowflake()), 'name': f"emoji_{index}", 'animated': False, 'roles': [],
+        'require_colons': True, 'managed': False, 'available': True,
+    } for index in range(emojis)]
+
+    return {
+        'id': str(guild_id), 'name': name, 'icon': hashlib.md5(f"icon{seed}".encode()).hexdigest(), 'banner': None,
+        'owner_id': str(owner_id) if owner_id else None, 'roles': role_list, 'channels': channel_list,
+        'emojis': emoji_list, 'stickers': [], 'features': [], 'member_count': 1, 'large': False,
+        'premium_tier': 3, 'verification_level': 0, 'default_message_notifications': 0,
+        'explicit_content_filter': 0, 'mfa_level': 0, 'nsfw_level': 0, 'preferred_locale': 'en-US',
+        'system_channel_flags': 0, 'afk_timeout': 300, 'joined_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def json_response(data: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> web.Response:
+    return web.Response(body=json.dumps(data).encode(), status=status,
+                        headers={**(headers or {}), 'Content-Type': 'application/json'})
+
+
+class MockBucket:
+    __slots__ = ('limit', 'window', 'remaining', 'reset_at')
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self, now: float) -> Optional[float]:
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.window
+        if self.remaining <= 0:
+            return self.reset_at - now
+        self.remaining -= 1
+        return None
+
+
+class MockDiscord:
+    def __init__(self, latency: float = 0.02, jitter: float = 0.0, time_scale: float = 1.0,
+                 bucket_limits: Optional[Dict[str, Tuple[int, float]]] = None, image_size: int = 4096,
+                 failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.jitter = jitter
+        self.time_scale = time_scale
+        self.bucket_limits = dict(BUCKET_MODELS) if bucket_limits is None else bucket_limits
+        self.image_size = image_size
+        self.user = {
+            'id': str(snowflake()), 'username': 'benchmark', 'discriminator': '0', 'global_name': None,
+            'avatar': None, 'bot': False, 'verified': True, 'mfa_enabled': False, 'flags': 0,
+            'premium_type': 0, 'email': 'benchmark@example.com', 'phone': None,
+        }
+        self.guilds: Dict[str, Dict[str, Any]] = {}
+        self.members: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.images: Dict[str, bytes] = {}
+        self.requests = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.downloads = 0
+        self.routes: Counter = Counter()
+        self._buckets: Dict[str, MockBucket] = {}
+        self._global: List[float] = []
+        self._sockets: Dict[web.WebSocketResponse, Any] = {}
+        self._sequence = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ''
+
+    def add_guild(self, guild: Dict[str, Any]) -> int:
+        guild['owner_id'] = self.user['id']
+        self.guilds[guild['id']] = guild
+        return int(guild['id'])
+
+    def add_members(self, guild_id: int, user_ids: Iterable[int]) -> None:
+        members = self.members.setdefault(str(guild_id), {})
+        for user_id in user_ids:
+            members[str(user_id)] = {
+                'id': str(user_id), 'username': f"user{user_id}", 'discriminator': '0', 'global_name': None,
+                'avatar': None, 'bot': False,
+            }
+
+    def reset_counters(self) -> None:
+        self.requests = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.downloads = 0
+        self.routes.clear()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        app = web.Application(middlewares=[self._middleware], client_max_size=64 * 1024 * 1024)
+        api = '/api/v{version}'
+        app.router.add_get('/gateway', self._gateway)
+        app.router.add_get('/emojis/{file}', self._emoji_image)
+        app.router.add_get('/{kind:icons|banners}/{guild_id}/{file}', self._guild_image)
+        app.router.add_get(api + '/users/@me', self._get_me)
+        app.router.add_get(api + '/guilds/{guild_id}', self._get_guild)
+        app.router.add_patch(api + '/guilds/{guild_id}', self._edit_guild)
+        app.router.add_get(api + '/guilds/{guild_id}/members/{user_id}', self._get_member)
+        app.router.add_get(api + '/guilds/{guild_id}/roles', self._get_roles)
+        app.router.add_post(api + '/guilds/{guild_id}/roles', self._create_role)
+        app.router.add_patch(api + '/guilds/{guild_id}/roles', self._move_roles)
+        app.router.add_patch(api + '/guilds/{guild_id}/roles/{role_id}', self._edit_role)
+        app.router.add_delete(api + '/guilds/{guild_id}/roles/{role_id}', self._delete_role)
+        app.router.add_get(api + '/guilds/{guild_id}/channels', self._get_channels)
+        app.router.add_post(api + '/guilds/{guild_id}/channels', self._create_channel)
+        app.router.add_patch(api + '/guilds/{guild_id}/channels', self._move_channels)
+        app.router.add_patch(api + '/channels/{channel_id}', self._edit_channel)
+        app.router.add_delete(api + '/channels/{channel_id}', self._delete_channel)
+        app.router.add_put(api + '/channels/{channel_id}/permissions/{target_id}', self._edit_permissions)
+        app.router.add_delete(api + '/channels/{channel_id}/permissions/{target_id}', self._delete_permissions)
+        app.router.add_get(api + '/guilds/{guild_id}/emojis', self._get_emojis)
+        app.router.add_post(api + '/guilds/{guild_id}/emojis', self._create_emoji)
+        app.router.add_delete(api + '/guilds/{guild_id}/emojis/{emoji_id}', self._delete_emoji)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        for ws in list(self._sockets):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if not request.path.startswith('/api/'):
+            if request.path != '/gateway':
+                self.downloads += 1
+            return await handler(request)
+
+        route, major = split_route(request.method, request.path)
+        limit, window = self.bucket_limits.get(route, DEFAULT_BUCKET)
+        window *= self.time_scale
+        bucket = self._buckets.setdefault(f"{route}:{major}", MockBucket(limit, window))
+        now = time.monotonic()
+        self.requests += 1
+        self.routes[route] += 1
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.random() * self.jitter)
+
+        global_limit, global_window = GLOBAL_LIMIT
+        self._global = [sent for sent in self._global if sent > now - global_window * self.time_scale]
+        if len(self._global) >= global_limit:
+            return self._too_many(self._global[0] + global_window * self.time_scale - now, True)
+        self._global.append(now)
+
+        retry_after = bucket.take(now)
+        bucket_headers = {
+            'X-RateLimit-Limit': str(bucket.limit),
+            'X-RateLimit-Remaining': str(bucket.remaining),
+            'X-RateLimit-Reset': f"{time.time() + bucket.reset_at - now:.3f}",
+            'X-RateLimit-Reset-After': f"{max(bucket.reset_at - now, 0.0):.3f}",
+            'X-RateLimit-Bucket': hashlib.md5(route.encode()).hexdigest()[:16],
+        }
+        if retry_after is not None:
+            response = self._too_many(retry_after, False)
+        else:
+            response = await handler(request)
+            if request.method != 'GET' and response.status < 300 and random.random() < self.failure_rate:
+                self.failed += 1
+                response = json_response({'message': '502: Bad Gateway', 'code': 0}, status=502)
+        response.headers.update(bucket_headers)
+        return response
+
+    def _too_many(self, retry_after: float, is_global: bool) -> web.Response:
+        self.rate_limited += 1
+        headers = {'Retry-After': f"{retry_after:.3f}"}
+        if is_global:
+            headers['X-RateLimit-Global'] = 'true'
+        body = {'message': 'You are being rate limited.', 'retry_after': retry_after, 'global': is_global}
+        return json_response(body, status=429, headers=headers)
+
+    def _guild(self, request: web.Request) -> Dict[str, Any]:
+        guild = self.guilds.get(request.match_info['guild_id'])
+        if guild is None:
+            raise web.HTTPNotFound(body=json.dumps({'message': 'Unknown Guild', 'code': 10004}).encode(),
+                                   headers={'Content-Type': 'application/json'})
+        return guild
+
+    def _channel(self, request: web.Request) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        channel_id = request.match_info['channel_id']
+        for guild in self.guilds.values():
+            for channel in guild['channels']:
+                if channel['id'] == channel_id:
+                    return guild, channel
+        raise web.HTTPNotFound(body=json.dumps({'message': 'Unknown Channel', 'code': 10003}).encode(),
+                               headers={'Content-Type': 'application/json'})
+
+    def _store_image(self, data_uri: Optional[str]) -> Optional[str]:
+        if not data_uri:
+            return None
+        data = base64.b64decode(data_uri.split(',', 1)[1])
+        key = hashlib.md5(data).hexdigest()
+        self.images[key] = data
+        return key
+
+    async def _send(self, ws: web.WebSocketResponse, payload: Dict[str, Any]) -> None:
+        compressor = self._sockets[ws]
+        await ws.send_bytes(compressor.compress(json.dumps(payload).encode()) + compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    async def _dispatch(self, event: str, data: Dict[str, Any]) -> None:
+        payload = {'op': 0, 't': event, 's': next(self._sequence), 'd': data}
+        for ws in list(self._sockets):
+            if not ws.closed:
+                await self._send(ws, payload)
+
+    def _member(self) -> Dict[str, Any]:
+        return {'roles': [], 'joined_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                'deaf': False, 'mute': False, 'flags': 0}
+
+    def _members_chunk(self, guild_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        members = self.members.get(str(guild_id), {})
+        user_ids = [str(user_id) for user_id in data.get('user_ids') or ()]
+        found = [dict(self._member(), user=members[user_id]) for user_id in user_ids if user_id in members]
+        return {
+            'guild_id': str(guild_id), 'members': found, 'chunk_index': 0, 'chunk_count': 1,
+            'not_found': [user_id for user_id in user_ids if user_id not in members], 'nonce': data.get('nonce'),
+        }
+
+    def _ready(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        guilds = list(self.guilds.values())
+        member = dict(self._member(), user_id=self.user['id'])
+        ready = {
+            'v': 9, 'user': self.user, 'session_id': 'benchmark', 'resume_gateway_url': f"{self.base_url.replace('http', 'ws')}/gateway",
+            'guilds': [dict(guild) for guild in guilds], 'merged_members': [[dict(member)] for _ in guilds],
+            'users': [], 'relationships': [], 'private_channels': [],
+        }
+        supplemental = {
+            'guilds': [{'id': guild['id'], 'voice_states': []} for guild in guilds],
+            'merged_members': [[] for _ in guilds],
+            'merged_presences': {'guilds': [[] for _ in guilds], 'friends': []},
+            'lazy_private_channels': [],
+        }
+        return ready, supplemental
+
+    async def _gateway(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(compress=False)
+        await ws.prepare(request)
+        self._sockets[ws] = zlib.compressobj()
+
+        try:
+            await self._send(ws, {'op': 10, 'd': {'heartbeat_interval': 41250}})
+
+            async for message in ws:
+                if message.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    continue
+                payload = json.loads(message.data)
+
+                if payload.get('op') == 1:
+                    await self._send(ws, {'op': 11})
+                elif payload.get('op') == 2:
+                    ready, supplemental = self._ready()
+                    await self._send(ws, {'op': 0, 't': 'READY', 's': next(self._sequence), 'd': ready})
+                    await self._send(ws, {'op': 0, 't': 'READY_SUPPLEMENTAL', 's': next(self._sequence), 'd': supplemental})
+                elif payload.get('op') == 8:
+                    guild_ids = payload['d'].get('guild_id') or []
+                    for guild_id in guild_ids if isinstance(guild_ids, list) else [guild_ids]:
+                        chunk = self._members_chunk(guild_id, payload['d'])
+                        await self._send(ws, {'op': 0, 't': 'GUILD_MEMBERS_CHUNK', 's': next(self._sequence), 'd': chunk})
+        finally:
+            self._sockets.pop(ws, None)
+
+        return ws
+
+    async def _emoji_image(self, request: web.Request) -> web.Response:
+        emoji_id = request.match_info['file'].split('.')[0]
+        data = self.images.get(emoji_id) or fake_image(int(emoji_id), self.image_size)
+        return web.Response(body=data, content_type='image/png')
+
+    async def _guild_image(self, request: web.Request) -> web.Response:
+        key = request.match_info['file'].split('.')[0]
+        data = self.images.get(key) or fake_image(int(key, 16), self.image_size * 4)
+        return web.Response(body=data, content_type='image/png')
+
+    async def _get_me(self, request: web.Request) -> web.Response:
+        return json_response(self.user)
+
+    async def _get_guild(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        return json_response({key: value for key, value in guild.items() if key != 'channels'})
+
+    async def _edit_guild(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        payload = await request.json()
+
+        if 'name' in payload:
+            guild['name'] = payload['name']
+        for field in ('icon', 'banner'):
+            if field in payload:
+                guild[field] = self._store_image(payload[field])
+
+        data = {key: value for key, value in guild.items() if key != 'channels'}
+        await self._dispatch('GUILD_UPDATE', data)
+        return json_response(data)
+
+    async def _get_member(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        user_id = request.match_info['user_id']
+        if user_id == self.user['id']:
+            return json_response(dict(self._member(), user=self.user))
+        user = self.members.get(guild['id'], {}).get(user_id)
+        if user is None:
+            return json_response({'message': 'Unknown Member', 'code': 10007}, status=404)
+        return json_response(dict(self._member(), user=user))
+
+    async def _get_roles(self, request: web.Request) -> web.Response:
+        return json_response(self._guild(request)['roles'])
+
+    async def _create_role(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        payload = await request.json()
+
+        for role in guild['roles']:
+            if role['position'] >= 1:
+                role['position'] += 1
+
+        role = {
+            'id': str(snowflake()), 'name': payload.get('name', 'new role'), 'permissions': str(payload.get('permissions', 0)),
+            'position': 1, 'colors': payload.get('colors', {'primary_color': 0}), 'hoist': payload.get('hoist', False),
+            'managed': False, 'mentionable': payload.get('mentionable', False), 'flags': 0,
+        }
+        guild['roles'].append(role)
+
+        await self._dispatch('GUILD_ROLE_CREATE', {'guild_id': guild['id'], 'role': role})
+        return json_response(role)
+
+    async def _move_roles(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        positions = {str(entry['id']): entry['position'] for entry in await request.json()}
+
+        for role in guild['roles']:
+            if role['id'] in positions:
+                role['position'] = positions[role['id']]
+                await self._dispatch('GUILD_ROLE_UPDATE', {'guild_id': guild['id'], 'role': role})
+
+        return json_response(guild['roles'])
+
+    async def _edit_role(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        payload = await request.json()
+
+        for role in guild['roles']:
+            if role['id'] == request.match_info['role_id']:
+                role.update({key: str(value) if key == 'permissions' else value for key, value in payload.items()})
+                await self._dispatch('GUILD_ROLE_UPDATE', {'guild_id': guild['id'], 'role': role})
+                return json_response(role)
+
+        return json_response({'message': 'Unknown Role', 'code': 10011}, status=404)
+
+    async def _delete_role(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        role_id = request.match_info['role_id']
+        guild['roles'] = [role for role in guild['roles'] if role['id'] != role_id]
+
+        await self._dispatch('GUILD_ROLE_DELETE', {'guild_id': guild['id'], 'role_id': role_id})
+        return web.Response(status=204)
+
+    async def _get_channels(self, request: web.Request) -> web.Response:
+        return json_response(self._guild(request)['channels'])
+
+    async def _create_channel(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        payload = await request.json()
+        overwrites = payload.get('permission_overwrites') or []
+        parent_id = str(payload['parent_id']) if payload.get('parent_id') else None
+
+        if not overwrites and parent_id:
+            parent = next((item for item in guild['channels'] if item['id'] == parent_id), None)
+            overwrites = parent['permission_overwrites'] if parent else []
+
+        channel = {
+            'id': str(snowflake()), 'type': payload.get('type', TEXT), 'name': payload['name'],
+            'position': payload.get('position', len(guild['channels'])), 'parent_id': parent_id,
+            'permission_overwrites': [
+                {'id': str(entry['id']), 'type': entry['type'], 'allow': str(entry['allow']), 'deny': str(entry['deny'])}
+                for entry in overwrites
+            ],
+        }
+        for field in ('topic', 'nsfw', 'rate_limit_per_user', 'bitrate', 'user_limit'):
+            if field in payload:
+                channel[field] = payload[field]
+        guild['channels'].append(channel)
+
+        await self._dispatch('CHANNEL_CREATE', dict(channel, guild_id=guild['id']))
+        return json_response(dict(channel, guild_id=guild['id']))
+
+    async def _move_channels(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        updates = {str(entry['id']): entry for entry in await request.json()}
+
+        for channel in guild['channels']:
+            entry = updates.get(channel['id'])
+            if entry is None:
+                continue
+            channel['position'] = entry.get('position', channel['position'])
+            if 'parent_id' in entry:
+                channel['parent_id'] = str(entry['parent_id']) if entry['parent_id'] else None
+            await self._dispatch('CHANNEL_UPDATE', dict(channel, guild_id=guild['id']))
+
+        return web.Response(status=204)
+
+    async def _edit_channel(self, request: web.Request) -> web.Response:
+        guild, channel = self._channel(request)
+        payload = await request.json()
+
+        for key, value in payload.items():
+            if key == 'parent_id':
+                value = str(value) if value else None
+            elif key == 'permission_overwrites':
+                value = [{'id': str(entry['id']), 'type': entry['type'], 'allow': str(entry['allow']),
+                          'deny': str(entry['deny'])} for entry in value]
+            channel[key] = value
+
+        await self._dispatch('CHANNEL_UPDATE', dict(channel, guild_id=guild['id']))
+        return json_response(dict(channel, guild_id=guild['id']))
+
+    async def _delete_channel(self, request: web.Request) -> web.Response:
+        guild, channel = self._channel(request)
+        guild['channels'].remove(channel)
+
+        await self._dispatch('CHANNEL_DELETE', dict(channel, guild_id=guild['id']))
+        return json_response(dict(channel, guild_id=guild['id']))
+
+    async def _edit_permissions(self, request: web.Request) -> web.Response:
+        guild, channel = self._channel(request)
+        payload = await request.json()
+        target_id = request.match_info['target_id']
+
+        channel['permission_overwrites'] = [entry for entry in channel['permission_overwrites'] if entry['id'] != target_id]
+        channel['permission_overwrites'].append({
+            'id': target_id, 'type': payload.get('type', 0),
+            'allow': str(payload.get('allow', 0)), 'deny': str(payload.get('deny', 0)),
+        })
+
+        await self._dispatch('CHANNEL_UPDATE', dict(channel, guild_id=guild['id']))
+        return web.Response(status=204)
+
+    async def _delete_permissions(self, request: web.Request) -> web.Response:
+        guild, channel = self._channel(request)
+        target_id = request.match_info['target_id']
+        channel['permission_overwrites'] = [entry for entry in channel['permission_overwrites'] if entry['id'] != target_id]
+
+        await self._dispatch('CHANNEL_UPDATE', dict(channel, guild_id=guild['id']))
+        return web.Response(status=204)
+
+    async def _get_emojis(self, request: web.Request) -> web.Response:
+        return json_response(self._guild(request)['emojis'])
+
+    async def _create_emoji(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        payload = await request.json()
+        image = base64.b64decode(payload['image'].split(',', 1)[1])
+
+        if len(image) > EMOJI_MAX_BYTES:
+            return json_response({'message': 'File cannot be larger than 256.0 kb.', 'code': 50045}, status=400)
+
+        emoji = {
+            'id': str(snowflake()), 'name': payload['name'], 'animated': payload['image'].startswith('data:image/gif'),
+            'roles': payload.get('roles', []), 'require_colons': True, 'managed': False, 'available': True,
+        }
+        self.images[emoji['id']] = image
+        guild['emojis'].append(emoji)
+
+        await self._dispatch('GUILD_EMOJIS_UPDATE', {'guild_id': guild['id'], 'emojis': guild['emojis']})
+        return json_response(emoji, status=201)
+
+    async def _delete_emoji(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        emoji_id = request.match_info['emoji_id']
+        guild['emojis'] = [emoji for emoji in guild['emojis'] if emoji['id'] != emoji_id]
+
+        await self._dispatch('GUILD_EMOJIS_UPDATE', {'guild_id': guild['id'], 'emojis': guild['emojis']})
+        return web.Response(status=204)
+
+
+def use_mock(base_url: str) -> None:
+    import discord
+    import yarl
+
+    async def offline(*args, **kwargs):
+        raise RuntimeError("Offline benchmark")
+
+    discord.http.Route.BASE = f"{base_url}/api/v9"
+    discord.asset.Asset.BASE = base_url
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f"{base_url.replace('http', 'ws', 1)}/gateway")
+    for name in ('get_api_properties', '_get_build_number', '_get_browser_version'):
+        setattr(discord.utils.Headers, name, staticmethod(offline))
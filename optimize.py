@@ -0,0 +1,171 @@
+from collections import Counter, defaultdict
+from typing import Optional, List, Dict, Any, Callable
+
+from plan import Operation
+from spec import Spec, GuildSpec
+from sync import ROLE_FIELDS, CHANNEL_FIELDS, match_by_key, changed_fields, overwrites_differ, in_order
+
+REUSE_KINDS = ('role', 'category', 'channel')
+REUSE_KEYS: Dict[str, Callable[[Spec], Any]] = {
+    'role': lambda r: r.name,
+    'category': lambda c: c.name,
+    'channel': lambda c: (c.name, c.type),
+}
+
+
+class PlanOptimizer:
+    def __init__(self, source: GuildSpec, target: GuildSpec, known: Optional[Dict[str, Dict[int, int]]] = None):
+        self.source = source
+        self.target = target
+        self.known = {kind: dict((known or {}).get(kind, {})) for kind in REUSE_KINDS}
+        self.reused: Dict[str, Dict[int, int]] = {kind: {} for kind in REUSE_KINDS}
+        self.saved: Counter = Counter()
+
+    @property
+    def calls_saved(self) -> int:
+        return sum(self.saved.values())
+
+    def optimize(self, plan: List[Operation]) -> List[Operation]:
+        plan = self._merge_duplicates(plan)
+        plan = self._drop_unchanged(plan)
+        plan = self._fold_edits(plan)
+        plan = self._reuse_deleted(plan)
+        return self._skip_moves(plan)
+
+    def _merge_duplicates(self, plan: List[Operation]) -> List[Operation]:
+        result: List[Operation] = []
+        index: Dict[str, int] = {}
+
+        for op in plan:
+            first = index.get(op.op_id)
+            if first is None:
+                index[op.op_id] = len(result)
+                result.append(op)
+                continue
+
+            kept = result[first]
+            result[first] = Operation(kept.action, kept.kind, kept.name, op.source or kept.source, kept.target_id,
+                                      {**kept.changes, **op.changes}, kept.parent_id)
+            self.saved['merged'] += 1
+
+        return result
+
+    def _drop_unchanged(self, plan: List[Operation]) -> List[Operation]:
+        result = []
+        for op in plan:
+            if op.action == 'edit' and op.kind == 'settings' and op.changes.get('name') == self.target.settings.name:
+                changes = {field: value for field, value in op.changes.items() if field != 'name'}
+                if not changes:
+                    self.saved['unchanged'] += 1
+                    continue
+                op = Operation(op.action, op.kind, op.name, op.source, op.target_id, changes, op.parent_id)
+            result.append(op)
+        return result
+
+    def _fold_edits(self, plan: List[Operation]) -> List[Operation]:
+        creates = {(op.kind, op.source.id): index for index, op in enumerate(plan)
+                   if op.action == 'create' and op.source is not None}
+        result = list(plan)
+        folded = set()
+
+        for index, op in enumerate(plan):
+            if op.action != 'edit' or (op.kind, getattr(op.source, 'id', None)) not in creates:
+                continue
+            create = result[creates[(op.kind, op.source.id)]]
+            if any(field not in create.source.__slots__ for field in op.changes):
+                continue
+            if 'overwrites' in op.changes and op.changes['overwrites'] != create.source.overwrites:
+                continue
+
+            source = create.source.replace(**op.changes)
+            result[creates[(op.kind, op.source.id)]] = Operation('create', create.kind, source.name, source)
+            folded.add(index)
+            self.saved['folded'] += 1
+
+        return [op for index, op in enumerate(result) if index not in folded]
+
+    def _edit_for(self, kind: str, item: Spec, current: Spec, deleted_roles: set) -> Dict[str, Any]:
+        if kind == 'role':
+            return changed_fields(item, current, ('name',) + ROLE_FIELDS)
+
+        fields = ('name',) + (CHANNEL_FIELDS.get(item.type, ()) if kind == 'channel' else ())
+        changes = changed_fields(item, current, fields)
+        roles = {role.id: role for role in self.target.roles}
+        role_matches = {source_id: roles[target_id] for source_id, target_id in
+                        {**self.known['role'], **self.reused['role']}.items() if target_id in roles}
+        if overwrites_differ(item, current, self.source.id, self.target.id, role_matches, deleted_roles):
+            changes['overwrites'] = item.overwrites
+        return changes
+
+    def _reuse_deleted(self, plan: List[Operation]) -> List[Operation]:
+        targets = {
+            'role': {role.id: role for role in self.target.roles},
+            'category': {category.id: category for category in self.target.categories},
+            'channel': {channel.id: channel for channel in self.target.channels},
+        }
+        matches: Dict[str, Dict[int, Spec]] = {}
+        for kind in REUSE_KINDS:
+            creates = [op.source for op in plan if op.action == 'create' and op.kind == kind]
+            deletes = [targets[kind][op.target_id] for op in plan
+                       if op.action == 'delete' and op.kind == kind and op.target_id in targets[kind]]
+            matches[kind], _, _ = match_by_key(creates, deletes, REUSE_KEYS[kind])
+            self.reused[kind] = {source_id: item.id for source_id, item in matches[kind].items()}
+
+        reused_targets = {item.id for kind_matches in matches.values() for item in kind_matches.values()}
+        deleted_roles = {op.target_id for op in plan
+                         if op.action == 'delete' and op.kind == 'role' and op.target_id not in reused_targets}
+
+        result = []
+        for op in plan:
+            if op.action == 'delete' and op.target_id in reused_targets and op.kind in REUSE_KINDS:
+                continue
+            if op.action == 'create' and op.kind in REUSE_KINDS and op.source.id in matches[op.kind]:
+                current = matches[op.kind][op.source.id]
+                changes = self._edit_for(op.kind, op.source, current, deleted_roles)
+                if changes:
+                    result.append(Operation('edit', op.kind, op.name, op.source, current.id, changes))
+                self.saved['reused'] += 1 if changes else 2
+                continue
+            result.append(op)
+        return result
+
+    def _roles_in_order(self) -> bool:
+        positions = {role.id: role.position for role in self.target.roles}
+        mapping = {**self.known['role'], **self.reused['role']}
+        return in_order([mapping[role.id] for role in sorted(self.source.roles, key=lambda r: r.position)
+                         if mapping.get(role.id) in positions], positions)
+
+    def _layout_in_order(self) -> bool:
+        positions = {item.id: item.position for item in self.target.categories + self.target.channels}
+        parents = {channel.id: channel.category_id for channel in self.target.channels}
+        categories = {**self.known['category'], **self.reused['category']}
+        channels = {**self.known['channel'], **self.reused['channel']}
+
+        ordered = [categories[c.id] for c in sorted(self.source.categories, key=lambda c: c.position)
+                   if categories.get(c.id) in positions]
+        if not in_order(ordered, positions):
+            return False
+
+        groups = defaultdict(list)
+        for channel in sorted(self.source.channels, key=lambda c: c.position):
+            target_id = channels.get(channel.id)
+            if target_id not in positions:
+                continue
+            parent = categories.get(channel.category_id) if channel.category_id is not None else None
+            if (channel.category_id is not None and parent is None) or parents[target_id] != parent:
+                return False
+            groups[(channel.category_id, channel.type == 'text')].append(target_id)
+        return all(in_order(ids, positions) for ids in groups.values())
+
+    def _skip_moves(self, plan: List[Operation]) -> List[Operation]:
+        created = {op.kind for op in plan if op.action == 'create'}
+        skip = set()
+        if self.reused['role'] and 'role' not in created and self._roles_in_order():
+            skip.add('move:role')
+        if (self.reused['category'] or self.reused['channel']) and not created & {'category', 'channel'} \
+                and self._layout_in_order():
+            skip.add('move:channel')
+
+        self.saved['moves'] += sum(1 for op in plan if op.op_id in skip)
+        return [op for op in plan if op.op_id not in skip]
+
@@ -0,0 +1,100 @@
+from typing import Optional, List, Dict, Any, Tuple, Set, Callable, Union
+
+import discord
+
+from spec import OverwriteSpec, CategorySpec, ChannelSpec, GuildSpec
+
+OverwriteEntry = Tuple[str, int, int, int]
+OverwriteSet = Tuple[OverwriteEntry, ...]
+
+
+def overwrite_set(overwrites: Tuple[OverwriteSpec, ...]) -> OverwriteSet:
+    return tuple(sorted((entry.type, entry.id, entry.allow, entry.deny) for entry in overwrites))
+
+
+def overwrite_payload(overwrites: Dict[Any, discord.PermissionOverwrite]) -> List[Dict[str, Any]]:
+    payload = []
+    for target, overwrite in overwrites.items():
+        allow, deny = overwrite.pair()
+        payload.append({
+            'id': target.id,
+            'type': 0 if isinstance(target, discord.Role) else 1,
+            'allow': str(allow.value),
+            'deny': str(deny.value),
+        })
+    return payload
+
+
+class OverwriteModel:
+    def __init__(self, source: GuildSpec):
+        self.source = source
+        self.source_guild_id = source.id
+        self._interned: Dict[OverwriteSet, OverwriteSet] = {}
+        self.sets: Dict[int, OverwriteSet] = {}
+        self.synced: Set[int] = set()
+
+        for item in source.categories + source.channels:
+            self.sets[item.id] = self.intern(item.overwrites)
+
+        for channel in source.channels:
+            parent = channel.category_id
+            if parent in self.sets and self.sets[parent] is self.sets[channel.id]:
+                self.synced.add(channel.id)
+
+    def __len__(self) -> int:
+        return len(self._interned)
+
+    def intern(self, overwrites: Tuple[OverwriteSpec, ...]) -> OverwriteSet:
+        key = overwrite_set(overwrites)
+        return self._interned.setdefault(key, key)
+
+    def member_ids(self) -> List[int]:
+        return sorted({object_id for key in self._interned for kind, object_id, _, _ in key if kind == 'member'})
+
+    def set_for(self, item: Union[CategorySpec, ChannelSpec]) -> OverwriteSet:
+        key = self.sets.get(item.id)
+        if key is None:
+            key = self.intern(item.overwrites)
+        return key
+
+
+class OverwriteTranslator:
+    def __init__(self, model: OverwriteModel, default_role: discord.Role,
+                 get_member: Callable[[int], Optional[discord.Member]]):
+        self.model = model
+        self.default_role = default_role
+        self.get_member = get_member
+        self._pairs: Dict[Tuple[int, int], discord.PermissionOverwrite] = {}
+        self._translated: Dict[OverwriteSet, Dict[Any, discord.PermissionOverwrite]] = {}
+
+    def _overwrite(self, allow: int, deny: int) -> discord.PermissionOverwrite:
+        overwrite = self._pairs.get((allow, deny))
+        if overwrite is None:
+            overwrite = discord.PermissionOverwrite.from_pair(discord.Permissions(allow), discord.Permissions(deny))
+            self._pairs[(allow, deny)] = overwrite
+        return overwrite
+
+    def translate(self, key: OverwriteSet,
+                  role_mapping: Dict[int, discord.Role]) -> Dict[Any, discord.PermissionOverwrite]:
+        translated = self._translated.get(key)
+        if translated is not None:
+            return translated
+
+        translated = {}
+        complete = True
+        for kind, object_id, allow, deny in key:
+            if kind == 'role':
+                if object_id in role_mapping:
+                    translated[role_mapping[object_id]] = self._overwrite(allow, deny)
+                elif object_id == self.model.source_guild_id:
+                    translated[self.default_role] = self._overwrite(allow, deny)
+                else:
+                    complete = False
+            else:
+                member = self.get_member(object_id)
+                if member:
+                    translated[member] = self._overwrite(allow, deny)
+
+        if complete:
+            self._translated[key] = translated
+        return translated
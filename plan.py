@@ -0,0 +1,193 @@
+from collections import Counter, defaultdict
+from typing import Optional, List, Dict, Any, Tuple, Iterable
+
+from spec import Spec, SettingsSpec, GuildSpec
+
+ACTIONS = ('delete', 'create', 'edit', 'move')
+KINDS = ('role', 'category', 'channel', 'emoji', 'settings')
+BACKGROUND_KINDS = ('emoji', 'settings')
+
+
+class Operation:
+    __slots__ = ('action', 'kind', 'name', 'source', 'target_id', 'changes', 'parent_id')
+
+    def __init__(self, action: str, kind: str, name: str, source: Optional[Spec] = None,
+                 target_id: Optional[int] = None, changes: Optional[Dict[str, Any]] = None,
+                 parent_id: Optional[int] = None):
+        self.action = action
+        self.kind = kind
+        self.name = name
+        self.source = source
+        self.target_id = target_id
+        self.changes = changes or {}
+        self.parent_id = parent_id
+
+    @property
+    def op_id(self) -> str:
+        if self.action == 'move' or self.kind == 'settings':
+            return f"{self.action}:{self.kind}"
+        if self.source is not None:
+            return f"{self.action}:{self.kind}:{self.source.id}"
+        return f"{self.action}:{self.kind}:target:{self.target_id}"
+
+    def __repr__(self) -> str:
+        return f"<Operation {self.op_id} {self.name!r}>"
+
+
+def is_background(op: Operation) -> bool:
+    return op.kind in BACKGROUND_KINDS
+
+
+def summarize_plan(plan: List[Operation]) -> Dict[str, int]:
+    counts = Counter(op.action for op in plan)
+    return {action: counts.get(action, 0) for action in ACTIONS}
+
+
+def has_asset(settings: SettingsSpec, field: str) -> bool:
+    return bool(getattr(settings, field) or getattr(settings, f"{field}_url"))
+
+
+def build_clean_plan(target: GuildSpec, top_role_position: Optional[int] = None,
+                     keep: Iterable[int] = ()) -> List[Operation]:
+    keep = set(keep)
+    plan: List[Operation] = []
+
+    for channel in target.channels:
+        if channel.id not in keep:
+            plan.append(Operation('delete', 'channel', channel.name, target_id=channel.id,
+                                  parent_id=channel.category_id))
+    for category in target.categories:
+        if category.id not in keep:
+            plan.append(Operation('delete', 'category', category.name, target_id=category.id))
+    for role in sorted(target.roles, key=lambda r: r.position, reverse=True):
+        if role.id in keep or role.managed:
+            continue
+        if top_role_position is not None and role.position >= top_role_position:
+            continue
+        plan.append(Operation('delete', 'role', role.name, target_id=role.id))
+    for emoji in target.emojis:
+        if emoji.id not in keep and not emoji.managed:
+            plan.append(Operation('delete', 'emoji', emoji.name, target_id=emoji.id))
+
+    return plan
+
+
+def build_clone_plan(source: GuildSpec, target: GuildSpec, clone_icon: bool = True) -> List[Operation]:
+    plan: List[Operation] = []
+
+    roles = sorted(source.roles, key=lambda r: r.position)
+    for role in roles:
+        plan.append(Operation('create', 'role', role.name, role))
+    if roles:
+        plan.append(Operation('move', 'role', 'role hierarchy'))
+
+    categories = sorted(source.categories, key=lambda c: c.position)
+    channels = sorted(source.channels, key=lambda c: c.position)
+    for category in categories:
+        plan.append(Operation('create', 'category', category.name, category))
+    for channel in channels:
+        plan.append(Operation('create', 'channel', channel.name, channel))
+    if categories or channels:
+        plan.append(Operation('move', 'channel', 'channel layout'))
+
+    for emoji in source.emojis:
+        plan.append(Operation('create', 'emoji', emoji.name, emoji))
+
+    settings = source.settings
+    changes = {}
+    if settings.name != target.settings.name:
+        changes['name'] = f"{settings.name} (Clone)"
+    if clone_icon and has_asset(settings, 'icon'):
+        changes['icon'] = settings.icon
+    if has_asset(settings, 'banner'):
+        changes['banner'] = settings.banner
+    if changes:
+        plan.append(Operation('edit', 'settings', 'server settings', settings, target.id, changes))
+
+    return plan
+
+
+def operation_route(op: Operation, guild_id: int) -> Tuple[str, str]:
+    if op.action == 'move':
+        return 'PATCH', f"/guilds/{guild_id}/{op.kind}s"
+    if op.kind == 'settings':
+        return 'PATCH', f"/guilds/{guild_id}"
+
+    collection = 'channels' if op.kind in ('category', 'channel') else f"{op.kind}s"
+    method = {'create': 'POST', 'edit': 'PATCH', 'delete': 'DELETE'}[op.action]
+
+    if op.action == 'create':
+        return method, f"/guilds/{guild_id}/{collection}"
+    if collection == 'channels':
+        return method, f"/channels/{op.target_id}"
+    return method, f"/guilds/{guild_id}/{collection}/{op.target_id}"
+
+
+def _referenced_roles(op: Operation) -> List[int]:
+    overwrites = op.changes.get('overwrites') if op.action == 'edit' else getattr(op.source, 'overwrites', None)
+    return [entry.id for entry in overwrites or () if entry.type == 'role']
+
+
+def operation_dependencies(plan: List[Operation]) -> Dict[str, List[str]]:
+    by_key = defaultdict(list)
+    role_creates = {}
+    category_creates = {}
+    child_deletes = defaultdict(list)
+
+    for op in plan:
+        by_key[(op.action, op.kind)].append(op.op_id)
+        if op.action == 'delete' and op.kind == 'channel' and op.parent_id is not None:
+            child_deletes[op.parent_id].append(op.op_id)
+        if op.action == 'create' and op.kind == 'role':
+            role_creates[op.source.id] = op.op_id
+        if op.action == 'create' and op.kind == 'category':
+            category_creates[op.source.id] = op.op_id
+
+    channel_deletes = by_key[('delete', 'channel')] + by_key[('delete', 'category')]
+    dependencies = {}
+
+    for op in plan:
+        deps: List[str] = []
+
+        if op.action == 'delete' and op.kind == 'category':
+            deps += child_deletes[op.target_id]
+
+        elif op.action == 'create' and op.kind == 'role':
+            deps += by_key[('delete', 'role')]
+
+        elif op.action == 'create' and op.kind == 'emoji':
+            deps += by_key[('delete', 'emoji')]
+
+        elif op.kind in ('category', 'channel') and op.action in ('create', 'edit'):
+            if op.action == 'create':
+                deps += channel_deletes
+                parent = getattr(op.source, 'category_id', None)
+                if parent in category_creates:
+                    deps.append(category_creates[parent])
+            deps += [role_creates[role_id] for role_id in _referenced_roles(op) if role_id in role_creates]
+
+        elif op.action == 'move' and op.kind == 'role':
+            deps += by_key[('create', 'role')] + by_key[('delete', 'role')]
+
+        elif op.action == 'move' and op.kind == 'channel':
+            deps += by_key[('create', 'category')] + by_key[('create', 'channel')] + channel_deletes
+
+        dependencies[op.op_id] = deps
+
+    return dependencies
+
+
+def operation_assets(plan: List[Operation]) -> List[Tuple[str, str]]:
+    assets = []
+
+    for op in plan:
+        if op.kind == 'settings':
+            for field in ('icon', 'banner'):
+                if field in op.changes and op.changes[field] is None and getattr(op.source, f"{field}_url"):
+                    assets.append((field, getattr(op.source, f"{field}_url")))
+
+    for op in plan:
+        if op.action == 'create' and op.kind == 'emoji' and op.source.image is None and op.source.url:
+            assets.append((f"emoji:{op.source.id}", op.source.url))
+
+    return assets
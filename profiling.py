@@ -0,0 +1,96 @@
+import asyncio
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+from typing import Optional, List
+
+from metrics import RunMetrics
+
+LAG_INTERVAL = 0.05
+TRACE_LIMIT = 40
+
+
+class LoopLagMonitor:
+    def __init__(self, metrics: RunMetrics, interval: float = LAG_INTERVAL):
+        self.metrics = metrics
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _watch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.metrics.on_loop_lag(max(0.0, loop.time() - expected))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+
+class RunProfiler:
+    def __init__(self, metrics: RunMetrics, trace: bool = False, interval: float = LAG_INTERVAL):
+        self.metrics = metrics
+        self.monitor = LoopLagMonitor(metrics, interval)
+        self.trace = cProfile.Profile() if trace else None
+
+    def start(self) -> None:
+        self.monitor.start()
+        if self.trace is not None:
+            self.trace.enable()
+
+    async def stop(self) -> None:
+        if self.trace is not None:
+            self.trace.disable()
+        await self.monitor.stop()
+
+    def summary(self) -> List[str]:
+        lines = []
+        for name, stats in self.metrics.phases.items():
+            line = f"{name}: {stats.seconds:.2f}s wall"
+            if stats.finished is not None and stats.cpu is not None:
+                line += f", {stats.cpu:.2f}s CPU, {stats.awaited:.2f}s awaiting"
+            elif stats.finished is not None:
+                line += ", CPU not measured (ran alongside other phases)"
+            if stats.lag is not None:
+                lag = stats.lag.summary()
+                line += f", loop lag mean {lag['mean'] * 1000:.1f}ms, max {lag['max'] * 1000:.1f}ms"
+            lines.append(line)
+
+        if self.metrics.loop_lag is not None:
+            lag = self.metrics.loop_lag.summary()
+            lines.append(f"Event loop lag over {lag['samples']} samples: mean {lag['mean'] * 1000:.1f}ms, "
+                         f"p99 {lag['p99'] * 1000:.1f}ms, max {lag['max'] * 1000:.1f}ms")
+        return lines
+
+    def write(self, directory: str, name: str) -> List[str]:
+        os.makedirs(directory, exist_ok=True)
+        base = self.metrics.base_path(directory, name)
+        paths = []
+
+        text = io.StringIO()
+        text.write('\n'.join(self.summary()) + '\n')
+        if self.trace is not None:
+            self.trace.dump_stats(f"{base}.prof")
+            paths.append(f"{base}.prof")
+
+            text.write('\n')
+            stats = pstats.Stats(self.trace, stream=text)
+            stats.sort_stats('cumulative').print_stats(TRACE_LIMIT)
+            stats.sort_stats('tottime').print_stats(TRACE_LIMIT)
+
+        with open(f"{base}.profile.txt", 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
+        paths.append(f"{base}.profile.txt")
+
+        return paths
@@ -0,0 +1,197 @@
+import asyncio
+import re
+import time
+from typing import Optional, List, Dict, Tuple, Mapping, Any
+from urllib.parse import urlsplit
+
+API_PREFIX = re.compile(r'^/api/v\d+')
+SNOWFLAKE = re.compile(r'^\d{15,21}$')
+MAJOR_RESOURCES = ('guilds', 'channels', 'webhooks')
+RETRY_STATUSES = (500, 502, 503, 504, 507, 520, 522, 523, 524)
+
+
+class AmbiguousResponse(ConnectionError):
+    def __init__(self, method: str, url: str, status: int):
+        super().__init__(f"{method} {url} failed with status {status}, the request may have been applied")
+        self.status = status
+
+
+def split_route(method: str, path: str) -> Tuple[str, str]:
+    path = API_PREFIX.sub('', urlsplit(path).path)
+    parts = path.strip('/').split('/')
+    major = ''
+    normalized = []
+
+    for index, part in enumerate(parts):
+        if index == 1 and parts[0] in MAJOR_RESOURCES:
+            major = part
+            normalized.append('{major}')
+        elif SNOWFLAKE.match(part):
+            normalized.append('{id}')
+        else:
+            normalized.append(part)
+
+    return f"{method.upper()} /{'/'.join(normalized)}", major
+
+
+def _parse_headers(headers: Mapping[str, Any]) -> Dict[str, str]:
+    return {str(key).lower(): str(value) for key, value in headers.items()}
+
+
+class RouteBucket:
+    __slots__ = ('limit', 'remaining', 'reset_at', 'blocked_until', 'min_interval', 'last_sent', 'lock')
+
+    def __init__(self, min_interval: float = 0.0):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.blocked_until = 0.0
+        self.min_interval = min_interval
+        self.last_sent: Optional[float] = None
+        self.lock = asyncio.Lock()
+
+    def delay(self, now: float) -> float:
+        if self.reset_at is not None and now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = None
+
+        wait = self.blocked_until - now
+
+        if self.remaining is not None and self.remaining <= 0 and self.reset_at is not None:
+            wait = max(wait, self.reset_at - now)
+
+        if self.min_interval and self.last_sent is not None:
+            wait = max(wait, self.last_sent + self.min_interval - now)
+
+        return max(wait, 0.0)
+
+
+class RateLimitScheduler:
+    def __init__(self):
+        self._buckets: Dict[str, RouteBucket] = {}
+        self._hashes: Dict[str, str] = {}
+        self._min_intervals: Dict[str, float] = {}
+        self._global_until = 0.0
+        self.requests = 0
+        self.rate_limited = 0
+        self.waited = 0.0
+        self.listeners: List[Any] = []
+
+    def set_min_interval(self, method: str, template: str, interval: Optional[float]) -> None:
+        if not interval or interval <= 0:
+            return
+
+        route, _ = split_route(method, template)
+        self._min_intervals[route] = float(interval)
+
+        for key, bucket in self._buckets.items():
+            if key.startswith(f"{route}:"):
+                bucket.min_interval = float(interval)
+
+    @property
+    def min_intervals(self) -> Dict[str, float]:
+        return dict(self._min_intervals)
+
+    def _bucket_key(self, route: str, major: str) -> str:
+        bucket_hash = self._hashes.get(route)
+        if bucket_hash:
+            return f"{bucket_hash}:{major}"
+        return f"{route}:{major}"
+
+    def _bucket(self, method: str, path: str) -> RouteBucket:
+        route, major = split_route(method, path)
+        key = self._bucket_key(route, major)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets.get(f"{route}:{major}")
+            if bucket is None:
+                bucket = RouteBucket(self._min_intervals.get(route, 0.0))
+            self._buckets[key] = bucket
+
+        return bucket
+
+    async def acquire(self, method: str, path: str) -> None:
+        loop = asyncio.get_running_loop()
+        bucket = self._bucket(method, path)
+        started = loop.time()
+
+        async with bucket.lock:
+            while True:
+                now = loop.time()
+                wait = max(bucket.delay(now), self._global_until - now)
+                if wait <= 0:
+                    break
+                self.waited += wait
+                await asyncio.sleep(wait)
+
+            if bucket.remaining is not None:
+                bucket.remaining -= 1
+            bucket.last_sent = loop.time()
+            self.requests += 1
+
+        if self.listeners:
+            route, _ = split_route(method, path)
+            for listener in self.listeners:
+                listener.on_acquire(route, bucket.last_sent - started)
+
+    def observe(self, method: str, url: str, status: int, headers: Mapping[str, Any]) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        values = _parse_headers(headers)
+        route, _ = split_route(method, url)
+
+        bucket_hash = values.get('x-ratelimit-bucket')
+        if bucket_hash:
+            self._hashes[route] = bucket_hash
+
+        bucket = self._bucket(method, url)
+
+        try:
+            if 'x-ratelimit-limit' in values:
+                bucket.limit = int(values['x-ratelimit-limit'])
+            if 'x-ratelimit-remaining' in values:
+                bucket.remaining = int(values['x-ratelimit-remaining'])
+            if 'x-ratelimit-reset-after' in values:
+                bucket.reset_at = now + float(values['x-ratelimit-reset-after'])
+        except ValueError:
+            pass
+
+        if status != 429:
+            return
+
+        self.rate_limited += 1
+
+        try:
+            retry_after = float(values.get('retry-after', '1'))
+        except ValueError:
+            retry_after = 1.0
+
+        if values.get('x-ratelimit-global', '').lower() == 'true' or values.get('x-ratelimit-scope') == 'global':
+            self._global_until = max(self._global_until, now + retry_after)
+        else:
+            bucket.blocked_until = max(bucket.blocked_until, now + retry_after)
+
+    def install(self, http) -> bool:
+        session = getattr(http, '_HTTPClient__session', None)
+        if not session:
+            return False
+
+        original_request = session.request
+
+        async def request(method, url, *args, **kwargs):
+            started = time.perf_counter()
+            response = await original_request(method, url, *args, **kwargs)
+            status = getattr(response, 'status_code', None) or getattr(response, 'status', 0)
+            self.observe(method, url, status, response.headers)
+
+            if self.listeners:
+                route, _ = split_route(method, url)
+                for listener in self.listeners:
+                    listener.on_response(route, status, time.perf_counter() - started)
+            if method.upper() == 'POST' and status in RETRY_STATUSES:
+                raise AmbiguousResponse(method.upper(), url, status)
+            return response
+
+        session.request = request
+        return True
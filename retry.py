@@ -0,0 +1,50 @@
+import asyncio
+import random
+from typing import Optional, Any, Callable, Awaitable
+
+import aiohttp
+import discord
+
+from ratelimit import RETRY_STATUSES
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, discord.HTTPException):
+        return error.status in RETRY_STATUSES
+    if isinstance(error, discord.DiscordException):
+        return False
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError, ConnectionError, OSError)) or \
+        type(error).__module__.startswith('curl_cffi')
+
+
+class RetryPolicy:
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retried = 0
+        self.adopted = 0
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def run(self, action: Callable[[], Awaitable[Any]],
+                  reconcile: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        attempt = 0
+
+        while True:
+            try:
+                return await action()
+            except Exception as e:
+                attempt += 1
+                if attempt >= self.attempts or not is_transient(e):
+                    raise
+
+            self.retried += 1
+            await asyncio.sleep(self.delay(attempt))
+
+            if reconcile is not None:
+                found = await reconcile()
+                if found is not None:
+                    self.adopted += 1
+                    return found
@@ -0,0 +1,200 @@
+from fnmatch import fnmatchcase
+from typing import Optional, List, Dict, Set, Tuple, Iterable
+
+from fingerprint import fingerprint_guild, unchanged_ids
+from plan import Operation, build_clean_plan
+from spec import Spec, RoleSpec, CategorySpec, ChannelSpec, EmojiSpec, GuildSpec
+from sync import GuildMatch, build_sync_plan
+
+SELECTOR_KINDS = ('category', 'type', 'name', 'id', 'role', 'emoji')
+CHANNEL_TYPES = ('text', 'voice', 'stage')
+
+
+class SelectionError(Exception):
+    pass
+
+
+class Selector:
+    __slots__ = ('kind', 'pattern')
+
+    def __init__(self, kind: str, pattern: str):
+        if kind not in SELECTOR_KINDS:
+            raise SelectionError(f"Unknown selector {kind}:{pattern} (use one of {', '.join(SELECTOR_KINDS)})")
+        if kind == 'type' and pattern not in CHANNEL_TYPES:
+            raise SelectionError(f"Unknown channel type {pattern} (use one of {', '.join(CHANNEL_TYPES)})")
+        if kind == 'id' and not pattern.isdigit():
+            raise SelectionError(f"Invalid ID {pattern}")
+        self.kind = kind
+        self.pattern = pattern
+
+    @classmethod
+    def parse(cls, text: str) -> 'Selector':
+        kind, separator, pattern = text.partition(':')
+        if not separator:
+            return cls('id' if text.isdigit() else 'name', text)
+        return cls(kind.strip().lower(), pattern.strip())
+
+    def _name(self, item: Spec) -> bool:
+        return fnmatchcase(item.name.lower(), self.pattern.lower())
+
+    def _id_or_name(self, item: Spec) -> bool:
+        return str(item.id) == self.pattern if self.pattern.isdigit() else self._name(item)
+
+    def category(self, category: CategorySpec) -> bool:
+        return (self.kind == 'category' and self._id_or_name(category)) or \
+            (self.kind == 'id' and str(category.id) == self.pattern)
+
+    def channel(self, channel: ChannelSpec) -> bool:
+        if self.kind == 'type':
+            return channel.type == self.pattern
+        if self.kind == 'name':
+            return self._name(channel)
+        return self.kind == 'id' and str(channel.id) == self.pattern
+
+    def role(self, role: RoleSpec) -> bool:
+        return (self.kind == 'role' and self._id_or_name(role)) or (self.kind == 'id' and str(role.id) == self.pattern)
+
+    def emoji(self, emoji: EmojiSpec) -> bool:
+        return (self.kind == 'emoji' and self._id_or_name(emoji)) or \
+            (self.kind == 'id' and str(emoji.id) == self.pattern)
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.pattern}"
+
+
+class Subset:
+    def __init__(self, spec: GuildSpec, selected: Set[int], exclude: Iterable[Selector] = ()):
+        self.spec = spec
+        self.selected = selected
+        self.exclude = list(exclude)
+
+    def target_view(self, target: GuildSpec) -> GuildSpec:
+        role_positions = {role.name: role.position for role in self.spec.roles}
+        roles = {}
+        for role in sorted(target.roles, key=lambda r: (r.position, r.id)):
+            if role.name in role_positions and not role.managed and role.name not in roles:
+                roles[role.name] = role.replace(position=role_positions[role.name])
+
+        category_names = {category.name for category in self.spec.categories}
+        categories = {}
+        for category in sorted(target.categories, key=lambda c: (c.position, c.id)):
+            if category.name in category_names and category.name not in categories:
+                categories[category.name] = category
+
+        selected_names = {category.name for category in self.spec.categories if category.id in self.selected}
+        parent_names = {category.id: category.name for category in self.spec.categories}
+        channel_keys = {(channel.name, channel.type, parent_names.get(channel.category_id))
+                        for channel in self.spec.channels}
+        target_parents = {category.id: category.name for category in categories.values()}
+
+        channels = []
+        for channel in target.channels:
+            parent = target_parents.get(channel.category_id)
+            if channel.category_id is not None and parent is None:
+                continue
+            if (channel.name, channel.type, parent) in channel_keys:
+                channels.append(channel)
+            elif parent in selected_names and not any(s.channel(channel) for s in self.exclude):
+                channels.append(channel)
+
+        emoji_names = {emoji.name for emoji in self.spec.emojis}
+        emojis = [emoji for emoji in target.emojis if emoji.name in emoji_names and not emoji.managed]
+
+        return target.replace(roles=tuple(roles.values()), categories=tuple(categories.values()),
+                              channels=tuple(channels), emojis=tuple(emojis))
+
+    def count(self) -> Dict[str, int]:
+        return {
+            'roles': len(self.spec.roles),
+            'categories': len(self.spec.categories),
+            'channels': len(self.spec.channels),
+            'emojis': len(self.spec.emojis),
+        }
+
+
+class Selection:
+    def __init__(self, include: Iterable[str] = (), exclude: Iterable[str] = ()):
+        self.include = [Selector.parse(text) for text in include]
+        self.exclude = [Selector.parse(text) for text in exclude]
+
+    def __bool__(self) -> bool:
+        return bool(self.include or self.exclude)
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        return {'include': [str(s) for s in self.include], 'exclude': [str(s) for s in self.exclude]}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, List[str]]]) -> 'Selection':
+        data = data or {}
+        return cls(data.get('include', ()), data.get('exclude', ()))
+
+    def _selected(self, selectors: List[Selector], source: GuildSpec) -> Tuple[Set[int], Set[int], Set[int], Set[int]]:
+        categories = {c.id for c in source.categories if any(s.category(c) for s in selectors)}
+        channels = {c.id for c in source.channels
+                    if c.category_id in categories or any(s.channel(c) for s in selectors)}
+        roles = {r.id for r in source.roles if any(s.role(r) for s in selectors)}
+        emojis = {e.id for e in source.emojis if any(s.emoji(e) for s in selectors)}
+        return categories, channels, roles, emojis
+
+    def subset(self, source: GuildSpec) -> Subset:
+        if self.include:
+            categories, channels, roles, emojis = self._selected(self.include, source)
+        else:
+            categories = {c.id for c in source.categories}
+            channels = {c.id for c in source.channels}
+            roles = {r.id for r in source.roles}
+            emojis = {e.id for e in source.emojis}
+
+        excluded = self._selected(self.exclude, source)
+        categories -= excluded[0]
+        channels -= excluded[1]
+        roles -= excluded[2]
+        emojis -= excluded[3]
+        selected = categories | channels | roles | emojis
+
+        parents = {c.category_id for c in source.channels if c.id in channels and c.category_id is not None}
+        kept_categories = [c for c in source.categories if c.id in categories | parents]
+        kept_channels = [c for c in source.channels if c.id in channels]
+
+        for item in kept_categories + kept_channels:
+            roles.update(entry.id for entry in item.overwrites if entry.type == 'role' and entry.id != source.id)
+
+        spec = source.replace(
+            roles=tuple(r for r in source.roles if r.id in roles),
+            categories=tuple(kept_categories),
+            channels=tuple(kept_channels),
+            emojis=tuple(e for e in source.emojis if e.id in emojis),
+        )
+        return Subset(spec, selected, self.exclude)
+
+
+def build_partial_plan(subset: Subset, target: GuildSpec, rebuild: bool,
+                       keep: Iterable[int] = ()) -> Tuple[List[Operation], GuildMatch]:
+    view = subset.target_view(target)
+    plan: List[Operation] = []
+    unchanged: Set[int] = set()
+
+    if rebuild:
+        keep = set(keep)
+        selected_names = {c.name for c in subset.spec.categories if c.id in subset.selected}
+        cleaned = view.replace(
+            roles=(),
+            categories=tuple(c for c in view.categories if c.name in selected_names and c.id not in keep),
+            channels=tuple(c for c in view.channels if c.id not in keep),
+            emojis=tuple(e for e in view.emojis if e.id not in keep),
+        )
+        plan += build_clean_plan(cleaned)
+
+        removed = {item.id for item in cleaned.categories + cleaned.channels + cleaned.emojis}
+        view = view.replace(
+            categories=tuple(c for c in view.categories if c.id not in removed),
+            channels=tuple(c for c in view.channels if c.id not in removed and c.category_id not in removed),
+            emojis=tuple(e for e in view.emojis if e.id not in removed),
+        )
+    else:
+        unchanged = unchanged_ids(fingerprint_guild(subset.spec), fingerprint_guild(view, include_managed=False))
+
+    match = GuildMatch(subset.spec, view)
+    plan += [op for op in build_sync_plan(subset.spec, view, False, match, unchanged)
+             if op.kind != 'settings' and not (op.action == 'move' and op.kind == 'role')]
+    return plan, match
@@ -0,0 +1,67 @@
+import base64
+import datetime
+import gzip
+import json
+from typing import Optional
+
+from spec import GuildSpec
+
+SNAPSHOT_FORMAT = 'rex-snapshot'
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _encode_bytes(data: Optional[bytes]) -> Optional[str]:
+    return base64.b64encode(data).decode('ascii') if data is not None else None
+
+
+def _decode_bytes(data: Optional[str]) -> Optional[bytes]:
+    return base64.b64decode(data) if data is not None else None
+
+
+def save_snapshot(snapshot: GuildSpec, path: str) -> None:
+    guild = snapshot.as_dict()
+    for emoji in guild['emojis']:
+        emoji['image'] = _encode_bytes(emoji['image'])
+    guild['settings']['icon'] = _encode_bytes(guild['settings']['icon'])
+    guild['settings']['banner'] = _encode_bytes(guild['settings']['banner'])
+
+    document = {
+        'format': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'guild': guild,
+    }
+
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(document, f, separators=(',', ':'))
+
+
+def load_snapshot(path: str) -> GuildSpec:
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            document = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise SnapshotError(f"Could not read snapshot {path}: {str(e)}")
+
+    if not isinstance(document, dict) or document.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"{path} is not a server snapshot")
+
+    if document.get('version') != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {document.get('version')} (expected {SNAPSHOT_VERSION})")
+
+    guild = document.get('guild')
+    if not isinstance(guild, dict):
+        raise SnapshotError(f"{path} is not a valid server snapshot: no server data")
+
+    try:
+        for emoji in guild['emojis']:
+            emoji['image'] = _decode_bytes(emoji.get('image'))
+        guild['settings']['icon'] = _decode_bytes(guild['settings'].get('icon'))
+        guild['settings']['banner'] = _decode_bytes(guild['settings'].get('banner'))
+        return GuildSpec.from_dict(guild)
+    except (KeyError, TypeError, AttributeError, ValueError) as e:
+        raise SnapshotError(f"{path} is not a valid server snapshot: {str(e)}")
@@ -0,0 +1,130 @@
+from typing import Optional, Dict, Any, Tuple
+
+
+class Spec:
+    __slots__ = ()
+
+    def _set(self, **values: Any) -> None:
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and other._values() == self._values()
+
+    def __hash__(self) -> int:
+        return hash((type(self).__name__,) + self._values())
+
+    def __reduce__(self):
+        return type(self), self._values()
+
+    def __repr__(self) -> str:
+        name = getattr(self, 'name', None)
+        return f"<{type(self).__name__} {getattr(self, 'id', '')} {name!r}>"
+
+    def replace(self, **changes: Any) -> 'Spec':
+        values = dict(zip(self.__slots__, self._values()))
+        values.update(changes)
+        return type(self)(**values)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: _plain(getattr(self, name)) for name in self.__slots__}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Spec):
+        return value.as_dict()
+    if isinstance(value, tuple):
+        return [_plain(item) for item in value]
+    return value
+
+
+class OverwriteSpec(Spec):
+    __slots__ = ('id', 'type', 'allow', 'deny')
+
+    def __init__(self, id: int, type: str, allow: int, deny: int):
+        self._set(id=id, type=type, allow=allow, deny=deny)
+
+    def __repr__(self) -> str:
+        return f"<OverwriteSpec {self.type} {self.id} +{self.allow} -{self.deny}>"
+
+
+class RoleSpec(Spec):
+    __slots__ = ('id', 'name', 'permissions', 'color', 'hoist', 'mentionable', 'position', 'managed')
+
+    def __init__(self, id: int, name: str, permissions: int = 0, color: int = 0, hoist: bool = False,
+                 mentionable: bool = False, position: int = 0, managed: bool = False):
+        self._set(id=id, name=name, permissions=permissions, color=color, hoist=hoist, mentionable=mentionable,
+                  position=position, managed=managed)
+
+
+class CategorySpec(Spec):
+    __slots__ = ('id', 'name', 'position', 'overwrites')
+
+    def __init__(self, id: int, name: str, position: int = 0, overwrites: Tuple[OverwriteSpec, ...] = ()):
+        self._set(id=id, name=name, position=position, overwrites=tuple(overwrites))
+
+
+class ChannelSpec(Spec):
+    __slots__ = ('id', 'name', 'type', 'position', 'category_id', 'overwrites', 'topic', 'slowmode_delay', 'nsfw',
+                 'bitrate', 'user_limit')
+
+    def __init__(self, id: int, name: str, type: str, position: int = 0, category_id: Optional[int] = None,
+                 overwrites: Tuple[OverwriteSpec, ...] = (), topic: Optional[str] = None, slowmode_delay: int = 0,
+                 nsfw: bool = False, bitrate: Optional[int] = None, user_limit: Optional[int] = None):
+        self._set(id=id, name=name, type=type, position=position, category_id=category_id,
+                  overwrites=tuple(overwrites), topic=topic, slowmode_delay=slowmode_delay, nsfw=nsfw,
+                  bitrate=bitrate, user_limit=user_limit)
+
+
+class EmojiSpec(Spec):
+    __slots__ = ('id', 'name', 'animated', 'managed', 'url', 'image')
+
+    def __init__(self, id: int, name: str, animated: bool = False, managed: bool = False, url: Optional[str] = None,
+                 image: Optional[bytes] = None):
+        self._set(id=id, name=name, animated=animated, managed=managed, url=url, image=image)
+
+
+class SettingsSpec(Spec):
+    __slots__ = ('name', 'icon', 'banner', 'icon_key', 'banner_key', 'icon_url', 'banner_url')
+
+    def __init__(self, name: str, icon: Optional[bytes] = None, banner: Optional[bytes] = None,
+                 icon_key: Optional[str] = None, banner_key: Optional[str] = None, icon_url: Optional[str] = None,
+                 banner_url: Optional[str] = None):
+        self._set(name=name, icon=icon, banner=banner, icon_key=icon_key, banner_key=banner_key,
+                  icon_url=icon_url, banner_url=banner_url)
+
+
+class GuildSpec(Spec):
+    __slots__ = ('id', 'name', 'roles', 'categories', 'channels', 'emojis', 'settings')
+
+    def __init__(self, id: int, name: str, roles: Tuple[RoleSpec, ...] = (), categories: Tuple[CategorySpec, ...] = (),
+                 channels: Tuple[ChannelSpec, ...] = (), emojis: Tuple[EmojiSpec, ...] = (),
+                 settings: Optional[SettingsSpec] = None):
+        self._set(id=id, name=name, roles=tuple(roles), categories=tuple(categories), channels=tuple(channels),
+                  emojis=tuple(emojis), settings=settings or SettingsSpec(name))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GuildSpec':
+        def overwrites(item: Dict[str, Any]) -> Tuple[OverwriteSpec, ...]:
+            return tuple(OverwriteSpec(**entry) for entry in item.get('overwrites', ()))
+
+        return cls(
+            id=data['id'],
+            name=data['name'],
+            roles=tuple(RoleSpec(**role) for role in data['roles']),
+            categories=tuple(CategorySpec(**dict(category, overwrites=overwrites(category)))
+                             for category in data['categories']),
+            channels=tuple(ChannelSpec(**dict(channel, overwrites=overwrites(channel)))
+                           for channel in data['channels']),
+            emojis=tuple(EmojiSpec(**emoji) for emoji in data['emojis']),
+            settings=SettingsSpec(**data['settings']),
+        )
@@ -0,0 +1,224 @@
+from collections import defaultdict, deque
+from typing import Optional, List, Dict, Any, Tuple, Callable, Iterable
+
+from plan import Operation, has_asset
+from spec import Spec, GuildSpec, RoleSpec
+
+ROLE_FIELDS = ('permissions', 'color', 'hoist', 'mentionable')
+CHANNEL_FIELDS = {
+    'text': ('topic', 'slowmode_delay', 'nsfw'),
+    'voice': ('bitrate', 'user_limit'),
+    'stage': ('topic',),
+}
+
+
+def match_by_key(source_items: Iterable[Spec], target_items: Iterable[Spec], key: Callable[[Spec], Any],
+                 target_key: Optional[Callable[[Spec], Any]] = None) -> Tuple[Dict[int, Spec], List[Spec], List[Spec]]:
+    target_key = target_key or key
+    pool = defaultdict(deque)
+    for item in sorted(target_items, key=lambda i: (getattr(i, 'position', 0), i.id)):
+        pool[target_key(item)].append(item)
+
+    matches = {}
+    unmatched = []
+    for item in source_items:
+        candidates = pool.get(key(item))
+        if candidates:
+            matches[item.id] = candidates.popleft()
+        else:
+            unmatched.append(item)
+
+    leftover = [item for candidates in pool.values() for item in candidates]
+    return matches, unmatched, leftover
+
+
+def match_known(source_items: Iterable[Spec], target_items: Iterable[Spec],
+                known: Dict[int, int]) -> Tuple[Dict[int, Spec], List[Spec], List[Spec]]:
+    by_id = {item.id: item for item in target_items}
+    matches = {}
+    unmatched = []
+    for item in source_items:
+        target_id = known.get(item.id)
+        if target_id in by_id:
+            matches[item.id] = by_id.pop(target_id)
+        else:
+            unmatched.append(item)
+    return matches, unmatched, list(by_id.values())
+
+
+def changed_fields(source: Spec, target: Spec, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    return {field: getattr(source, field) for field in fields if getattr(source, field) != getattr(target, field)}
+
+
+def overwrites_differ(source: Spec, target: Spec, source_guild_id: int, target_guild_id: int,
+                      role_matches: Dict[int, RoleSpec], deleted_roles: set) -> bool:
+    translated = set()
+
+    for entry in source.overwrites:
+        target_id = entry.id
+        if entry.type == 'role':
+            if entry.id == source_guild_id:
+                target_id = target_guild_id
+            elif entry.id in role_matches:
+                target_id = role_matches[entry.id].id
+            else:
+                return True
+        translated.add((entry.type, target_id, entry.allow, entry.deny))
+
+    current = {
+        (entry.type, entry.id, entry.allow, entry.deny)
+        for entry in target.overwrites
+        if not (entry.type == 'role' and entry.id in deleted_roles)
+    }
+
+    return translated != current
+
+
+def in_order(ids: List[int], positions: Dict[int, Any]) -> bool:
+    current = [positions[i] for i in ids]
+    return current == sorted(current)
+
+
+class GuildMatch:
+    def __init__(self, source: GuildSpec, target: GuildSpec, known: Optional[Dict[int, int]] = None):
+        known = known or {}
+
+        self.source_roles = sorted(source.roles, key=lambda r: r.position)
+        self.target_roles = [role for role in target.roles if not role.managed]
+        self.roles, unmatched, leftover = match_known(self.source_roles, self.target_roles, known)
+        named, self.new_roles, self.old_roles = match_by_key(unmatched, leftover, lambda r: r.name)
+        self.roles.update(named)
+
+        self.source_categories = sorted(source.categories, key=lambda c: c.position)
+        self.categories, unmatched, leftover = match_known(self.source_categories, target.categories, known)
+        named, self.new_categories, self.old_categories = match_by_key(unmatched, leftover, lambda c: c.name)
+        self.categories.update(named)
+
+        self.source_channels = sorted(source.channels, key=lambda c: c.position)
+        known_channels, unmatched, leftover = match_known(self.source_channels, target.channels, known)
+        self.channels, unmatched, leftover = match_by_key(
+            unmatched, leftover,
+            lambda c: (c.name, c.type, self._parent_key(c.category_id)),
+            lambda c: (c.name, c.type, c.category_id)
+        )
+        self.moved_channels, self.new_channels, self.old_channels = match_by_key(
+            unmatched, leftover, lambda c: (c.name, c.type)
+        )
+        for channel in self.source_channels:
+            current = known_channels.get(channel.id)
+            if current is not None and current.category_id != self._parent_key(channel.category_id):
+                self.moved_channels[channel.id] = current
+        self.channels.update(known_channels)
+        self.channels.update(self.moved_channels)
+
+        self.emojis, unmatched, leftover = match_known(source.emojis, target.emojis, known)
+        named, self.new_emojis, self.old_emojis = match_by_key(unmatched, leftover, lambda e: e.name)
+        self.emojis.update(named)
+
+    def _parent_key(self, category_id: Optional[int]) -> Any:
+        if category_id is None:
+            return None
+        if category_id in self.categories:
+            return self.categories[category_id].id
+        return f"new:{category_id}"
+
+    def id_mapping(self, kind: str) -> Dict[int, int]:
+        matches = {'role': self.roles, 'category': self.categories, 'channel': self.channels, 'emoji': self.emojis}[kind]
+        return {source_id: item.id for source_id, item in matches.items()}
+
+
+def build_sync_plan(source: GuildSpec, target: GuildSpec, clone_icon: bool = True,
+                    match: Optional[GuildMatch] = None, unchanged: Iterable[int] = ()) -> List[Operation]:
+    match = match or GuildMatch(source, target)
+    unchanged = set(unchanged)
+    plan: List[Operation] = []
+    deleted_roles = {role.id for role in match.old_roles}
+
+    for channel in match.old_channels:
+        plan.append(Operation('delete', 'channel', channel.name, target_id=channel.id,
+                              parent_id=channel.category_id))
+    for category in match.old_categories:
+        plan.append(Operation('delete', 'category', category.name, target_id=category.id))
+    for role in sorted(match.old_roles, key=lambda r: r.position, reverse=True):
+        plan.append(Operation('delete', 'role', role.name, target_id=role.id))
+    for emoji in match.old_emojis:
+        plan.append(Operation('delete', 'emoji', emoji.name, target_id=emoji.id))
+
+    for role in match.source_roles:
+        if role.id in unchanged and role.id in match.roles:
+            continue
+        if role.id in match.roles:
+            current = match.roles[role.id]
+            changes = changed_fields(role, current, ('name',) + ROLE_FIELDS)
+            if changes:
+                plan.append(Operation('edit', 'role', role.name, role, current.id, changes))
+        else:
+            plan.append(Operation('create', 'role', role.name, role))
+
+    role_positions = {r.id: r.position for r in match.target_roles}
+    matched_role_ids = [match.roles[r.id].id for r in match.source_roles if r.id in match.roles]
+    if match.new_roles or not in_order(matched_role_ids, role_positions):
+        plan.append(Operation('move', 'role', 'role hierarchy'))
+
+    def differs(item: Spec, current: Spec) -> bool:
+        return overwrites_differ(item, current, source.id, target.id, match.roles, deleted_roles)
+
+    for category in match.source_categories:
+        if category.id in unchanged and category.id in match.categories:
+            continue
+        if category.id in match.categories:
+            current = match.categories[category.id]
+            changes = changed_fields(category, current, ('name',))
+            if differs(category, current):
+                changes['overwrites'] = category.overwrites
+            if changes:
+                plan.append(Operation('edit', 'category', category.name, category, current.id, changes))
+        else:
+            plan.append(Operation('create', 'category', category.name, category))
+
+    for channel in match.source_channels:
+        if channel.id in unchanged and channel.id in match.channels:
+            continue
+        if channel.id in match.channels:
+            current = match.channels[channel.id]
+            changes = changed_fields(channel, current, ('name',) + CHANNEL_FIELDS.get(channel.type, ()))
+            if differs(channel, current):
+                changes['overwrites'] = channel.overwrites
+            if changes:
+                plan.append(Operation('edit', 'channel', channel.name, channel, current.id, changes))
+        else:
+            plan.append(Operation('create', 'channel', channel.name, channel))
+
+    channel_positions = {c.id: c.position for c in target.channels + target.categories}
+    matched_category_ids = [match.categories[c.id].id for c in match.source_categories if c.id in match.categories]
+    reordered = bool(match.moved_channels) or not in_order(matched_category_ids, channel_positions)
+
+    groups = defaultdict(list)
+    for channel in match.source_channels:
+        if channel.id in match.channels:
+            groups[(channel.category_id, channel.type == 'text')].append(match.channels[channel.id].id)
+    for ids in groups.values():
+        reordered = reordered or not in_order(ids, channel_positions)
+
+    if match.new_categories or match.new_channels or reordered:
+        plan.append(Operation('move', 'channel', 'channel layout'))
+
+    for emoji in source.emojis:
+        current = match.emojis.get(emoji.id)
+        if current is not None and current.name != emoji.name:
+            plan.append(Operation('edit', 'emoji', emoji.name, emoji, current.id, {'name': emoji.name}))
+    for emoji in match.new_emojis:
+        plan.append(Operation('create', 'emoji', emoji.name, emoji))
+
+    settings = source.settings
+    changes = {}
+    if target.settings.name not in (settings.name, f"{settings.name} (Clone)"):
+        changes['name'] = f"{settings.name} (Clone)"
+    if clone_icon and has_asset(settings, 'icon') and not target.settings.icon_key:
+        changes['icon'] = settings.icon
+    if has_asset(settings, 'banner') and not target.settings.banner_key:
+        changes['banner'] = settings.banner
+    if changes:
+        plan.append(Operation('edit', 'settings', 'server settings', settings, target.id, changes))
+
+    return plan
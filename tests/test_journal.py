@@ -0,0 +1,103 @@
+import json
+import os
+
+import pytest
+
+from journal import CloneJournal, JournalError
+from main import DiscordServerCloner
+from plan import build_clone_plan
+from spec import RoleSpec, CategorySpec, ChannelSpec, GuildSpec
+
+SOURCE_ID = 1000
+TARGET_ID = 2000
+
+
+def source_guild() -> GuildSpec:
+    roles = (RoleSpec(SOURCE_ID + 1, 'Member', position=1), RoleSpec(SOURCE_ID + 2, 'Admin', position=2))
+    categories = (CategorySpec(SOURCE_ID + 10, 'Chat'),)
+    channels = (ChannelSpec(SOURCE_ID + 20, 'general', 'text', category_id=SOURCE_ID + 10),)
+    return GuildSpec(SOURCE_ID, 'Server', roles, categories, channels)
+
+
+def test_recorded_operations_survive_a_reload(tmp_path):
+    journal = CloneJournal.create(str(tmp_path), SOURCE_ID, TARGET_ID, True)
+    journal.record(f"create:role:{SOURCE_ID + 1}", 'role', SOURCE_ID + 1, TARGET_ID + 1)
+    journal.record('move:role', 'role', None, None)
+    journal.close()
+
+    loaded = CloneJournal.load(journal.path)
+
+    assert loaded.target_id == TARGET_ID
+    assert loaded.is_done('move:role')
+    assert loaded.mapping('role') == {SOURCE_ID + 1: TARGET_ID + 1}
+    assert loaded.created_ids() == [TARGET_ID + 1]
+    assert not loaded.finished
+
+
+def test_truncated_last_line_is_dropped(tmp_path):
+    journal = CloneJournal.create(str(tmp_path), SOURCE_ID, TARGET_ID, True)
+    journal.record(f"create:role:{SOURCE_ID + 1}", 'role', SOURCE_ID + 1, TARGET_ID + 1)
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "op", "op": "create:ro')
+
+    loaded = CloneJournal.load(journal.path)
+
+    assert list(loaded.completed) == [f"create:role:{SOURCE_ID + 1}"]
+    with open(journal.path, 'r', encoding='utf-8') as f:
+        assert all(json.loads(line) for line in f)
+
+
+def test_invalidated_operations_stay_pending_after_a_reload(tmp_path):
+    journal = CloneJournal.create(str(tmp_path), SOURCE_ID, TARGET_ID, True)
+    journal.record('move:role', 'role', None, None)
+    journal.invalidate('move:role')
+    journal.invalidate('move:channel')
+    journal.close()
+
+    assert not CloneJournal.load(journal.path).is_done('move:role')
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.jsonl'
+    path.write_text('{"type": "op"}\n')
+
+    with pytest.raises(JournalError):
+        CloneJournal.load(str(path))
+
+
+def test_find_unfinished_skips_finished_journals(tmp_path):
+    finished = CloneJournal.create(str(tmp_path), SOURCE_ID, TARGET_ID, True)
+    finished.mark('finished')
+    finished.close()
+    unfinished = CloneJournal.create(str(tmp_path), SOURCE_ID, TARGET_ID + 1, True)
+    unfinished.close()
+    (tmp_path / 'broken.jsonl').write_text('not json\n')
+
+    assert CloneJournal.find_unfinished(str(tmp_path)) == [unfinished.path]
+
+
+def test_resume_skips_done_operations_and_redoes_moves(tmp_path):
+    source = source_guild()
+    journal = CloneJournal.create(str(tmp_path), SOURCE_ID, TARGET_ID, True)
+    journal.record(f"create:role:{SOURCE_ID + 1}", 'role', SOURCE_ID + 1, TARGET_ID + 1)
+    journal.record('move:role', 'role', None, None)
+    journal.record(f"create:category:{SOURCE_ID + 10}", 'category', SOURCE_ID + 10, TARGET_ID + 10)
+    journal.record(f"create:channel:{SOURCE_ID + 20}", 'channel', SOURCE_ID + 20, TARGET_ID + 20)
+    journal.record('move:channel', 'channel', None, None)
+
+    plan = build_clone_plan(source, GuildSpec(TARGET_ID, 'Server'))
+    plan = DiscordServerCloner('token')._pending_operations(plan, journal)
+    journal.close()
+
+    assert [op.op_id for op in plan] == [f"create:role:{SOURCE_ID + 2}", 'move:role']
+    reloaded = CloneJournal.load(journal.path)
+    assert not reloaded.is_done('move:role')
+    assert reloaded.is_done('move:channel')
+
+
+def test_discard_removes_the_journal(tmp_path):
+    journal = CloneJournal.create(str(tmp_path), SOURCE_ID, TARGET_ID, True)
+    journal.discard()
+
+    assert not os.path.exists(journal.path)
@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def run_script(name: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, os.path.join(ROOT, name), *args], cwd=ROOT, stdin=subprocess.DEVNULL,
+                          capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=60)
+
+
+def test_main_starts():
+    result = run_script('main.py', '--help')
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'is not defined' not in result.stdout
+    assert '--resume' in result.stdout
+
+
+def test_cli_starts():
+    result = run_script('cli.py', '--help')
+    assert result.returncode == 0, result.stdout + result.stderr
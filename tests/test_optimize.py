@@ -0,0 +1,134 @@
+from optimize import PlanOptimizer
+from plan import Operation, build_clean_plan, build_clone_plan
+from spec import RoleSpec, CategorySpec, ChannelSpec, GuildSpec, OverwriteSpec
+
+SOURCE_ID = 1000
+TARGET_ID = 2000
+
+
+def make_guild(guild_id: int, offset: int, name: str = 'Server') -> GuildSpec:
+    roles = (
+        RoleSpec(guild_id, '@everyone', position=0),
+        RoleSpec(offset + 1, 'Member', permissions=8, position=1),
+        RoleSpec(offset + 2, 'Admin', permissions=16, position=2),
+    )
+    categories = (CategorySpec(offset + 10, 'Info', position=0),
+                  CategorySpec(offset + 11, 'Chat', position=1))
+    channels = (
+        ChannelSpec(offset + 20, 'rules', 'text', position=0, category_id=offset + 10, topic='Read me'),
+        ChannelSpec(offset + 21, 'general', 'text', position=1, category_id=offset + 11,
+                    overwrites=(OverwriteSpec(offset + 1, 'role', 1024, 0),)),
+    )
+    return GuildSpec(guild_id, name, roles, categories, channels)
+
+
+def rebuild_plan(source: GuildSpec, target: GuildSpec):
+    return build_clean_plan(target) + build_clone_plan(source, target)
+
+
+def ops(plan):
+    return [(op.action, op.kind, op.name) for op in plan]
+
+
+def test_identical_rebuild_reuses_everything():
+    source = make_guild(SOURCE_ID, SOURCE_ID)
+    target = make_guild(TARGET_ID, TARGET_ID)
+    optimizer = PlanOptimizer(source, target)
+
+    plan = optimizer.optimize(rebuild_plan(source, target))
+
+    assert ops(plan) == []
+    assert optimizer.reused['role'] == {SOURCE_ID: TARGET_ID, SOURCE_ID + 1: TARGET_ID + 1,
+                                       SOURCE_ID + 2: TARGET_ID + 2}
+    assert optimizer.reused['channel'] == {SOURCE_ID + 20: TARGET_ID + 20, SOURCE_ID + 21: TARGET_ID + 21}
+    assert optimizer.saved['moves'] == 2
+
+
+def test_reused_objects_are_edited_where_they_differ():
+    source = make_guild(SOURCE_ID, SOURCE_ID)
+    target = make_guild(TARGET_ID, TARGET_ID)
+    roles = tuple(role.replace(permissions=24) if role.name == 'Admin' else role for role in target.roles)
+    channels = tuple(channel.replace(topic='Old rules') if channel.name == 'rules' else channel
+                     for channel in target.channels)
+    target = target.replace(roles=roles, channels=channels)
+    optimizer = PlanOptimizer(source, target)
+
+    plan = optimizer.optimize(rebuild_plan(source, target))
+
+    assert ops(plan) == [('edit', 'role', 'Admin'), ('edit', 'channel', 'rules')]
+    assert plan[0].target_id == TARGET_ID + 2
+    assert plan[0].changes == {'permissions': 16}
+    assert plan[1].changes == {'topic': 'Read me'}
+
+
+def test_overwrites_follow_reused_roles():
+    source = make_guild(SOURCE_ID, SOURCE_ID)
+    target = make_guild(TARGET_ID, TARGET_ID)
+    channels = tuple(channel.replace(overwrites=(OverwriteSpec(TARGET_ID + 2, 'role', 1024, 0),))
+                     if channel.name == 'general' else channel for channel in target.channels)
+    target = target.replace(channels=channels)
+
+    plan = PlanOptimizer(source, target).optimize(rebuild_plan(source, target))
+
+    assert ops(plan) == [('edit', 'channel', 'general')]
+    assert plan[0].changes == {'overwrites': (OverwriteSpec(SOURCE_ID + 1, 'role', 1024, 0),)}
+
+
+def test_unmatched_objects_are_still_deleted_and_created():
+    source = make_guild(SOURCE_ID, SOURCE_ID)
+    target = make_guild(TARGET_ID, TARGET_ID)
+    source = source.replace(roles=source.roles + (RoleSpec(SOURCE_ID + 3, 'New', position=3),))
+    target = target.replace(roles=target.roles + (RoleSpec(TARGET_ID + 3, 'Old', position=3),))
+
+    plan = PlanOptimizer(source, target).optimize(rebuild_plan(source, target))
+
+    assert ops(plan) == [('delete', 'role', 'Old'), ('create', 'role', 'New'), ('move', 'role', 'role hierarchy')]
+
+
+def test_moves_are_kept_when_order_differs():
+    source = make_guild(SOURCE_ID, SOURCE_ID)
+    target = make_guild(TARGET_ID, TARGET_ID)
+    roles = tuple(role.replace(position=3 - role.position) if role.position else role for role in target.roles)
+    target = target.replace(roles=roles)
+
+    plan = PlanOptimizer(source, target).optimize(rebuild_plan(source, target))
+
+    assert ops(plan) == [('move', 'role', 'role hierarchy')]
+
+
+def test_edits_fold_into_creates():
+    role = RoleSpec(SOURCE_ID + 1, 'Member', permissions=8, position=1)
+    plan = [Operation('create', 'role', role.name, role),
+            Operation('edit', 'role', role.name, role, changes={'permissions': 24, 'color': 5})]
+    optimizer = PlanOptimizer(make_guild(SOURCE_ID, SOURCE_ID), GuildSpec(TARGET_ID, 'Server'))
+
+    plan = optimizer.optimize(plan)
+
+    assert ops(plan) == [('create', 'role', 'Member')]
+    assert plan[0].source.permissions == 24
+    assert plan[0].source.color == 5
+    assert optimizer.saved['folded'] == 1
+
+
+def test_duplicate_operations_are_merged():
+    channel = ChannelSpec(SOURCE_ID + 20, 'rules', 'text')
+    plan = [Operation('edit', 'channel', 'rules', channel, TARGET_ID + 20, {'topic': 'A'}),
+            Operation('edit', 'channel', 'rules', channel, TARGET_ID + 20, {'nsfw': True})]
+    optimizer = PlanOptimizer(make_guild(SOURCE_ID, SOURCE_ID), make_guild(TARGET_ID, TARGET_ID))
+
+    plan = optimizer.optimize(plan)
+
+    assert len(plan) == 1
+    assert plan[0].changes == {'topic': 'A', 'nsfw': True}
+    assert optimizer.saved['merged'] == 1
+
+
+def test_settings_edit_that_only_restores_the_name_is_dropped():
+    target = make_guild(TARGET_ID, TARGET_ID, 'Server (Clone)')
+    source = make_guild(SOURCE_ID, SOURCE_ID)
+    plan = [Operation('edit', 'settings', 'server settings', source.settings, TARGET_ID,
+                      {'name': 'Server (Clone)'})]
+    optimizer = PlanOptimizer(source, target)
+
+    assert optimizer.optimize(plan) == []
+    assert optimizer.calls_saved == 1
@@ -0,0 +1,111 @@
+import pytest
+
+from selection import Selection, SelectionError, Selector, build_partial_plan
+from spec import RoleSpec, CategorySpec, ChannelSpec, EmojiSpec, GuildSpec, OverwriteSpec
+
+SOURCE_ID = 1000
+TARGET_ID = 2000
+
+
+def make_guild(guild_id: int, offset: int) -> GuildSpec:
+    roles = (
+        RoleSpec(guild_id, '@everyone', position=0),
+        RoleSpec(offset + 1, 'Member', position=1),
+        RoleSpec(offset + 2, 'Staff', position=2),
+    )
+    categories = (
+        CategorySpec(offset + 10, 'Info', position=0),
+        CategorySpec(offset + 11, 'Staff', position=1, overwrites=(OverwriteSpec(offset + 2, 'role', 1024, 0),)),
+    )
+    channels = (
+        ChannelSpec(offset + 20, 'rules', 'text', position=0, category_id=offset + 10),
+        ChannelSpec(offset + 21, 'news', 'text', position=1, category_id=offset + 10,
+                    overwrites=(OverwriteSpec(offset + 1, 'role', 0, 2048),)),
+        ChannelSpec(offset + 22, 'staff-chat', 'text', position=2, category_id=offset + 11),
+        ChannelSpec(offset + 23, 'Meeting', 'voice', position=3, category_id=offset + 11),
+        ChannelSpec(offset + 24, 'lobby', 'text', position=4),
+    )
+    emojis = (EmojiSpec(offset + 30, 'wave'), EmojiSpec(offset + 31, 'party'))
+    return GuildSpec(guild_id, 'Server', roles, categories, channels, emojis)
+
+
+def names(items):
+    return [item.name for item in items]
+
+
+def test_empty_selection_keeps_everything():
+    source = make_guild(SOURCE_ID, SOURCE_ID)
+    selection = Selection()
+
+    assert not selection
+    assert selection.subset(source).spec == source
+
+
+def test_category_pulls_in_its_channels_and_overwrite_roles():
+    subset = Selection(['category:Staff']).subset(make_guild(SOURCE_ID, SOURCE_ID))
+
+    assert names(subset.spec.categories) == ['Staff']
+    assert names(subset.spec.channels) == ['staff-chat', 'Meeting']
+    assert names(subset.spec.roles) == ['Staff']
+    assert subset.spec.emojis == ()
+
+
+def test_channel_keeps_its_parent_category():
+    subset = Selection(['name:news']).subset(make_guild(SOURCE_ID, SOURCE_ID))
+
+    assert names(subset.spec.categories) == ['Info']
+    assert names(subset.spec.channels) == ['news']
+    assert names(subset.spec.roles) == ['Member']
+    assert SOURCE_ID + 10 not in subset.selected
+
+
+def test_exclude_removes_matching_items():
+    subset = Selection(['category:Staff', 'emoji:*'], ['type:voice', 'emoji:party']) \
+        .subset(make_guild(SOURCE_ID, SOURCE_ID))
+
+    assert names(subset.spec.channels) == ['staff-chat']
+    assert names(subset.spec.emojis) == ['wave']
+
+
+def test_name_patterns_are_case_insensitive_globs():
+    subset = Selection(['STAFF-*', 'lobby']).subset(make_guild(SOURCE_ID, SOURCE_ID))
+
+    assert names(subset.spec.channels) == ['staff-chat', 'lobby']
+    assert names(subset.spec.categories) == ['Staff']
+
+
+@pytest.mark.parametrize('text', ['colour:red', 'type:forum', 'id:abc'])
+def test_invalid_selectors_are_rejected(text):
+    with pytest.raises(SelectionError):
+        Selector.parse(text)
+
+
+def test_selection_round_trips_through_a_dict():
+    selection = Selection(['category:Staff', '1020'], ['type:voice'])
+
+    restored = Selection.from_dict(selection.as_dict())
+
+    assert restored.as_dict() == {'include': ['category:Staff', 'id:1020'], 'exclude': ['type:voice']}
+    assert not Selection.from_dict(None)
+
+
+def test_target_view_only_shows_matching_objects():
+    subset = Selection(['category:Staff']).subset(make_guild(SOURCE_ID, SOURCE_ID))
+
+    view = subset.target_view(make_guild(TARGET_ID, TARGET_ID))
+
+    assert names(view.categories) == ['Staff']
+    assert names(view.channels) == ['staff-chat', 'Meeting']
+    assert names(view.roles) == ['Staff']
+
+
+def test_partial_plan_leaves_the_rest_of_the_target_alone():
+    source = make_guild(SOURCE_ID, SOURCE_ID)
+    channels = tuple(channel.replace(topic='Staff only') if channel.name == 'staff-chat' else channel
+                     for channel in source.channels)
+    subset = Selection(['category:Staff']).subset(source.replace(channels=channels))
+
+    plan, match = build_partial_plan(subset, make_guild(TARGET_ID, TARGET_ID), rebuild=False)
+
+    assert [(op.action, op.kind, op.name) for op in plan] == [('edit', 'channel', 'staff-chat')]
+    assert match.id_mapping('channel') == {SOURCE_ID + 22: TARGET_ID + 22, SOURCE_ID + 23: TARGET_ID + 23}
@@ -0,0 +1,122 @@
+from spec import RoleSpec, CategorySpec, ChannelSpec, GuildSpec, OverwriteSpec
+from sync import GuildMatch, build_sync_plan
+
+SOURCE_ID = 1000
+TARGET_ID = 2000
+
+
+def make_guild(guild_id: int, offset: int, name: str = 'Server') -> GuildSpec:
+    roles = (
+        RoleSpec(guild_id, '@everyone', position=0),
+        RoleSpec(offset + 1, 'Member', permissions=8, position=1),
+        RoleSpec(offset + 2, 'Admin', permissions=16, position=2),
+    )
+    categories = (CategorySpec(offset + 10, 'Info', position=0),
+                  CategorySpec(offset + 11, 'Chat', position=1,
+                               overwrites=(OverwriteSpec(offset + 1, 'role', 1024, 0),)))
+    channels = (
+        ChannelSpec(offset + 20, 'rules', 'text', position=0, category_id=offset + 10, topic='Read me'),
+        ChannelSpec(offset + 21, 'general', 'text', position=1, category_id=offset + 11,
+                    overwrites=(OverwriteSpec(offset + 1, 'role', 1024, 0),)),
+        ChannelSpec(offset + 22, 'Lounge', 'voice', position=2, category_id=offset + 11, bitrate=64000),
+    )
+    return GuildSpec(guild_id, name, roles, categories, channels)
+
+
+def source_guild() -> GuildSpec:
+    return make_guild(SOURCE_ID, SOURCE_ID)
+
+
+def target_guild(name: str = 'Server') -> GuildSpec:
+    return make_guild(TARGET_ID, TARGET_ID, name)
+
+
+def ops(plan):
+    return [(op.action, op.kind, op.name) for op in plan]
+
+
+def test_identical_servers_need_no_operations():
+    assert build_sync_plan(source_guild(), target_guild()) == []
+
+
+def test_match_pairs_objects_by_name_type_and_parent():
+    match = GuildMatch(source_guild(), target_guild())
+    assert match.id_mapping('role') == {SOURCE_ID: TARGET_ID, SOURCE_ID + 1: TARGET_ID + 1,
+                                        SOURCE_ID + 2: TARGET_ID + 2}
+    assert match.id_mapping('channel') == {SOURCE_ID + 20: TARGET_ID + 20, SOURCE_ID + 21: TARGET_ID + 21,
+                                           SOURCE_ID + 22: TARGET_ID + 22}
+
+
+def test_changed_fields_become_edits():
+    source = source_guild()
+    roles = tuple(role.replace(permissions=24) if role.name == 'Admin' else role for role in source.roles)
+    channels = tuple(channel.replace(topic='New rules') if channel.name == 'rules' else channel
+                     for channel in source.channels)
+
+    plan = build_sync_plan(source.replace(roles=roles, channels=channels), target_guild())
+
+    assert ops(plan) == [('edit', 'role', 'Admin'), ('edit', 'channel', 'rules')]
+    assert plan[0].changes == {'permissions': 24}
+    assert plan[0].target_id == TARGET_ID + 2
+    assert plan[1].changes == {'topic': 'New rules'}
+
+
+def test_missing_and_extra_objects_become_creates_and_deletes():
+    source = source_guild()
+    target = target_guild()
+    source = source.replace(channels=source.channels + (ChannelSpec(SOURCE_ID + 23, 'memes', 'text', position=3,
+                                                                    category_id=SOURCE_ID + 11),))
+    target = target.replace(roles=target.roles + (RoleSpec(TARGET_ID + 3, 'Old', position=3),))
+
+    plan = build_sync_plan(source, target)
+
+    assert ('delete', 'role', 'Old') in ops(plan)
+    assert ('create', 'channel', 'memes') in ops(plan)
+    assert ('move', 'channel', 'channel layout') in ops(plan)
+    assert ('move', 'role', 'role hierarchy') not in ops(plan)
+
+
+def test_overwrites_are_compared_through_the_role_match():
+    source = source_guild()
+    channels = tuple(channel.replace(overwrites=(OverwriteSpec(SOURCE_ID + 2, 'role', 1024, 0),))
+                     if channel.name == 'general' else channel for channel in source.channels)
+
+    plan = build_sync_plan(source.replace(channels=channels), target_guild())
+
+    assert ops(plan) == [('edit', 'channel', 'general')]
+    assert plan[0].changes == {'overwrites': (OverwriteSpec(SOURCE_ID + 2, 'role', 1024, 0),)}
+
+
+def test_channel_moved_to_another_category_is_reordered_not_recreated():
+    source = source_guild()
+    channels = tuple(channel.replace(category_id=SOURCE_ID + 10) if channel.name == 'Lounge' else channel
+                     for channel in source.channels)
+
+    plan = build_sync_plan(source.replace(channels=channels), target_guild())
+
+    assert ops(plan) == [('move', 'channel', 'channel layout')]
+
+
+def test_reordered_roles_are_moved_once():
+    source = source_guild()
+    roles = tuple(role.replace(position=3 - role.position) if role.position else role for role in source.roles)
+
+    plan = build_sync_plan(source.replace(roles=roles), target_guild())
+
+    assert ops(plan) == [('move', 'role', 'role hierarchy')]
+
+
+def test_unchanged_objects_are_skipped():
+    source = source_guild()
+    roles = tuple(role.replace(permissions=24) if role.name == 'Admin' else role for role in source.roles)
+
+    plan = build_sync_plan(source.replace(roles=roles), target_guild(), unchanged={SOURCE_ID + 2})
+
+    assert plan == []
+
+
+def test_server_name_is_synced_with_the_clone_suffix():
+    plan = build_sync_plan(source_guild(), target_guild(name='Something else'))
+
+    assert ops(plan) == [('edit', 'settings', 'server settings')]
+    assert plan[0].changes == {'name': 'Server (Clone)'}